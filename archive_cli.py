@@ -0,0 +1,105 @@
+# archive_cli.py
+"""无界面的批量存档检查工具，逐行输出 JSON (JSON Lines)
+
+用法:
+    python -m archive_cli saves/* "backups/**/level.dat" --fields world_info,dimension
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# 注意：此模块不能导入 tkinter，以便在无显示器的主机上运行
+from mc_saver import FIELD_PATHS, MinecraftSaver, nbt_json_default, nbt_to_primitive
+
+_FIELD_GETTERS = {
+    "world_info": MinecraftSaver.get_world_info,
+    "player_pos": MinecraftSaver.get_player_position,
+    "dimension": MinecraftSaver.get_dimension,
+    "inventory": MinecraftSaver.get_player_inventory,
+    "ender_chest": MinecraftSaver.get_player_ender_chest,
+}
+
+
+def expand_world_paths(patterns):
+    """展开路径与通配符；匹配到 level.dat 文件时取其所在目录"""
+    worlds = []
+    seen = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for match in sorted(matches):
+            if os.path.basename(match) == "level.dat":
+                match = os.path.dirname(match) or "."
+            key = os.path.abspath(match)
+            if key not in seen:
+                seen.add(key)
+                worlds.append(match)
+    return worlds
+
+
+def inspect_world(world_path, fields):
+    """读取单个存档的指定字段，返回可直接序列化为 JSON 的字典"""
+    record = {"path": world_path}
+    try:
+        saver = MinecraftSaver(world_path, fields=fields)
+        for field in fields:
+            record[field] = nbt_to_primitive(_FIELD_GETTERS[field](saver))
+    except FileNotFoundError:
+        record["error"] = "找不到 level.dat 文件"
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+
+def inspect_world_line(world_path, fields):
+    """在工作进程中完成序列化：数组视图无法跨进程传递"""
+    record = inspect_world(world_path, fields)
+    return "error" in record, json.dumps(record, ensure_ascii=False, default=nbt_json_default)
+
+
+def parse_fields(value):
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in FIELD_PATHS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"未知字段: {', '.join(unknown)}（可选: {', '.join(FIELD_PATHS)}）")
+    return fields
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="archive_cli",
+        description="批量读取 Minecraft 存档信息并以 JSON Lines 输出到标准输出",
+    )
+    parser.add_argument("paths", nargs="+", help="存档目录、level.dat 路径或通配符")
+    parser.add_argument("--fields", type=parse_fields, default=list(FIELD_PATHS),
+                        help=f"逗号分隔的字段（默认全部: {','.join(FIELD_PATHS)}）")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    worlds = expand_world_paths(args.paths)
+    failed = 0
+    out = sys.stdout
+    if len(worlds) <= 1 or args.jobs == 1:
+        results = (inspect_world_line(world, args.fields) for world in worlds)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=args.jobs)
+        futures = [executor.submit(inspect_world_line, world, args.fields) for world in worlds]
+        results = (future.result() for future in as_completed(futures))
+    try:
+        for has_error, line in results:
+            failed += has_error
+            out.write(line + "\n")
+            out.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
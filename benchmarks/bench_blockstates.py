@@ -0,0 +1,82 @@
+# benchmarks/bench_blockstates.py
+"""对比纯 Python 与 NumPy 向量化的方块分段解包速度
+
+用法: python benchmarks/bench_blockstates.py [--sections 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from blockstates import (SECTION_VOLUME, bits_per_entry, unpack_indices,
+                         unpack_indices_py, unpack_sections)
+
+
+def pack_indices(indices, palette_len, spanning=False):
+    """把索引打包为有符号 long 列表（与游戏存储格式一致）"""
+    bits = bits_per_entry(palette_len)
+    longs = []
+    if spanning:
+        total = 0
+        for i, value in enumerate(indices):
+            total |= value << (i * bits)
+        for i in range((len(indices) * bits + 63) // 64):
+            longs.append((total >> (64 * i)) & 0xFFFFFFFFFFFFFFFF)
+    else:
+        per_long = 64 // bits
+        for start in range(0, len(indices), per_long):
+            value = 0
+            for j, index in enumerate(indices[start:start + per_long]):
+                value |= index << (j * bits)
+            longs.append(value)
+    return [v - (1 << 64) if v >= 1 << 63 else v for v in longs]
+
+
+def make_sections(n, seed=0, spanning=False):
+    rng = random.Random(seed)
+    sections = []
+    for _ in range(n):
+        palette_len = rng.choice([2, 5, 17, 40, 100, 300])
+        indices = [rng.randrange(palette_len) for _ in range(SECTION_VOLUME)]
+        sections.append((palette_len, pack_indices(indices, palette_len, spanning), spanning, indices))
+    return sections
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=2000)
+    args = parser.parse_args()
+
+    for spanning in (False, True):
+        sections = make_sections(args.sections, spanning=spanning)
+        arrays = [(p, np.array(d, dtype=np.int64), s) for p, d, s, _ in sections]
+
+        # 先校验三种实现结果一致
+        for (p, d, s, expected), batch in zip(sections[:50], unpack_sections(arrays[:50])):
+            assert unpack_indices_py(d, p, s) == expected
+            assert unpack_indices(d, p, s).tolist() == expected
+            assert batch.tolist() == expected
+
+        t_py = timed(lambda: [unpack_indices_py(d, p, s) for p, d, s, _ in sections])
+        t_np = timed(lambda: [unpack_indices(d, p, s) for p, d, s in arrays])
+        t_batch = timed(lambda: unpack_sections(arrays))
+        label = "跨 long (1.16 前)" if spanning else "不跨 long (1.16+)"
+        print(f"{label}: {args.sections} 个分段")
+        for name, t in (("纯 Python", t_py), ("NumPy 单分段", t_np), ("NumPy 批量", t_batch)):
+            print(f"  {name:<12} {t * 1000:9.1f} ms  {args.sections / t:10.0f} 分段/秒  加速 {t_py / t:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_level_dat.py
+"""对比 nbtlib.load 与流式标签路径读取在大体积 level.dat 上的耗时
+
+用法: python benchmarks/bench_level_dat.py [--mb 8] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nbtlib
+
+from mc_saver import LEVEL_DAT_PATHS
+from nbt_stream import read_nbt_paths
+from synthetic import make_level_dat
+
+
+def bench(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, nargs="+", default=[1, 4, 16], help="合成 level.dat 的大致未压缩大小 (MB)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mb in args.mb:
+            path = os.path.join(tmp, f"level_{mb}.dat")
+            make_level_dat(path, mb)
+            size_kb = os.path.getsize(path) / 1024
+
+            def full_load():
+                data = nbtlib.load(path)["Data"]
+                return data["Player"]["Pos"], data["LevelName"]
+
+            t_full = bench(full_load, args.repeat)
+            t_lazy = bench(lambda: read_nbt_paths(path, LEVEL_DAT_PATHS), args.repeat)
+            print(f"{mb:>6} MB (压缩后 {size_kb:8.0f} KB): "
+                  f"nbtlib.load {t_full * 1000:9.1f} ms | "
+                  f"read_nbt_paths {t_lazy * 1000:9.1f} ms | "
+                  f"加速 {t_full / t_lazy:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
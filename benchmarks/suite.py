@@ -0,0 +1,358 @@
+# benchmarks/suite.py
+"""基准测试套件：生成合成存档，测量各处理路径的吞吐量与峰值内存，并与基线比较
+
+用法:
+    python benchmarks/suite.py                       # 运行全部用例并与 baseline.json 比较
+    python benchmarks/suite.py --cases level_dat_load world_scan
+    python benchmarks/suite.py --save-baseline       # 把本次结果写入 baseline.json
+    python benchmarks/suite.py --cases prune_scan --save-baseline   # 只更新这些用例的基线
+    python benchmarks/suite.py --preset large --fail-on-regression
+
+每个用例在独立的子进程中运行，峰值内存 (RSS) 互不影响。
+并行用例（parallel=True）只与进程数相同的基线比较；在单核机器上保存的这些基线只反映单进程性能。
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+# 合成存档规模：level.dat 大小 (MB)、玩家数、区域文件数、每个区域的区块数
+PRESETS = {
+    "small": {"level_mb": 1, "players": 200, "regions": 2, "chunks_per_region": 256},
+    "large": {"level_mb": 16, "players": 2000, "regions": 8, "chunks_per_region": 1024},
+}
+
+CASES = {}
+
+
+def case(name, unit, parallel=False):
+    """登记用例：函数接收 (存档目录, 临时目录, 进程数)，返回 (被计时的函数, 处理量, 字节数)
+
+    parallel 表示用例在进程池中运行，吞吐量随进程数变化。
+    """
+    def register(func):
+        CASES[name] = (func, unit, parallel)
+        return func
+    return register
+
+
+def _region_bytes(world):
+    region_dir = os.path.join(world, "region")
+    return sum(os.path.getsize(os.path.join(region_dir, n)) for n in os.listdir(region_dir))
+
+
+def _region_chunks(world):
+    from region import RegionFile, list_region_files
+    total = 0
+    for path in list_region_files(os.path.join(world, "region")):
+        with RegionFile(path) as region:
+            total += region.chunk_count()
+    return total
+
+
+@case("level_dat_load", "存档")
+def bench_level_dat_load(world, tmp, workers):
+    from mc_saver import MinecraftSaver
+
+    def run():
+        saver = MinecraftSaver(world)
+        saver.get_world_info()
+        saver.get_player_position()
+        saver.get_dimension()
+        saver.get_player_inventory()
+
+    return run, 1, os.path.getsize(os.path.join(world, "level.dat"))
+
+
+@case("nbt_to_primitive", "存档")
+def bench_nbt_to_primitive(world, tmp, workers):
+    import nbtlib
+    from mc_saver import nbt_to_primitive
+    path = os.path.join(world, "level.dat")
+    data = nbtlib.load(path)
+    return lambda: nbt_to_primitive(data, max_depth=64), 1, os.path.getsize(path)
+
+
+@case("format_nbt", "物品")
+def bench_format_nbt(world, tmp, workers):
+    # main 在导入时会在当前目录创建 logs/，子进程的工作目录为临时目录
+    from main import format_nbt
+    from players import PLAYER_PATHS
+    from nbt_stream import read_nbt_paths
+    playerdata = os.path.join(world, "playerdata")
+    tags = []
+    for name in sorted(os.listdir(playerdata)):
+        inventory = read_nbt_paths(os.path.join(playerdata, name), PLAYER_PATHS).get("Inventory", [])
+        tags.extend(item["tag"] for item in inventory if "tag" in item)
+    return lambda: [format_nbt(tag) for tag in tags], len(tags), 0
+
+
+@case("json_export", "存档")
+def bench_json_export(world, tmp, workers):
+    from mc_saver import nbt_json_default
+    from nbt_stream import read_nbt_file
+    data = read_nbt_file(os.path.join(world, "level.dat"))
+    size = len(json.dumps(data, ensure_ascii=False, default=nbt_json_default).encode("utf-8"))
+    return lambda: json.dumps(data, ensure_ascii=False, indent=4, default=nbt_json_default), 1, size
+
+
+@case("region_read", "区块")
+def bench_region_read(world, tmp, workers):
+    from region import RegionFile, list_region_files
+    paths = list_region_files(os.path.join(world, "region"))
+
+    def run():
+        for path in paths:
+            with RegionFile(path) as region:
+                for x, z in region.iter_chunks():
+                    region.read_chunk(x, z)
+
+    return run, _region_chunks(world), _region_bytes(world)
+
+
+@case("world_export", "区块", parallel=True)
+def bench_world_export(world, tmp, workers):
+    from world_export import export_world
+    out_path = os.path.join(tmp, "export.ndjson")
+    return (lambda: export_world(world, out_path, max_workers=workers),
+            _region_chunks(world), _region_bytes(world))
+
+
+@case("world_scan", "区块", parallel=True)
+def bench_world_scan(world, tmp, workers):
+    from world_scan import QUERY_COUNT_BLOCKS, WorldScan
+
+    def run():
+        scan = WorldScan(world, QUERY_COUNT_BLOCKS, ["diamond_ore", "iron_ore"], max_workers=workers)
+        for _ in scan.iter_results():
+            pass
+
+    return run, _region_chunks(world), _region_bytes(world)
+
+
+@case("world_index", "区块", parallel=True)
+def bench_world_index(world, tmp, workers):
+    from world_index import WorldIndex
+    index_path = os.path.join(tmp, "index.sqlite")
+
+    def run():
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        with WorldIndex(world, index_path=index_path) as index:
+            index.refresh(max_workers=workers)
+
+    return run, _region_chunks(world), _region_bytes(world)
+
+
+@case("players", "玩家", parallel=True)
+def bench_players(world, tmp, workers):
+    from players import PlayerData
+    cache_path = os.path.join(tmp, "players.json")
+    playerdata = os.path.join(world, "playerdata")
+
+    def run():
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        PlayerData(world, cache_path=cache_path).refresh(max_workers=workers)
+
+    size = sum(os.path.getsize(os.path.join(playerdata, n)) for n in os.listdir(playerdata))
+    return run, len(os.listdir(playerdata)), size
+
+
+@case("chunk_cache", "区块")
+def bench_chunk_cache(world, tmp, workers):
+    from chunk_cache import ChunkCache
+    from dimensions import OVERWORLD, DimensionLoader
+    from region import RegionFile, list_region_files
+    coords = []
+    for path in list_region_files(os.path.join(world, "region")):
+        with RegionFile(path) as region:
+            rx, rz = region.coords
+            coords.extend((rx * 32 + x, rz * 32 + z) for x, z in region.iter_chunks())
+    loader = DimensionLoader(world, OVERWORLD, "", cache=ChunkCache(1024))
+    # 先解码一遍填满缓存，计时的是命中路径
+    for cx, cz in coords:
+        loader.decoded_chunk(cx, cz)
+    return lambda: [loader.decoded_chunk(cx, cz) for cx, cz in coords], len(coords), 0
+
+
+@case("map_render", "区块", parallel=True)
+def bench_map_render(world, tmp, workers):
+    from map_render import MapRenderer
+    cache_dir = os.path.join(tmp, "tiles")
+
+    def run():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        for _ in MapRenderer(world, cache_dir=cache_dir, max_workers=workers).iter_tiles():
+            pass
+
+    return run, _region_chunks(world), _region_bytes(world)
+
+
+@case("prune_scan", "区块", parallel=True)
+def bench_prune_scan(world, tmp, workers):
+    from world_prune import WorldPruner
+    cache_dir = os.path.join(tmp, "prune")
+
+    def run():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        WorldPruner(world, cache_dir=cache_dir, max_workers=workers).scan().plan()
+
+    return run, _region_chunks(world), _region_bytes(world)
+
+
+def peak_rss_mb():
+    """本进程与子进程中的最大峰值 RSS (MB)；无法获取时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 1024 / 1024
+        except (ImportError, AttributeError):
+            return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(name, world, repeat, workers):
+    """在当前进程中运行单个用例（由子进程调用），返回结果字典"""
+    func, unit, parallel = CASES[name]
+    with tempfile.TemporaryDirectory() as tmp:
+        run, items, size = func(world, tmp, workers)
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+    return {
+        "seconds": best,
+        "items": items,
+        "unit": unit,
+        "bytes": size,
+        "items_per_s": items / best,
+        "mb_per_s": size / best / 1024 / 1024,
+        "peak_rss_mb": peak_rss_mb(),
+        "workers": workers if parallel else 1,
+    }
+
+
+def run_case_subprocess(name, world, repeat, workers, cwd):
+    cmd = [sys.executable, os.path.abspath(__file__), "--run-case", name, "--world", world,
+           "--repeat", str(repeat), "--workers", str(workers)]
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, encoding="utf-8")
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"退出码 {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(result, base, threshold):
+    """与基线比较：返回 (吞吐量变化百分比, 内存变化百分比, 是否回退)"""
+    speed = (result["items_per_s"] / base["items_per_s"] - 1) * 100
+    rss = None
+    if result.get("peak_rss_mb") and base.get("peak_rss_mb"):
+        rss = (result["peak_rss_mb"] / base["peak_rss_mb"] - 1) * 100
+    regressed = speed < -threshold * 100 or (rss is not None and rss > threshold * 100)
+    return speed, rss, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--threshold", type=float, default=0.15, help="判定为回退的变化比例（默认 15%%）")
+    parser.add_argument("--fail-on-regression", action="store_true", help="有回退时以退出码 1 结束")
+    parser.add_argument("--world", help=argparse.SUPPRESS)
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.world, args.repeat, args.workers)))
+        return 0
+
+    from synthetic import make_world
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = {}
+    base_results = baseline.get("presets", {}).get(args.preset, {})
+    if base_results and baseline.get("machine") != machine_info():
+        print(f"注意：基线来自不同的环境 {baseline.get('machine')}，比较结果仅供参考", file=sys.stderr)
+
+    results = {}
+    regressions = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        world = os.path.join(tmp, "world")
+        start = time.perf_counter()
+        make_world(world, seed=args.seed, **PRESETS[args.preset])
+        print(f"生成合成存档 ({args.preset}: {PRESETS[args.preset]}) 用时 {time.perf_counter() - start:.1f} 秒")
+
+        for name in args.cases:
+            result = run_case_subprocess(name, world, args.repeat, args.workers, tmp)
+            results[name] = result
+            if "error" in result:
+                print(f"{name:<18} 失败: {result['error']}")
+                continue
+            rss = f"{result['peak_rss_mb']:7.1f} MB" if result["peak_rss_mb"] else "      ?"
+            line = (f"{name:<18} {result['seconds'] * 1000:9.1f} ms  "
+                    f"{result['items_per_s']:10.1f} {result['unit']}/秒  "
+                    f"{result['mb_per_s']:8.1f} MB/s  峰值内存 {rss}")
+            base = base_results.get(name)
+            if base and "error" not in base and base.get("workers", 1) != result["workers"]:
+                # 并行用例的吞吐量取决于进程数，进程数不同时比较没有意义
+                line += f"  | 基线进程数 {base.get('workers', '?')}，不比较"
+            elif base and "error" not in base:
+                speed, rss_delta, regressed = compare(result, base, args.threshold)
+                line += f"  | 吞吐量 {speed:+6.1f}%"
+                if rss_delta is not None:
+                    line += f" 内存 {rss_delta:+6.1f}%"
+                if regressed:
+                    line += "  ⚠ 回退"
+                    regressions += 1
+            print(line)
+
+    if args.save_baseline:
+        # 只替换本次运行的用例，其余用例的基线保持不变
+        baseline.setdefault("presets", {}).setdefault(args.preset, {}).update(results)
+        baseline["machine"] = machine_info()
+        if args.workers < 2 and any(CASES[name][2] for name in results):
+            print("注意：只用 1 个进程运行，并行用例的基线不反映并行性能，请在多核机器上重新保存", file=sys.stderr)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到 {args.baseline}")
+    if regressions:
+        print(f"{regressions} 个用例相对基线回退超过 {args.threshold:.0%}", file=sys.stderr)
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# benchmarks/synthetic.py
+"""离线生成合成存档（level.dat、玩家数据、区域文件），供基准测试使用"""
+
+import io
+import json
+import os
+import random
+import struct
+import time
+import zlib
+
+import nbtlib
+from nbtlib.tag import Byte, Compound, Double, Float, Int, IntArray, List, Long, LongArray, String
+
+SECTOR_SIZE = 4096
+SURFACE_BLOCKS = ["minecraft:grass_block", "minecraft:sand", "minecraft:water", "minecraft:snow_block",
+                  "minecraft:oak_leaves", "minecraft:stone"]
+UNDERGROUND_BLOCKS = ["minecraft:stone", "minecraft:deepslate", "minecraft:dirt", "minecraft:gravel",
+                      "minecraft:coal_ore", "minecraft:iron_ore", "minecraft:diamond_ore", "minecraft:air"]
+
+
+def pack_longs(values, bits):
+    """按 1.16+ 格式（不跨 long）把整数打包为有符号 long 列表"""
+    per_long = 64 // bits
+    longs = []
+    for start in range(0, len(values), per_long):
+        word = 0
+        for j, value in enumerate(values[start:start + per_long]):
+            word |= value << (j * bits)
+        longs.append(word - (1 << 64) if word >= 1 << 63 else word)
+    return longs
+
+
+def make_section(rng, y, palette_size):
+    palette = rng.sample(UNDERGROUND_BLOCKS, min(palette_size, len(UNDERGROUND_BLOCKS)))
+    bits = max(4, (len(palette) - 1).bit_length())
+    indices = [rng.randrange(len(palette)) for _ in range(4096)]
+    return Compound({
+        "Y": Byte(y),
+        "block_states": Compound({
+            "palette": List[Compound]([Compound({"Name": String(name)}) for name in palette]),
+            "data": LongArray(pack_longs(indices, bits)),
+        }),
+    })
+
+
+def make_chunk(rng, cx, cz, sections=8, tile_entities=4):
+    """1.18+ 格式的区块：方块分段、WORLD_SURFACE 高度图与若干箱子"""
+    min_y = -64
+    section_list = [make_section(rng, sy, rng.choice([2, 4, 6, 8])) for sy in range(-4, sections - 4)]
+    # 顶层分段放置地表方块，高度图指向该分段
+    top = sections - 5
+    surface = rng.sample(SURFACE_BLOCKS, 4)
+    surface_indices = [rng.randrange(4) for _ in range(4096)]
+    section_list[-1] = Compound({
+        "Y": Byte(top),
+        "block_states": Compound({
+            "palette": List[Compound]([Compound({"Name": String(name)}) for name in surface]),
+            "data": LongArray(pack_longs(surface_indices, 4)),
+        }),
+    })
+    heights = [top * 16 + rng.randrange(16) - min_y + 1 for _ in range(256)]
+    block_entities = [
+        Compound({
+            "id": String("minecraft:chest"),
+            "x": Int(cx * 16 + rng.randrange(16)), "y": Int(rng.randrange(-60, 100)), "z": Int(cz * 16 + rng.randrange(16)),
+            "Items": List[Compound]([
+                Compound({"Slot": Byte(s), "id": String("minecraft:diamond"), "Count": Byte(rng.randrange(1, 64))})
+                for s in range(rng.randrange(1, 10))
+            ]),
+        })
+        for _ in range(tile_entities)
+    ]
+    return nbtlib.File({
+        "DataVersion": Int(3465),
+        "xPos": Int(cx), "zPos": Int(cz), "yPos": Int(-4),
+        "Status": String("minecraft:full"),
+        "InhabitedTime": Long(rng.randrange(0, 100000)),
+        "LastUpdate": Long(rng.randrange(0, 10 ** 7)),
+        "Heightmaps": Compound({"WORLD_SURFACE": LongArray(pack_longs(heights, 9))}),
+        "sections": List[Compound](section_list),
+        "block_entities": List[Compound](block_entities),
+    })
+
+
+def encode_chunk(chunk):
+    buf = io.BytesIO()
+    chunk.write(buf)
+    return buf.getvalue()
+
+
+def write_region(path, chunks, timestamp=None):
+    """写出区域文件；chunks 为 {(区域内 x, z): 区块 NBT 字节}"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    locations = [0] * 1024
+    timestamps = [0] * 1024
+    body = io.BytesIO()
+    sector = 2
+    for (x, z), raw in sorted(chunks.items()):
+        payload = zlib.compress(raw, 6)
+        blob = struct.pack(">iB", len(payload) + 1, 2) + payload
+        count = (len(blob) + SECTOR_SIZE - 1) // SECTOR_SIZE
+        body.write(blob + b"\0" * (count * SECTOR_SIZE - len(blob)))
+        index = (x & 31) + (z & 31) * 32
+        locations[index] = (sector << 8) | count
+        timestamps[index] = timestamp
+        sector += count
+    with open(path, "wb") as f:
+        f.write(struct.pack(">1024I", *locations))
+        f.write(struct.pack(">1024I", *timestamps))
+        f.write(body.getvalue())
+
+
+def make_region_files(directory, regions, chunks_per_region, seed=0):
+    """生成若干区域文件（区域坐标沿 X 轴排列），返回文件路径列表"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    # 少量模板区块重复使用，避免生成本身成为瓶颈
+    templates = {}
+    paths = []
+    for r in range(regions):
+        chunks = {}
+        for i in range(chunks_per_region):
+            x, z = i % 32, i // 32
+            cx, cz = r * 32 + x, z
+            key = rng.randrange(16)
+            if key not in templates:
+                templates[key] = make_chunk(rng, cx, cz)
+            templates[key]["xPos"] = Int(cx)
+            templates[key]["zPos"] = Int(cz)
+            chunks[(x, z)] = encode_chunk(templates[key])
+        path = os.path.join(directory, f"r.{r}.0.mca")
+        write_region(path, chunks)
+        paths.append(path)
+    return paths
+
+
+def make_item(rng, slot):
+    return Compound({
+        "Slot": Byte(slot),
+        "id": String(f"minecraft:item_{rng.randrange(1000)}"),
+        "Count": Byte(rng.randrange(1, 64)),
+        "tag": Compound({
+            "display": Compound({"Name": String("{\"text\":\"Synthetic\"}")}),
+            "Enchantments": List[Compound]([
+                Compound({"id": String("minecraft:sharpness"), "lvl": Int(5)})
+                for _ in range(3)
+            ]),
+        }),
+    })
+
+
+def make_player(rng):
+    """单个玩家的 NBT（level.dat 中的 Data.Player 或 playerdata/<uuid>.dat 的根标签）"""
+    return Compound({
+        "playerGameType": Int(0),
+        "Dimension": String("minecraft:overworld"),
+        "Pos": List[Double]([Double(rng.uniform(-2000, 2000)), Double(64.0), Double(rng.uniform(-2000, 2000))]),
+        "Health": Float(20.0),
+        "XpLevel": Int(rng.randrange(100)),
+        "Inventory": List[Compound]([make_item(rng, i) for i in range(36)]),
+        "EnderItems": List[Compound]([make_item(rng, i) for i in range(rng.randrange(27))]),
+    })
+
+
+def make_level_dat(path, target_mb, seed=0):
+    """生成带大体积 ForgeCaps / fml / DataPacks 的合成 level.dat"""
+    rng = random.Random(seed)
+    # 每个 fml 条目约 120 字节（未压缩）
+    blob_entries = int(target_mb * 1024 * 1024 / 120)
+    data = Compound({
+        "LevelName": String("Synthetic"),
+        "SpawnX": Int(0), "SpawnY": Int(64), "SpawnZ": Int(0),
+        "Time": Long(123456), "LastPlayed": Long(1700000000000),
+        "Difficulty": Byte(2),
+        "ForgeCaps": Compound({
+            f"mod{i}:cap": Compound({"value": Long(rng.getrandbits(62)), "tag": String("x" * 32)})
+            for i in range(blob_entries // 4)
+        }),
+        "fml": Compound({"Registries": List[Compound]([
+            Compound({"K": String(f"modid:entry_{i}"), "V": Int(i)})
+            for i in range(blob_entries // 2)
+        ])}),
+        "DataPacks": Compound({"Enabled": List[String]([
+            String(f"file/pack_{i}.zip") for i in range(blob_entries // 4)
+        ])}),
+        "Player": make_player(rng),
+    })
+    nbtlib.File({"Data": data}).save(path, gzipped=True)
+
+
+def make_playerdata(world_path, players, seed=0):
+    """生成 playerdata/<uuid>.dat 以及对应的 stats / advancements JSON，返回 UUID 列表"""
+    rng = random.Random(seed)
+    for folder in ("playerdata", "stats", "advancements"):
+        os.makedirs(os.path.join(world_path, folder), exist_ok=True)
+    uuids = []
+    for _ in range(players):
+        words = [rng.getrandbits(32) for _ in range(4)]
+        uuid = "{:08x}-{:04x}-{:04x}-{:04x}-{:04x}{:08x}".format(
+            words[0], words[1] >> 16, words[1] & 0xFFFF, words[2] >> 16, words[2] & 0xFFFF, words[3])
+        uuids.append(uuid)
+        player = make_player(rng)
+        player["UUID"] = IntArray([w - (1 << 32) if w >= 1 << 31 else w for w in words])
+        nbtlib.File(player).save(os.path.join(world_path, "playerdata", f"{uuid}.dat"), gzipped=True)
+        stats = {"stats": {"minecraft:custom": {"minecraft:play_time": rng.randrange(10 ** 7)}}, "DataVersion": 3465}
+        with open(os.path.join(world_path, "stats", f"{uuid}.json"), "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        advancements = {f"minecraft:story/a{i}": {"done": True, "criteria": {}} for i in range(rng.randrange(30))}
+        with open(os.path.join(world_path, "advancements", f"{uuid}.json"), "w", encoding="utf-8") as f:
+            json.dump(advancements, f)
+    return uuids
+
+
+def make_world(world_path, level_mb=1.0, players=0, regions=0, chunks_per_region=256, seed=0):
+    """生成完整的合成存档：level.dat、playerdata 与主世界区域文件"""
+    os.makedirs(world_path, exist_ok=True)
+    make_level_dat(os.path.join(world_path, "level.dat"), level_mb, seed)
+    if players:
+        make_playerdata(world_path, players, seed)
+    if regions:
+        make_region_files(os.path.join(world_path, "region"), regions, chunks_per_region, seed)
+    return world_path
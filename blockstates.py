@@ -0,0 +1,163 @@
+# blockstates.py
+
+import numpy as np
+
+SECTION_VOLUME = 4096
+# 20w17a (1.16) 起，打包的索引不再跨越两个 long
+NON_SPANNING_DATA_VERSION = 2529
+HEIGHTMAP_BITS = 9
+# 优先使用含水面的高度图，其次是 MOTION_BLOCKING
+HEIGHTMAP_KEYS = ("WORLD_SURFACE", "MOTION_BLOCKING")
+
+
+def bits_per_entry(palette_len, minimum=4):
+    """调色板长度对应的每项位数（方块至少 4 位，生物群系至少 1 位）"""
+    return max(minimum, (palette_len - 1).bit_length())
+
+
+def unpack_indices_py(data, palette_len, spanning=False, count=SECTION_VOLUME, minimum=4):
+    """纯 Python 参考实现：将打包的 long[] 解为调色板索引列表"""
+    if palette_len <= 1 or not data:
+        return [0] * count
+    bits = bits_per_entry(palette_len, minimum)
+    mask = (1 << bits) - 1
+    out = []
+    if not spanning:
+        per_long = 64 // bits
+        for value in data:
+            value &= 0xFFFFFFFFFFFFFFFF
+            for _ in range(per_long):
+                out.append(value & mask)
+                value >>= bits
+            if len(out) >= count:
+                break
+        return out[:count]
+    for i in range(count):
+        bit = i * bits
+        index, offset = divmod(bit, 64)
+        value = (data[index] & 0xFFFFFFFFFFFFFFFF) >> offset
+        if offset + bits > 64:
+            value |= (data[index + 1] & 0xFFFFFFFFFFFFFFFF) << (64 - offset)
+        out.append(value & mask)
+    return out
+
+
+def _as_uint64(data):
+    return np.asarray(data, dtype=np.int64).view(np.uint64)
+
+
+def _unpack_rows(longs, bits, count):
+    """对形状为 (n, L) 的 uint64 数组做不跨 long 的向量化解包，返回 (n, count)"""
+    per_long = 64 // bits
+    shifts = (np.arange(per_long, dtype=np.uint64) * np.uint64(bits))
+    mask = np.uint64((1 << bits) - 1)
+    values = (longs[:, :, None] >> shifts) & mask
+    return values.reshape(longs.shape[0], -1)[:, :count].astype(np.uint16)
+
+
+def _unpack_spanning(longs, bits, count):
+    """1.16 之前的格式：索引可能跨越相邻两个 long"""
+    positions = np.arange(count, dtype=np.uint64) * np.uint64(bits)
+    index = (positions >> np.uint64(6)).astype(np.intp)
+    offset = positions & np.uint64(63)
+    padded = np.concatenate([longs, np.zeros(1, dtype=np.uint64)])
+    low = padded[index] >> offset
+    # offset 为 0 时不存在高位部分（且 uint64 左移 64 位未定义）
+    high_shift = (np.uint64(64) - offset) & np.uint64(63)
+    high = np.where(offset == 0, np.uint64(0), padded[index + 1] << high_shift)
+    return ((low | high) & np.uint64((1 << bits) - 1)).astype(np.uint16)
+
+
+def unpack_bits(data, bits, count, spanning=False):
+    """按固定位数向量化解包 long[]（如高度图固定为 9 位），返回 uint16 数组"""
+    longs = _as_uint64(data)
+    if spanning:
+        return _unpack_spanning(longs, bits, count)
+    return _unpack_rows(longs[None, :], bits, count)[0]
+
+
+def unpack_indices(data, palette_len, spanning=False, count=SECTION_VOLUME, minimum=4):
+    """NumPy 向量化解包，返回长度为 count 的 uint16 调色板索引数组"""
+    if palette_len <= 1 or data is None or len(data) == 0:
+        return np.zeros(count, dtype=np.uint16)
+    return unpack_bits(data, bits_per_entry(palette_len, minimum), count, spanning)
+
+
+def unpack_sections(sections, count=SECTION_VOLUME, minimum=4):
+    """批量解包多个分段，参数为 (调色板长度, 打包数据, 是否跨 long) 序列
+
+    位数相同且不跨 long 的分段会堆叠成二维数组，一次运算完成解包。
+    返回与输入顺序一致的 uint16 数组列表。
+    """
+    results = [None] * len(sections)
+    groups = {}
+    for i, (palette_len, data, spanning) in enumerate(sections):
+        if palette_len <= 1 or data is None or len(data) == 0:
+            results[i] = np.zeros(count, dtype=np.uint16)
+        elif spanning:
+            results[i] = unpack_indices(data, palette_len, True, count, minimum)
+        else:
+            bits = bits_per_entry(palette_len, minimum)
+            groups.setdefault((bits, len(data)), []).append(i)
+    for (bits, _length), members in groups.items():
+        longs = np.stack([_as_uint64(sections[i][1]) for i in members])
+        for i, row in zip(members, _unpack_rows(longs, bits, count)):
+            results[i] = row
+    return results
+
+
+def decode_section(names, data, spanning=False):
+    """解码单个方块分段，返回 (uint16 索引数组, 调色板方块名列表)"""
+    return unpack_indices(data, len(names), spanning), names
+
+
+def chunk_data_version(chunk):
+    return int(chunk.get("DataVersion", 0))
+
+
+def chunk_level(chunk):
+    """1.18 之前的区块数据嵌套在 Level 标签下"""
+    return chunk.get("Level", chunk)
+
+
+def chunk_min_y(chunk):
+    """区块最低高度：1.18+ 由 yPos 给出（通常为 -4 即 Y=-64），之前为 0"""
+    y_pos = chunk.get("yPos")
+    return int(y_pos) * 16 if y_pos is not None else 0
+
+
+def chunk_heightmap(chunk):
+    """解码高度图，返回 (16, 16) 的最高方块 Y 坐标数组；缺少高度图时返回 None"""
+    heightmaps = chunk.get("Heightmaps") or chunk_level(chunk).get("Heightmaps") or {}
+    for key in HEIGHTMAP_KEYS:
+        data = heightmaps.get(key)
+        if data is not None and len(data):
+            spanning = chunk_data_version(chunk) < NON_SPANNING_DATA_VERSION
+            heights = unpack_bits(data, HEIGHTMAP_BITS, 256, spanning).astype(np.int32)
+            # 高度图存储的是 “最高方块 Y + 1”，相对世界底部
+            return (heights - 1 + chunk_min_y(chunk)).reshape(16, 16)
+    return None
+
+
+def iter_block_sections(chunk):
+    """遍历区块的方块分段，产出 (Y, 方块名列表, 打包数据, 是否跨 long)
+
+    兼容 1.18+ 的 sections[].block_states 与 1.13-1.17 的 Level.Sections[]；
+    1.13 之前的数字 ID 格式没有调色板，直接跳过。
+    """
+    spanning = chunk_data_version(chunk) < NON_SPANNING_DATA_VERSION
+    sections = chunk.get("sections")
+    if sections is None:
+        sections = chunk_level(chunk).get("Sections", [])
+    for section in sections:
+        states = section.get("block_states")
+        if states is not None:
+            palette = states.get("palette", [])
+            data = states.get("data")
+        else:
+            palette = section.get("Palette")
+            data = section.get("BlockStates")
+        if not palette:
+            continue
+        names = [str(entry.get("Name", "minecraft:air")) for entry in palette]
+        yield int(section.get("Y", 0)), names, data, spanning
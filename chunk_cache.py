@@ -0,0 +1,271 @@
+# chunk_cache.py
+"""进程内的已解码区块缓存，按内存预算（MB）而不是条目数淘汰
+
+区块解码为紧凑的 NumPy 分段数组（每个分段 4096 个 uint16 调色板索引），
+调色板中的方块名经过 sys.intern 在所有区块间共享。
+
+淘汰策略为分段 LRU（SLRU）：新区块先进入试用段，再次命中后晋升到保护段，
+淘汰总是先从试用段的最久未使用端开始。一次性的大范围扫描（如拖动地图经过的区块）
+因此不会把反复查看的区块挤出缓存。
+
+环境变量 MCAV_CHUNK_CACHE_MB 设置共享缓存的预算（默认 256 MB）。
+"""
+
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from blockstates import (
+    SECTION_VOLUME, chunk_data_version, chunk_heightmap, chunk_level, chunk_min_y, iter_block_sections, unpack_sections,
+)
+
+logger = logging.getLogger("Vanction Minecraft Archive Viewer")
+
+
+def _budget_from_env(default=256):
+    """读取 MCAV_CHUNK_CACHE_MB；不是非负整数时使用默认值，不让导入失败"""
+    value = os.environ.get("MCAV_CHUNK_CACHE_MB", "").strip()
+    if not value:
+        return default
+    try:
+        budget = int(value)
+    except ValueError:
+        budget = -1
+    if budget < 0:
+        logger.warning(f"MCAV_CHUNK_CACHE_MB 应为非负整数（MB），忽略无效值 {value!r}，使用 {default} MB")
+        return default
+    return budget
+
+
+DEFAULT_BUDGET_MB = _budget_from_env()
+# 保护段最多占预算的比例
+PROTECTED_RATIO = 0.8
+
+# 解码区块需要的标签（只读取这些路径，不解析实体等其它数据）
+CHUNK_PATHS = (
+    "DataVersion", "yPos", "sections", "Heightmaps", "block_entities",
+    "Level.Sections", "Level.Heightmaps", "Level.TileEntities",
+)
+# 方块实体为原生 dict，按每个固定值估算其内存
+_BLOCK_ENTITY_BYTES = 512
+_OVERHEAD_BYTES = 256
+
+
+class DecodedChunk:
+    """解码后的区块：分段 Y、(分段数, 4096) 调色板索引、各分段调色板、高度图与方块实体"""
+
+    __slots__ = ("x", "z", "data_version", "min_y", "section_y", "blocks", "palettes",
+                 "heightmap", "block_entities", "nbytes")
+
+    def __init__(self, x, z, data_version, min_y, section_y, blocks, palettes, heightmap, block_entities):
+        self.x = x
+        self.z = z
+        self.data_version = data_version
+        self.min_y = min_y
+        self.section_y = section_y
+        self.blocks = blocks
+        self.palettes = palettes
+        self.heightmap = heightmap
+        self.block_entities = block_entities
+        self.nbytes = (
+            blocks.nbytes + section_y.nbytes
+            + (heightmap.nbytes if heightmap is not None else 0)
+            + 8 * sum(len(p) for p in palettes)
+            + _BLOCK_ENTITY_BYTES * len(block_entities)
+            + _OVERHEAD_BYTES
+        )
+
+    def _section_index(self, y):
+        i = int(np.searchsorted(self.section_y, y >> 4))
+        return i if i < len(self.section_y) and self.section_y[i] == y >> 4 else None
+
+    def block_at(self, x, y, z):
+        """某坐标的方块名（x、z 可为全局坐标）；分段不存在时视为空气"""
+        i = self._section_index(y)
+        if i is None:
+            return "minecraft:air"
+        index = self.blocks[i, ((y & 15) * 16 + (z & 15)) * 16 + (x & 15)]
+        return self.palettes[i][index]
+
+    def top_block(self, x, z):
+        """某一列最高的方块：(Y, 方块名)；缺少高度图时返回 None"""
+        if self.heightmap is None:
+            return None
+        y = int(self.heightmap[z & 15, x & 15])
+        return y, self.block_at(x, y, z)
+
+    def block_counts(self):
+        """各方块的数量：{方块名: 数量}"""
+        counts = {}
+        for row, palette in zip(self.blocks, self.palettes):
+            for index, count in enumerate(np.bincount(row, minlength=len(palette)).tolist()):
+                if count and index < len(palette):
+                    counts[palette[index]] = counts.get(palette[index], 0) + count
+        return counts
+
+
+def decode_chunk(chunk, x, z):
+    """把 read_chunk_tags(CHUNK_PATHS) 的结果解码为 DecodedChunk"""
+    sections = sorted(iter_block_sections(chunk), key=lambda s: s[0])
+    unpacked = unpack_sections([(len(names), data, spanning) for _y, names, data, spanning in sections])
+    blocks = np.stack(unpacked) if unpacked else np.zeros((0, SECTION_VOLUME), dtype=np.uint16)
+    palettes = [tuple(sys.intern(name) for name in names) for _y, names, _data, _spanning in sections]
+    heightmap = chunk_heightmap(chunk)
+    return DecodedChunk(
+        x, z,
+        chunk_data_version(chunk),
+        chunk_min_y(chunk),
+        np.array([s[0] for s in sections], dtype=np.int16),
+        blocks,
+        palettes,
+        heightmap.astype(np.int16) if heightmap is not None else None,
+        list(chunk.get("block_entities", chunk_level(chunk).get("TileEntities", []))),
+    )
+
+
+class ChunkCache:
+    """按字节预算淘汰的 SLRU 缓存（线程安全），值需要有 nbytes 属性"""
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, protected_ratio=PROTECTED_RATIO):
+        self.protected_ratio = protected_ratio
+        self._lock = threading.Lock()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+        self._probation_bytes = 0
+        self._protected_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.budget = 0
+        self.resize(budget_mb)
+
+    def __len__(self):
+        return len(self._probation) + len(self._protected)
+
+    def __contains__(self, key):
+        return key in self._probation or key in self._protected
+
+    @property
+    def nbytes(self):
+        return self._probation_bytes + self._protected_bytes
+
+    def resize(self, budget_mb):
+        """修改预算（MB），超出部分立即淘汰；0 表示不缓存"""
+        with self._lock:
+            self.budget = int(budget_mb * 1024 * 1024)
+            self._evict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._protected.get(key)
+            if value is not None:
+                self._protected.move_to_end(key)
+                self.hits += 1
+                return value
+            value = self._probation.pop(key, None)
+            if value is None:
+                self.misses += 1
+                return None
+            # 试用段中再次命中：晋升到保护段，保护段超出比例时把最旧的降回试用段
+            self.hits += 1
+            self._probation_bytes -= value.nbytes
+            self._protected[key] = value
+            self._protected_bytes += value.nbytes
+            while self._protected_bytes > self.budget * self.protected_ratio and len(self._protected) > 1:
+                old_key, old = self._protected.popitem(last=False)
+                self._protected_bytes -= old.nbytes
+                self._probation[old_key] = old
+                self._probation_bytes += old.nbytes
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            if value.nbytes > self.budget:
+                return
+            old = self._probation.pop(key, None)
+            if old is not None:
+                self._probation_bytes -= old.nbytes
+            old = self._protected.pop(key, None)
+            if old is not None:
+                self._protected_bytes -= old.nbytes
+            self._probation[key] = value
+            self._probation_bytes += value.nbytes
+            self._evict()
+
+    def _evict(self):
+        while self.nbytes > self.budget:
+            segment = self._probation if self._probation else self._protected
+            _key, value = segment.popitem(last=False)
+            if segment is self._probation:
+                self._probation_bytes -= value.nbytes
+            else:
+                self._protected_bytes -= value.nbytes
+            self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """命中时返回缓存值，否则调用 loader() 并缓存其结果（None 不缓存）"""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._probation.clear()
+            self._protected.clear()
+            self._probation_bytes = 0
+            self._protected_bytes = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """{hits, misses, evictions, hit_rate, entries, bytes, budget}"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._probation) + len(self._protected),
+                "bytes": self.nbytes,
+                "budget": self.budget,
+            }
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """所有读取区块的功能共用的缓存（首次调用时创建）"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ChunkCache(DEFAULT_BUDGET_MB)
+        return _shared_cache
+
+
+def cached_chunk(region, cx, cz, cache=None):
+    """按全局区块坐标读取并解码区域文件中的区块，经过 cache（默认为共享缓存）；区块不存在时返回 None
+
+    缓存键包含区域头部的区块时间戳，区块被游戏重新保存后自然失效。
+    """
+    if not region.chunk_exists(cx, cz):
+        return None
+    cache = cache if cache is not None else shared_cache()
+    key = (region.path, cx, cz, region.chunk_timestamp(cx, cz))
+
+    def load():
+        chunk = region.read_chunk_tags(cx, cz, CHUNK_PATHS)
+        return None if chunk is None else decode_chunk(chunk, cx, cz)
+
+    return cache.get_or_load(key, load)
@@ -0,0 +1,269 @@
+# dimensions.py
+"""维度注册表：发现存档中的原版与数据包/自定义维度，并按需打开各维度的数据
+
+原版维度位于存档根目录（主世界）、DIM-1（下界）与 DIM1（末地），
+数据包维度位于 dimensions/<命名空间>/<名称>/。每个维度下可能有
+region/（区块）、entities/（1.17+ 实体）与 poi/（兴趣点）三类区域文件。
+
+用法:
+    python -m dimensions <存档目录>
+"""
+
+import argparse
+import sys
+import threading
+from collections import OrderedDict
+
+from region import region_coords
+from vfs import DirectoryFS, open_world_fs
+
+OVERWORLD = "minecraft:overworld"
+THE_NETHER = "minecraft:the_nether"
+THE_END = "minecraft:the_end"
+
+# 原版维度 -> 存档中的目录（相对存档根目录）
+VANILLA_FOLDERS = {
+    OVERWORLD: "",
+    THE_NETHER: "DIM-1",
+    THE_END: "DIM1",
+}
+
+DIMENSION_LABELS = {
+    OVERWORLD: "主世界",
+    THE_NETHER: "下界",
+    THE_END: "末地",
+}
+# 旧版本的维度写法
+_ALIASES = {
+    "overworld": OVERWORLD,
+    "nether": THE_NETHER,
+    "the_nether": THE_NETHER,
+    "end": THE_END,
+    "the_end": THE_END,
+    "0": OVERWORLD,
+    "-1": THE_NETHER,
+    "1": THE_END,
+}
+
+KIND_REGION = "region"
+KIND_ENTITIES = "entities"
+KIND_POI = "poi"
+DATA_KINDS = (KIND_REGION, KIND_ENTITIES, KIND_POI)
+
+# 同时保持打开的维度数与每个维度中打开的区域文件数
+MAX_OPEN_DIMENSIONS = 4
+MAX_OPEN_REGIONS = 16
+
+
+def normalize_dimension(dimension):
+    """统一维度 ID：旧版数字与短名称转为 minecraft:xxx"""
+    dimension = str(dimension)
+    return _ALIASES.get(dimension, dimension if ":" in dimension else f"minecraft:{dimension}")
+
+
+def dimension_label(dimension):
+    """维度的显示名称；自定义维度显示其 ID"""
+    dimension = normalize_dimension(dimension)
+    return DIMENSION_LABELS.get(dimension, f"自定义维度({dimension})")
+
+
+def _rel(*parts):
+    return "/".join(part for part in parts if part)
+
+
+def discover_dimensions(world_path, fs=None):
+    """列出存档中有数据的全部维度：{维度 ID: 目录（相对存档根目录，以 / 分隔）}
+
+    只检查目录是否存在，不打开任何区域文件。原版维度在前，自定义维度按 ID 排序。
+    fs 为存档的虚拟文件系统（默认为 world_path 目录）。
+    """
+    fs = fs if fs is not None else DirectoryFS(world_path)
+
+    def has_data(folder):
+        return any(fs.isdir(_rel(folder, kind)) for kind in DATA_KINDS)
+
+    found = {}
+    for dimension, folder in VANILLA_FOLDERS.items():
+        if has_data(folder):
+            found[dimension] = folder
+    custom = {}
+    for namespace in fs.listdir("dimensions"):
+        # 维度名称可以包含子路径，如 dimensions/mymod/sky/islands/
+        base = _rel("dimensions", namespace)
+        stack = [base] if fs.isdir(base) else []
+        while stack:
+            current = stack.pop()
+            children = [name for name in fs.listdir(current) if fs.isdir(_rel(current, name))]
+            if has_data(current):
+                # 新版本把原版维度也放在 dimensions/minecraft/ 下，以此处为准
+                custom[f"{namespace}:{current[len(base) + 1:]}"] = current
+                children = [name for name in children if name not in DATA_KINDS]
+            stack.extend(_rel(current, name) for name in children)
+    found.update(sorted(custom.items()))
+    return found
+
+
+class DimensionLoader:
+    """单个维度的数据访问
+
+    区域文件列表在首次查询时才列出，区域文件在首次读取时才打开，
+    并按 LRU 策略最多保持 max_open_regions 个打开。
+    """
+
+    def __init__(self, world_path, dimension, folder, max_open_regions=MAX_OPEN_REGIONS, cache=None, fs=None):
+        self.dimension = dimension
+        self.folder = folder
+        self.fs = fs if fs is not None else DirectoryFS(world_path)
+        self.max_open_regions = max_open_regions
+        # 为 None 时在首次解码区块时使用共享的区块缓存
+        self.cache = cache
+        self._files = {}
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def region_files(self, kind=KIND_REGION):
+        """某类区域文件的路径列表（按区域坐标排序）"""
+        files = self._files.get(kind)
+        if files is None:
+            files = self._files[kind] = self.fs.list_region_files(_rel(self.folder, kind))
+        return files
+
+    def region_coords(self, kind=KIND_REGION):
+        return [region_coords(path) for path in self.region_files(kind)]
+
+    def region(self, kind, rx, rz):
+        """打开（或复用已打开的）区域文件；文件不存在时返回 None"""
+        key = (kind, rx, rz)
+        with self._lock:
+            region = self._open.get(key)
+            if region is not None:
+                self._open.move_to_end(key)
+                return region
+            path = _rel(self.folder, kind, f"r.{rx}.{rz}.mca")
+            if not self.fs.isfile(path):
+                return None
+            region = self._open[key] = self.fs.open_region(path)
+            while len(self._open) > self.max_open_regions:
+                _key, oldest = self._open.popitem(last=False)
+                oldest.close()
+            return region
+
+    def read_chunk(self, cx, cz, kind=KIND_REGION):
+        """按全局区块坐标完整读取区块，不存在时返回 None"""
+        region = self.region(kind, cx >> 5, cz >> 5)
+        return None if region is None else region.read_chunk(cx, cz)
+
+    def read_chunk_tags(self, cx, cz, paths, kind=KIND_REGION):
+        """按全局区块坐标只读取指定标签路径"""
+        region = self.region(kind, cx >> 5, cz >> 5)
+        return None if region is None else region.read_chunk_tags(cx, cz, paths)
+
+    def decoded_chunk(self, cx, cz):
+        """解码后的区块（DecodedChunk），经过共享的区块缓存（见 chunk_cache.cached_chunk）；区块不存在时返回 None"""
+        # chunk_cache 依赖 NumPy 与地图渲染，只在解码区块时导入，以免拖慢只读 level.dat 的命令行启动
+        from chunk_cache import cached_chunk, shared_cache
+
+        if self.cache is None:
+            self.cache = shared_cache()
+        region = self.region(KIND_REGION, cx >> 5, cz >> 5)
+        if region is None:
+            return None
+        return cached_chunk(region, cx, cz, self.cache)
+
+    def open_regions(self):
+        return len(self._open)
+
+    def close(self):
+        with self._lock:
+            for region in self._open.values():
+                region.close()
+            self._open.clear()
+            self._files.clear()
+
+
+class DimensionRegistry:
+    """存档中全部维度的注册表
+
+    发现维度只需列目录；DimensionLoader 在首次 get() 时才创建，
+    超过 max_open 个时关闭最久未使用的维度。
+    """
+
+    def __init__(self, world_path, max_open=MAX_OPEN_DIMENSIONS, max_open_regions=MAX_OPEN_REGIONS, cache=None,
+                 fs=None):
+        """world_path 可以是存档目录或压缩包备份（见 vfs.open_world_fs）"""
+        self.world_path = world_path
+        self.max_open = max_open
+        self.max_open_regions = max_open_regions
+        self.cache = cache
+        self.fs = fs if fs is not None else open_world_fs(world_path)
+        self.folders = discover_dimensions(world_path, self.fs)
+        self._loaders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, dimension):
+        return normalize_dimension(dimension) in self.folders
+
+    def __iter__(self):
+        return iter(self.folders)
+
+    def __len__(self):
+        return len(self.folders)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def refresh(self):
+        """重新发现维度（如服务器加载了新的数据包）"""
+        self.folders = discover_dimensions(self.world_path, self.fs)
+        with self._lock:
+            for dimension in [d for d in self._loaders if d not in self.folders]:
+                self._loaders.pop(dimension).close()
+        return self
+
+    def folder(self, dimension):
+        return self.folders[normalize_dimension(dimension)]
+
+    def get(self, dimension):
+        """维度的加载器（按需创建）；维度不存在时抛出 KeyError"""
+        dimension = normalize_dimension(dimension)
+        with self._lock:
+            loader = self._loaders.get(dimension)
+            if loader is not None:
+                self._loaders.move_to_end(dimension)
+                return loader
+            loader = self._loaders[dimension] = DimensionLoader(
+                self.world_path, dimension, self.folders[dimension], self.max_open_regions, self.cache, self.fs)
+            while len(self._loaders) > self.max_open:
+                _dimension, oldest = self._loaders.popitem(last=False)
+                oldest.close()
+            return loader
+
+    def loaded(self):
+        """当前已创建加载器的维度（由旧到新）"""
+        return list(self._loaders)
+
+    def close(self):
+        with self._lock:
+            for loader in self._loaders.values():
+                loader.close()
+            self._loaders.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="dimensions", description="列出存档中的全部维度")
+    parser.add_argument("world", help="存档目录或 .zip/.tar.gz 备份")
+    args = parser.parse_args(argv)
+
+    with DimensionRegistry(args.world) as registry:
+        for dimension in registry:
+            loader = registry.get(dimension)
+            counts = "  ".join(f"{kind} {len(loader.region_files(kind))}" for kind in DATA_KINDS)
+            print(f"{dimension}\t{dimension_label(dimension)}\t{loader.folder or '.'}\t{counts}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,353 @@
+# entity_query.py
+"""实体与方块实体查询：区块实体数量排行、按类型查找、按半径查找
+
+用法:
+    python -m entity_query <存档目录> top [--limit 20] [--kind entities|block_entities]
+    python -m entity_query <存档目录> find hopper [--dimension minecraft:the_nether]
+    python -m entity_query <存档目录> near item <x> <z> [--radius 64] [--dimension minecraft:overworld]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from blockstates import chunk_level
+from dimensions import OVERWORLD, discover_dimensions, normalize_dimension
+from region import RegionFile, list_region_files
+from world_scan import normalize_id
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".minecraft_archive_viewer", "cache", "entities")
+CACHE_VERSION = 1
+
+KIND_ENTITIES = "entities"
+KIND_BLOCK_ENTITIES = "block_entities"
+
+# region/ 中读取方块实体（以及 1.17 之前的实体），entities/ 中读取 1.17+ 的实体
+_REGION_PATHS = ("block_entities", "Level.TileEntities", "Level.Entities")
+_ENTITY_PATHS = ("Entities",)
+
+
+def _iter_entities(entities):
+    """遍历实体及其乘客（如船上的生物）"""
+    stack = list(entities)
+    while stack:
+        entity = stack.pop()
+        yield entity
+        stack.extend(entity.get("Passengers", ()))
+
+
+def collect_region(path, kind):
+    """读取单个区域文件中的实体/方块实体为紧凑数组（在子进程中运行）
+
+    返回 {"names": 类型名列表, "ent_type", "ent_pos" (n, 3) float64, "be_type", "be_pos" (n, 3) int32, "errors"}，
+    类型以 names 中的下标表示。
+    """
+    names = {}
+    ent_type, ent_pos, be_type, be_pos = [], [], [], []
+    errors = 0
+    paths = _ENTITY_PATHS if kind == "entities" else _REGION_PATHS
+    with RegionFile(path) as region:
+        for x, z in region.iter_chunks():
+            try:
+                chunk = region.read_chunk_tags(x, z, paths) or {}
+            except Exception:
+                errors += 1
+                continue
+            level = chunk_level(chunk)
+            for entity in _iter_entities(chunk.get("Entities", level.get("Entities", []))):
+                pos = entity.get("Pos")
+                if pos is None or len(pos) != 3:
+                    continue
+                ent_type.append(names.setdefault(normalize_id(str(entity.get("id", "?"))), len(names)))
+                ent_pos.append((float(pos[0]), float(pos[1]), float(pos[2])))
+            for entity in chunk.get("block_entities", level.get("TileEntities", [])):
+                be_type.append(names.setdefault(normalize_id(str(entity.get("id", "?"))), len(names)))
+                be_pos.append((int(entity.get("x", 0)), int(entity.get("y", 0)), int(entity.get("z", 0))))
+    return {
+        "names": list(names),
+        "ent_type": np.array(ent_type, dtype=np.int32),
+        "ent_pos": np.array(ent_pos, dtype=np.float64).reshape(-1, 3),
+        "be_type": np.array(be_type, dtype=np.int32),
+        "be_pos": np.array(be_pos, dtype=np.int32).reshape(-1, 3),
+        "errors": errors,
+    }
+
+
+def collect_region_cached(path, kind, cache_dir):
+    """带磁盘缓存的 collect_region：区域文件 mtime/大小未变时直接读取 .npz"""
+    st = os.stat(path)
+    cache_path = os.path.join(cache_dir, f"{kind}-{os.path.basename(path)}.npz")
+    stamp = np.array([CACHE_VERSION, st.st_mtime_ns, st.st_size], dtype=np.int64)
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if np.array_equal(cached["stamp"], stamp):
+                result = {key: cached[key] for key in ("ent_type", "ent_pos", "be_type", "be_pos")}
+                result["names"] = cached["names"].tolist()
+                result["errors"] = int(cached["errors"])
+                return result
+    except (OSError, KeyError, ValueError):
+        pass
+    result = collect_region(path, kind)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp.npz"
+    np.savez(tmp_path, stamp=stamp, names=np.array(result["names"], dtype=str), errors=result["errors"],
+             **{key: result[key] for key in ("ent_type", "ent_pos", "be_type", "be_pos")})
+    os.replace(tmp_path, cache_path)
+    return result
+
+
+class SpatialIndex:
+    """按区块 (16x16) 网格排序的点集
+
+    点按所在区块排序后，每个非空区块对应一段连续下标；
+    半径查询先用向量化运算筛选与圆相交的区块，再只检查这些区块内的点。
+    """
+
+    def __init__(self, types, positions):
+        cx = np.floor_divide(positions[:, 0], 16).astype(np.int64)
+        cz = np.floor_divide(positions[:, 2], 16).astype(np.int64)
+        order = np.lexsort((cz, cx))
+        self.types = types[order]
+        self.positions = positions[order]
+        keys = np.stack([cx[order], cz[order]], axis=1)
+        if len(keys):
+            starts = np.flatnonzero(np.r_[True, np.any(keys[1:] != keys[:-1], axis=1)])
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        self.cell_x = keys[starts, 0] if len(keys) else np.zeros(0, dtype=np.int64)
+        self.cell_z = keys[starts, 1] if len(keys) else np.zeros(0, dtype=np.int64)
+        self.cell_start = starts
+        self.cell_count = np.diff(np.r_[starts, len(keys)])
+
+    def __len__(self):
+        return len(self.types)
+
+    def chunk_counts(self, type_id=None):
+        """每个非空区块的数量：(区块 x, 区块 z, 数量)；给出 type_id 时只计该类型"""
+        if type_id is None:
+            return self.cell_x, self.cell_z, self.cell_count
+        counts = np.add.reduceat((self.types == type_id).astype(np.int64), self.cell_start) \
+            if len(self.cell_start) else np.zeros(0, dtype=np.int64)
+        return self.cell_x, self.cell_z, counts
+
+    def within(self, x, z, radius, type_id=None, y=None):
+        """半径内的点下标（不给出 y 时按水平距离）"""
+        # 区块与圆心的最近距离不超过半径的区块才需要检查
+        nearest_x = np.clip(x, self.cell_x * 16, self.cell_x * 16 + 16)
+        nearest_z = np.clip(z, self.cell_z * 16, self.cell_z * 16 + 16)
+        cells = np.flatnonzero((nearest_x - x) ** 2 + (nearest_z - z) ** 2 <= radius * radius)
+        if not len(cells):
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.concatenate([
+            np.arange(start, start + count)
+            for start, count in zip(self.cell_start[cells].tolist(), self.cell_count[cells].tolist())
+        ])
+        if type_id is not None:
+            candidates = candidates[self.types[candidates] == type_id]
+        delta = self.positions[candidates] - np.array([x, 0.0 if y is None else y, z])
+        if y is None:
+            delta[:, 1] = 0
+        return candidates[(delta * delta).sum(axis=1) <= radius * radius]
+
+
+class DimensionEntities:
+    """单个维度的实体与方块实体空间索引"""
+
+    def __init__(self, dimension, names, ent_type, ent_pos, be_type, be_pos):
+        self.dimension = dimension
+        self.names = names
+        self.entities = SpatialIndex(ent_type, ent_pos)
+        self.block_entities = SpatialIndex(be_type, be_pos.astype(np.float64))
+
+    def index(self, kind):
+        return self.entities if kind == KIND_ENTITIES else self.block_entities
+
+
+class EntityQueryEngine:
+    """跨维度（含数据包维度）的实体查询引擎
+
+    load() 在进程池中并行读取所有维度的区域文件（结果按区域文件缓存在磁盘上），
+    之后的查询在各维度的内存索引上并行执行，不再读取存档。
+    """
+
+    def __init__(self, world_path, cache_dir=None, max_workers=None):
+        self.world_path = world_path
+        world_abs = os.path.abspath(world_path)
+        digest = hashlib.sha1(world_abs.encode("utf-8")).hexdigest()[:12]
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, f"{os.path.basename(world_abs) or 'world'}-{digest}")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.folders = discover_dimensions(world_path)
+        self.names = []
+        self.dimensions = {}
+        self.errors = 0
+
+    def region_jobs(self):
+        """[(维度, 区域文件, 类型)]"""
+        jobs = []
+        for dimension, folder in self.folders.items():
+            for kind in ("region", "entities"):
+                for path in list_region_files(os.path.join(self.world_path, folder, kind)):
+                    jobs.append((dimension, path, kind))
+        return jobs
+
+    def load(self, progress=None, should_stop=None):
+        """读取全部维度，progress(已完成, 总数) 用于进度回调"""
+        jobs = self.region_jobs()
+        vocabulary = {}
+        parts = {dimension: [] for dimension in self.folders}
+        self.errors = 0
+        if jobs:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(collect_region_cached, path, kind,
+                                    os.path.join(self.cache_dir, dimension.replace(":", "_").replace("/", "_"))): dimension
+                    for dimension, path, kind in jobs
+                }
+                for done, future in enumerate(as_completed(futures), 1):
+                    if should_stop and should_stop():
+                        executor.shutdown(cancel_futures=True)
+                        break
+                    try:
+                        result = future.result()
+                    except Exception:
+                        # 整个区域读取失败时计为一次错误，其余区域照常汇总
+                        self.errors += 1
+                        if progress:
+                            progress(done, len(jobs))
+                        continue
+                    # 把区域内的类型下标映射到全局类型表
+                    remap = np.array([vocabulary.setdefault(n, len(vocabulary)) for n in result["names"]],
+                                     dtype=np.int32)
+                    if len(remap):
+                        result["ent_type"] = remap[result["ent_type"]]
+                        result["be_type"] = remap[result["be_type"]]
+                    parts[futures[future]].append(result)
+                    self.errors += result["errors"]
+                    if progress:
+                        progress(done, len(jobs))
+
+        self.names = list(vocabulary)
+        self.dimensions = {}
+        for dimension, results in parts.items():
+            if not results:
+                continue
+
+            def stack(key, shape, dtype):
+                arrays = [r[key] for r in results]
+                return np.concatenate(arrays) if arrays else np.zeros(shape, dtype=dtype)
+
+            self.dimensions[dimension] = DimensionEntities(
+                dimension, self.names,
+                stack("ent_type", (0,), np.int32), stack("ent_pos", (0, 3), np.float64),
+                stack("be_type", (0,), np.int32), stack("be_pos", (0, 3), np.int32),
+            )
+        return self
+
+    def type_id(self, name):
+        """类型名对应的下标；不存在时返回 -1（查询结果为空）"""
+        name = normalize_id(name)
+        return self.names.index(name) if name in self.names else -1
+
+    def _map_dimensions(self, func, dimension=None):
+        """在各维度上并行执行查询，返回 {维度: 结果}"""
+        targets = [normalize_dimension(dimension)] if dimension else list(self.dimensions)
+        targets = [d for d in targets if d in self.dimensions]
+        with ThreadPoolExecutor(max_workers=max(1, len(targets))) as executor:
+            results = executor.map(lambda d: func(self.dimensions[d]), targets)
+            return dict(zip(targets, results))
+
+    # ===== 查询 =====
+
+    def top_chunks(self, limit=10, kind=KIND_ENTITIES, type_name=None, dimension=None):
+        """实体（或方块实体）最多的区块：[(维度, 区块 x, 区块 z, 数量)]"""
+        type_id = self.type_id(type_name) if type_name else None
+
+        def query(dim):
+            cx, cz, counts = dim.index(kind).chunk_counts(type_id)
+            top = np.argsort(counts)[::-1][:limit]
+            return [(dim.dimension, int(cx[i]), int(cz[i]), int(counts[i])) for i in top if counts[i]]
+
+        rows = [row for rows in self._map_dimensions(query, dimension).values() for row in rows]
+        return sorted(rows, key=lambda row: row[3], reverse=True)[:limit]
+
+    def find(self, type_name, kind=KIND_BLOCK_ENTITIES, dimension=None):
+        """某类型的全部（方块）实体：[(维度, x, y, z)]"""
+        type_id = self.type_id(type_name)
+
+        def query(dim):
+            index = dim.index(kind)
+            positions = index.positions[index.types == type_id]
+            return [(dim.dimension, *p) for p in positions.tolist()]
+
+        return [row for rows in self._map_dimensions(query, dimension).values() for row in rows]
+
+    def within(self, type_name, x, z, radius, dimension=OVERWORLD, kind=KIND_ENTITIES, y=None):
+        """半径内某类型的实体（type_name 为空时不限类型）：[(距离, 类型, x, y, z)]，按距离升序"""
+        type_id = self.type_id(type_name) if type_name else None
+
+        def query(dim):
+            index = dim.index(kind)
+            hits = index.within(x, z, radius, type_id, y)
+            positions = index.positions[hits]
+            delta = positions - np.array([x, 0.0 if y is None else y, z])
+            if y is None:
+                delta[:, 1] = 0
+            distances = np.sqrt((delta * delta).sum(axis=1))
+            return [(float(d), self.names[t], *p)
+                    for d, t, p in zip(distances.tolist(), index.types[hits].tolist(), positions.tolist())]
+
+        rows = [row for rows in self._map_dimensions(query, dimension).values() for row in rows]
+        return sorted(rows)
+
+    def type_totals(self, kind=KIND_ENTITIES, dimension=None):
+        """各类型数量：{类型: 数量}，按数量降序"""
+        totals = np.zeros(len(self.names), dtype=np.int64)
+        for counts in self._map_dimensions(
+                lambda dim: np.bincount(dim.index(kind).types, minlength=len(self.names)), dimension).values():
+            totals += counts
+        order = np.argsort(totals)[::-1]
+        return {self.names[i]: int(totals[i]) for i in order if totals[i]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="entity_query", description="查询存档中的实体与方块实体（全部维度）")
+    parser.add_argument("world", help="存档目录")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    top = sub.add_parser("top", help="实体最多的区块")
+    top.add_argument("--limit", type=int, default=20)
+    top.add_argument("--kind", choices=(KIND_ENTITIES, KIND_BLOCK_ENTITIES), default=KIND_ENTITIES)
+    top.add_argument("--type", default=None, help="只统计该类型")
+    find = sub.add_parser("find", help="某类型方块实体（如 hopper）的全部位置")
+    find.add_argument("type")
+    find.add_argument("--dimension", default=None)
+    find.add_argument("--entities", action="store_true", help="查找实体而不是方块实体")
+    near = sub.add_parser("near", help="某坐标半径内的实体")
+    near.add_argument("type", help="实体类型，all 表示全部")
+    near.add_argument("x", type=float)
+    near.add_argument("z", type=float)
+    near.add_argument("--radius", type=float, default=64.0)
+    near.add_argument("--dimension", default=OVERWORLD)
+    args = parser.parse_args(argv)
+
+    engine = EntityQueryEngine(args.world, max_workers=args.jobs).load()
+    if args.command == "top":
+        for dimension, cx, cz, count in engine.top_chunks(args.limit, args.kind, args.type):
+            print(f"{dimension}\t区块 ({cx}, {cz})\t方块坐标 ({cx * 16}, {cz * 16})\t{count}")
+    elif args.command == "find":
+        kind = KIND_ENTITIES if args.entities else KIND_BLOCK_ENTITIES
+        for dimension, x, y, z in engine.find(args.type, kind, args.dimension):
+            print(f"{dimension}\t{x:.0f}\t{y:.0f}\t{z:.0f}")
+    else:
+        type_name = None if args.type == "all" else args.type
+        for distance, name, x, y, z in engine.within(type_name, args.x, args.z, args.radius, args.dimension):
+            print(f"{name}\t{x:.1f}\t{y:.1f}\t{z:.1f}\t{distance:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
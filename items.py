@@ -0,0 +1,119 @@
+# items.py
+
+import json
+
+# 潜影盒等容器物品里的嵌套物品最多展开的层数
+MAX_CONTAINER_DEPTH = 4
+
+# 方块实体中存放物品的标签（箱子/漏斗/熔炉等为 Items，唱片机与讲台为单个物品）
+BLOCK_ENTITY_ITEM_KEYS = ("Items", "RecordItem", "Book", "item")
+# 实体中存放物品的标签（掉落物/物品展示框为 Item，运输矿车为 Items，村民为 Inventory）
+ENTITY_ITEM_KEYS = ("Item", "Items", "Inventory", "ArmorItems", "HandItems")
+
+
+def item_count(item):
+    # 1.20.5 起为小写 count
+    return int(item.get("count", item.get("Count", 1)))
+
+
+def plain_text(value):
+    """把 JSON 文本组件（如自定义名称）转为纯文本"""
+    if isinstance(value, dict):
+        return str(value.get("text", "")) + "".join(plain_text(v) for v in value.get("extra", []))
+    if isinstance(value, list):
+        return "".join(plain_text(v) for v in value)
+    value = str(value)
+    if value[:1] in "{[\"":
+        try:
+            return plain_text(json.loads(value))
+        except ValueError:
+            pass
+    return value
+
+
+def item_name(item):
+    """物品的自定义名称，没有时返回 None"""
+    components = item.get("components") or {}
+    name = components.get("minecraft:custom_name")
+    if name is None:
+        name = ((item.get("tag") or {}).get("display") or {}).get("Name")
+    return plain_text(name) if name is not None else None
+
+
+def _enchantment_map(value):
+    # 1.20.5 起为 {"levels": {id: 等级}}，1.21.5 起去掉了 levels 一层
+    if isinstance(value, dict):
+        return (value.get("levels", value) or {}).items()
+    return ((e.get("id"), e.get("lvl", 1)) for e in value or ())
+
+
+def item_enchantments(item):
+    """物品的附魔（含附魔书中存储的附魔）：[(附魔 ID, 等级)]"""
+    components = item.get("components") or {}
+    tag = item.get("tag") or {}
+    result = []
+    for value in (components.get("minecraft:enchantments"), components.get("minecraft:stored_enchantments"),
+                  tag.get("Enchantments"), tag.get("StoredEnchantments"), tag.get("ench")):
+        if value:
+            result.extend((str(eid), int(level)) for eid, level in _enchantment_map(value) if eid is not None)
+    return result
+
+
+def nested_items(item):
+    """容器物品（潜影盒、收纳袋等）里的物品：新版 components 与旧版 tag 两种格式"""
+    components = item.get("components") or {}
+    for entry in components.get("minecraft:container", []):
+        yield entry.get("item", {})
+    yield from components.get("minecraft:bundle_contents", [])
+    tag = item.get("tag") or {}
+    yield from (tag.get("BlockEntityTag") or {}).get("Items", [])
+    yield from tag.get("Items", [])
+
+
+def flatten_items(items, where, depth=0):
+    """把物品列表展开为 [{id, count, slot, where, name, enchantments}]
+
+    容器物品里的物品一并展开，where 标记为 “where/container”。
+    """
+    result = []
+    for item in items:
+        if not isinstance(item, dict) or "id" not in item:
+            continue
+        result.append({
+            "id": str(item["id"]),
+            "count": item_count(item),
+            "slot": int(item.get("Slot", -1)),
+            "where": where,
+            "name": item_name(item),
+            "enchantments": item_enchantments(item),
+        })
+        if depth < MAX_CONTAINER_DEPTH:
+            result.extend(flatten_items(nested_items(item), f"{where}/container", depth + 1))
+    return result
+
+
+def _item_lists(compound, keys):
+    for key in keys:
+        value = compound.get(key)
+        if isinstance(value, dict):
+            yield [value]
+        elif value:
+            yield value
+
+
+def block_entity_items(block_entity):
+    """方块实体（箱子、木桶、潜影盒……）中的物品"""
+    where = str(block_entity.get("id", "?"))
+    return [item for items in _item_lists(block_entity, BLOCK_ENTITY_ITEM_KEYS)
+            for item in flatten_items(items, where)]
+
+
+def entity_items(entity):
+    """实体（掉落物、运输矿车、物品展示框、盔甲架……）携带的物品"""
+    where = str(entity.get("id", "?"))
+    lists = list(_item_lists(entity, ENTITY_ITEM_KEYS))
+    # 1.21.5 起装备统一存放在 equipment 中
+    equipment = entity.get("equipment")
+    if isinstance(equipment, dict):
+        lists.append(list(equipment.values()))
+    return [item for items in lists for item in flatten_items(items, where)]
@@ -3,8 +3,24 @@ import sys
 import json
 import tkinter as tk
 import shutil
-from tkinter import filedialog, messagebox, END, colorchooser
-from mc_saver import MinecraftSaver
+import sqlite3
+import multiprocessing
+from tkinter import filedialog, messagebox, END, colorchooser, ttk
+from mc_saver import MinecraftSaver, nbt_json_default, nbt_to_primitive
+from world_scan import QUERY_COUNT_BLOCKS, QUERY_NAMES, WorldScan
+from world_index import WorldIndex
+from tasks import BackgroundTask
+from world_export import FORMAT_JSON, FORMAT_NDJSON, export_world
+from world_dashboard import SummaryCache, discover_worlds, load_summaries
+from map_render import TILE_SIZE, MapRenderer
+from chunk_cache import shared_cache
+from dimensions import DIMENSION_LABELS, OVERWORLD, DimensionLoader, dimension_label, discover_dimensions
+from virtual_list import VirtualList
+from vfs import ARCHIVE_SUFFIXES, open_world_fs
+from world_watch import CHANGE_LEVEL, WorldWatcher, describe_changes
+from world_stats import WorldStats, is_ore
+import profiling
+from profiling import SPAN_FORMAT, SPAN_RENDER, span
 from datetime import datetime, timezone
 import logging
 
@@ -13,8 +29,14 @@ LOG_DIR = "logs"
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
+# 日志级别可通过环境变量 MCAV_LOG_LEVEL 配置（DEBUG / INFO / WARNING / ERROR），运行中可在性能面板调整
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+LOG_LEVEL = os.environ.get("MCAV_LOG_LEVEL", "INFO").upper()
+if LOG_LEVEL not in LOG_LEVELS:
+    LOG_LEVEL = "INFO"
+
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=getattr(logging, LOG_LEVEL),
     format="[%(asctime)s] %(levelname)s: %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S",
     handlers=[
@@ -92,18 +114,76 @@ class MinecraftToolGUI:
         path_frame.pack(pady=10, fill=tk.X)
         # 显示栏
         show_frame = tk.Frame(root, bg=STYLE['bg'])
+        # 世界信息等文本：可自由选择复制，长行自动换行
+        self.show_text_frame = tk.Frame(show_frame, bg=STYLE['bg'])
         self.show_text = tk.Text(
-            show_frame,
+            self.show_text_frame,
             bg=STYLE['text_bg'],
             fg=STYLE['text_fg'],
             state='disabled',  # 设置为只读
             font=("微软雅黑", 10)
         )
-        self.show_text_scrollbar = tk.Scrollbar(show_frame)
+        self.show_text_scrollbar = tk.Scrollbar(self.show_text_frame)
         self.show_text_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.show_text.config(yscrollcommand=self.show_text_scrollbar.set)
         self.show_text_scrollbar.config(command=self.show_text.yview)
         self.show_text.pack(fill=tk.BOTH, expand=True)
+        # 扫描、搜索结果：只绘制可见行，有几十万行时滚动依然流畅
+        self.show_list = VirtualList(
+            show_frame,
+            bg=STYLE['text_bg'],
+            fg=STYLE['text_fg'],
+            font=("微软雅黑", 10)
+        )
+
+        # 方块统计视图（与世界信息并排）：方块组成与矿石数量，双击某行查看按 Y 的分布
+        stats_frame = tk.Frame(show_frame, bg=STYLE['bg'])
+        stats_top = tk.Frame(stats_frame, bg=STYLE['bg'])
+        self.stats_dimension_var = tk.StringVar(value=DIMENSION_LABELS[OVERWORLD])
+        self.stats_dimension_menu = tk.OptionMenu(stats_top, self.stats_dimension_var, *DIMENSION_LABELS.values())
+        self.stats_box_entry = tk.Entry(
+            stats_top,
+            bg=STYLE['entry_bg'],
+            fg=STYLE['entry_fg'],
+            font=("微软雅黑", 10),
+            width=18
+        )
+        self.stats_btn = tk.Button(
+            stats_top,
+            text="方块统计",
+            command=self.start_block_stats,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        self.stats_status_label = tk.Label(
+            stats_frame,
+            text="范围格式: x1,z1,x2,z2（留空为整个维度）",
+            anchor="w",
+            bg=STYLE['label_bg'],
+            fg=STYLE['label_fg'],
+            font=("微软雅黑", 10)
+        )
+        stats_table = tk.Frame(stats_frame)
+        self.stats_tree = ttk.Treeview(stats_table, columns=("name", "count"), show="headings")
+        stats_scrollbar = tk.Scrollbar(stats_table, command=self.stats_tree.yview)
+        self.stats_tree.config(yscrollcommand=stats_scrollbar.set)
+        self.stats_tree.heading("name", text="方块")
+        self.stats_tree.heading("count", text="数量")
+        self.stats_tree.column("name", width=220, anchor="w")
+        self.stats_tree.column("count", width=100, anchor="e")
+        self.stats_tree.bind("<Double-1>", self.show_block_levels)
+        self.stats_dimension_menu.pack(side=tk.LEFT, padx=5)
+        self.stats_box_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.stats_btn.pack(side=tk.RIGHT, padx=5)
+        stats_top.pack(fill=tk.X)
+        self.stats_status_label.pack(fill=tk.X, padx=5)
+        stats_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.stats_tree.pack(fill=tk.BOTH, expand=True)
+        stats_table.pack(fill=tk.BOTH, expand=True, pady=5)
+        stats_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5)
+
+        self.show_text_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         show_frame.pack(pady=10, fill=tk.BOTH, expand=True)
 
         # 添加选择存档按钮
@@ -115,10 +195,20 @@ class MinecraftToolGUI:
             bg=STYLE['button_bg'],
             fg=STYLE['button_fg']
         )
+        # 直接打开 .zip / .tar.gz 备份，无需先解压
+        self.select_backup_btn = tk.Button(
+            path_frame,
+            text="打开备份",
+            command=self.browse_backup_path,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
 
         self.path_label.pack(side=tk.LEFT, padx=5)
         self.path_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         self.select_world_btn.pack(side=tk.RIGHT, padx=5)  # 放在右侧
+        self.select_backup_btn.pack(side=tk.RIGHT, padx=5)
         path_frame.pack(pady=10, fill=tk.X)
 
         # ===== 按钮区域 =====
@@ -132,6 +222,48 @@ class MinecraftToolGUI:
         )
         self.load_btn.pack(pady=10, fill=tk.X)
 
+        # 加载进度与取消
+        status_frame = tk.Frame(root, bg=STYLE['bg'])
+        self.status_label = tk.Label(
+            status_frame,
+            text="",
+            anchor="w",
+            bg=STYLE['label_bg'],
+            fg=STYLE['label_fg'],
+            font=("微软雅黑", 10)
+        )
+        self.cancel_load_btn = tk.Button(
+            status_frame,
+            text="取消加载",
+            command=self.cancel_load,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg'],
+            state='disabled'
+        )
+        self.perf_btn = tk.Button(
+            status_frame,
+            text="性能",
+            command=self.open_performance_panel,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        # 监视运行中服务器的存档，变化自动显示
+        self.watch_btn = tk.Button(
+            status_frame,
+            text="监视",
+            command=self.toggle_watch,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        self.status_label.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.cancel_load_btn.pack(side=tk.RIGHT, padx=5)
+        self.perf_btn.pack(side=tk.RIGHT, padx=5)
+        self.watch_btn.pack(side=tk.RIGHT, padx=5)
+        status_frame.pack(fill=tk.X)
+
         self.export_btn = tk.Button(
             root,
             text="生成为 JSON",
@@ -142,6 +274,36 @@ class MinecraftToolGUI:
         )
         self.export_btn.pack(pady=5, fill=tk.X)
 
+        self.export_world_btn = tk.Button(
+            root,
+            text="导出整个世界 (NDJSON)",
+            command=self.export_world_stream,
+            font=("微软雅黑", 12, "bold"),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        self.export_world_btn.pack(pady=5, fill=tk.X)
+
+        self.dashboard_btn = tk.Button(
+            root,
+            text="多存档总览",
+            command=self.open_dashboard,
+            font=("微软雅黑", 12, "bold"),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        self.dashboard_btn.pack(pady=5, fill=tk.X)
+
+        self.map_btn = tk.Button(
+            root,
+            text="查看地图",
+            command=self.open_map_view,
+            font=("微软雅黑", 12, "bold"),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        self.map_btn.pack(pady=5, fill=tk.X)
+
         # 主题编辑器
         self.edit_theme_btn = tk.Button(
             root,
@@ -164,11 +326,90 @@ class MinecraftToolGUI:
         )
         self.select_custom_theme_btn.pack(pady=5, fill=tk.X)
 
+        # ===== 全局扫描区域 =====
+        scan_frame = tk.Frame(root, bg=STYLE['bg'])
+        self.scan_label = tk.Label(
+            scan_frame,
+            text="全局扫描:",
+            bg=STYLE['label_bg'],
+            fg=STYLE['label_fg'],
+            font=("微软雅黑", 10)
+        )
+        self.scan_query_var = tk.StringVar(value=QUERY_NAMES[QUERY_COUNT_BLOCKS])
+        self.scan_query_menu = tk.OptionMenu(scan_frame, self.scan_query_var, *QUERY_NAMES.values())
+        self.scan_target_entry = tk.Entry(
+            scan_frame,
+            bg=STYLE['entry_bg'],
+            fg=STYLE['entry_fg'],
+            font=("微软雅黑", 10)
+        )
+        self.scan_start_btn = tk.Button(
+            scan_frame,
+            text="开始扫描",
+            command=self.start_world_scan,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        self.scan_cancel_btn = tk.Button(
+            scan_frame,
+            text="取消扫描",
+            command=self.cancel_world_scan,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg'],
+            state='disabled'
+        )
+        self.scan_status_label = tk.Label(
+            scan_frame,
+            text="",
+            bg=STYLE['label_bg'],
+            fg=STYLE['label_fg'],
+            font=("微软雅黑", 10)
+        )
+        self.index_btn = tk.Button(
+            scan_frame,
+            text="更新索引",
+            command=self.refresh_world_index,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        self.item_search_btn = tk.Button(
+            scan_frame,
+            text="搜索物品",
+            command=self.search_items,
+            font=("微软雅黑", 10),
+            bg=STYLE['button_bg'],
+            fg=STYLE['button_fg']
+        )
+        self.scan_label.pack(side=tk.LEFT, padx=5)
+        self.scan_query_menu.pack(side=tk.LEFT, padx=5)
+        self.scan_target_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.scan_status_label.pack(side=tk.LEFT, padx=5)
+        self.scan_cancel_btn.pack(side=tk.RIGHT, padx=5)
+        self.scan_start_btn.pack(side=tk.RIGHT, padx=5)
+        self.index_btn.pack(side=tk.RIGHT, padx=5)
+        self.item_search_btn.pack(side=tk.RIGHT, padx=5)
+        scan_frame.pack(pady=5, fill=tk.X)
+
         # 存储数据
         self.world_info = None
         self.player_pos = None
         self.dimension = None
         self.inventory = []
+        self.load_task = None
+        self.watch_task = None
+        self.export_task = None
+        self.scan = None
+        self.scan_task = None
+        self.scan_total = 0
+        self.index_task = None
+        self.stats_task = None
+        self.block_stats = None
+        # 方块统计维度菜单对应的存档与其中的维度 {维度 ID: 显示名称}
+        self.stats_dimensions_path = None
+        self.stats_dimensions = dict(DIMENSION_LABELS)
 
     def select_custom_theme(self):
         """选择自定义主题文件并重启应用"""
@@ -374,69 +615,431 @@ class MinecraftToolGUI:
             self.path_entry.delete(0, tk.END)
             self.path_entry.insert(0, world_path)
 
+    def browse_backup_path(self):
+        """选择压缩包备份作为存档路径"""
+        archive_path = filedialog.askopenfilename(
+            title="选择存档备份",
+            filetypes=[("存档备份", " ".join(f"*{suffix}" for suffix in ARCHIVE_SUFFIXES)), ("所有文件", "*.*")])
+        if archive_path:
+            self.path_entry.delete(0, tk.END)
+            self.path_entry.insert(0, archive_path)
+
     def load_world_info(self):
-        """加载世界信息并显示"""
+        """在后台线程中加载世界信息，完成后在主线程中显示"""
         world_path = self.path_entry.get().strip()
         if not world_path:
             logger.warning("未输入存档路径")
             messagebox.showerror("错误", "请输入存档路径！")
             return
 
-        try:
-            saver = MinecraftSaver(world_path)
-            self.world_info = saver.get_world_info()
-            self.player_pos = saver.get_player_position()
-            self.dimension = saver.get_dimension()
-            self.inventory = saver.get_player_inventory()
-            logger.info("成功获取世界信息、玩家坐标、背包数据")
-        except FileNotFoundError:
-            logger.error("找不到 level.dat 文件！路径: %s", world_path, exc_info=True)
-            messagebox.showerror("错误", "找不到 level.dat 文件！")
+        # 正在加载其他存档时直接取消旧任务，不在其后排队
+        if self.load_task is not None and not self.load_task.finished:
+            logger.info("取消过期的加载任务")
+            self.load_task.cancel()
+
+        self.status_label.config(text=f"正在加载：{world_path}")
+        self.cancel_load_btn.config(state='normal')
+        self.load_task = BackgroundTask(
+            self.root,
+            lambda task: load_world_job(task, world_path),
+            on_done=lambda result: self._on_world_loaded(result, world_path),
+            on_error=lambda e: self._on_world_load_failed(e, world_path),
+            on_progress=lambda text: self.status_label.config(text=text),
+            on_cancel=self._on_load_cancelled,
+        ).start()
+
+    def _on_world_loaded(self, result, world_path):
+        self._show_world_state(result)
+        self._set_stats_dimensions(world_path, result["dimensions"])
+        logger.info("成功获取世界信息、玩家坐标、背包数据")
+        self.status_label.config(text="加载完成")
+        self.cancel_load_btn.config(state='disabled')
+
+    def _show_world_state(self, result):
+        self.world_info = result["world_info"]
+        self.player_pos = result["player_pos"]
+        self.dimension = result["dimension"]
+        self.inventory = result["inventory"]
+        self.set_text(result["output"])
+
+    def toggle_watch(self):
+        """开始/停止监视存档：只重新读取变化的文件，level.dat 变化时直接刷新显示"""
+        if self.watch_task is not None and not self.watch_task.finished:
+            self.watch_task.cancel()
             return
-        except Exception as e:
-            logger.exception("加载世界信息时发生未知错误: %s", e)
-            messagebox.showerror("错误", f"发生未知错误：{e}")
+        world_path = self.path_entry.get().strip()
+        if not world_path:
+            messagebox.showerror("错误", "请输入存档路径！")
+            return
+        if not os.path.isdir(world_path):
+            messagebox.showerror("错误", "只能监视存档目录（备份文件不会变化）")
             return
 
-        # 转换 NBT 数据为原生结构
-        world_info = nbt_to_primitive(self.world_info)
-        player_pos = nbt_to_primitive(self.player_pos)
-        dimension_info = nbt_to_primitive(self.dimension)
-        inventory_info = nbt_to_primitive(self.inventory)
-
-        # 构建输出内容
-        output = f"✨ 世界名称：{world_info.get('世界名称', '未知')}\n"
-        output += "🌍 世界信息：\n"
-        output += f"  游戏模式：{world_info.get('游戏模式', '未知')}\n"
-        output += f"  出生点坐标：X={world_info['出生点']['x']}, Y={world_info['出生点']['y']}, Z={world_info['出生点']['z']}\n"
-        output += f"  世界时间：{format_minecraft_time(world_info.get('世界时间', 0))}（游戏内）\n"
-        output += f"  最后保存时间：{format_real_time(world_info.get('最后保存时间', 0))}\n"
-        output += f"  世界难度：{world_info.get('世界难度', '未知')}\n"
-        output += f"🎮 所在维度：{dimension_info}\n"
-        output += "游戏角色坐标：\n"
-        output += f"  X={player_pos['x']:.2f}, Y={player_pos['y']:.2f}, Z={player_pos['z']:.2f}\n"
-
-        # 显示背包信息
-        output += "\n🎒 玩家背包信息：\n"
-        if inventory_info:
-            for item in inventory_info:
-                slot = item.get('槽位', -1)
-                name = item.get('物品ID', '未知').replace('minecraft:', '')
-                count = item.get('数量') + 1
-                nbt = item.get('NBT')
-                formatted_nbt = format_nbt(nbt) if nbt else "无 NBT 数据"
-                output += f"  槽位 {slot}: {name} ×{count}\n     └─ NBT: {formatted_nbt}\n"
+        watcher = WorldWatcher(world_path)
+
+        def job(task):
+            def on_change(changes):
+                # level.dat 的格式化在工作线程中完成，主线程只替换显示内容
+                for change in changes:
+                    if change["type"] == CHANGE_LEVEL:
+                        change["state"] = world_state(change.pop("saver"))
+                task.report(changes)
+            watcher.run(on_change, should_stop=lambda: task.cancelled)
+
+        def stopped(_result=None):
+            self.watch_btn.config(text="监视")
+            self.status_label.config(text="已停止监视")
+            logger.info(f"停止监视存档: {world_path}")
+
+        def failed(e):
+            self.watch_btn.config(text="监视")
+            logger.error(f"监视存档失败: {e}", exc_info=e)
+            messagebox.showerror("错误", f"监视存档失败：{e}")
+
+        self.watch_task = BackgroundTask(self.root, job, on_done=stopped, on_error=failed,
+                                         on_progress=self._on_world_changed, on_cancel=stopped,
+                                         poll_ms=200).start()
+        self.watch_btn.config(text="停止监视")
+        self.status_label.config(text=f"正在监视：{world_path}")
+        logger.info(f"开始监视存档: {world_path}")
+
+    def _on_world_changed(self, changes):
+        for change in changes:
+            if change["type"] == CHANGE_LEVEL:
+                self._show_world_state(change["state"])
+        text = f"{datetime.now().strftime('%H:%M:%S')} 检测到变化：{describe_changes(changes)}"
+        self.status_label.config(text=text)
+        logger.info(text)
+
+    def _on_world_load_failed(self, error, world_path):
+        self.status_label.config(text="")
+        self.cancel_load_btn.config(state='disabled')
+        if isinstance(error, FileNotFoundError):
+            logger.error("找不到 level.dat 文件！路径: %s", world_path, exc_info=error)
+            messagebox.showerror("错误", "找不到 level.dat 文件！")
         else:
-            output += "  您的物品栏无内容\n"
-
-        # 更新显示内容
+            logger.error("加载世界信息时发生未知错误: %s", error, exc_info=error)
+            messagebox.showerror("错误", f"发生未知错误：{error}")
+
+    def _on_load_cancelled(self):
+        # 被新的加载任务取代时不覆盖新任务的状态
+        if self.load_task is None or self.load_task.finished:
+            self.status_label.config(text="加载已取消")
+            self.cancel_load_btn.config(state='disabled')
+
+    def cancel_load(self):
+        """取消正在进行的加载或导出"""
+        for task in (self.load_task, self.export_task):
+            if task is not None and not task.finished:
+                task.cancel()
+        self.cancel_load_btn.config(state='disabled')
+        logger.info("用户取消了加载")
+
+    def _show_pane(self, pane):
+        """显示栏在文本与结果列表之间切换"""
+        other = self.show_list if pane is self.show_text_frame else self.show_text_frame
+        if other.winfo_ismapped():
+            other.pack_forget()
+        pane.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    def set_text(self, text):
+        """用文本替换显示栏的全部内容（世界信息、索引摘要等）"""
+        self._show_pane(self.show_text_frame)
         self.show_text.config(state='normal')
         self.show_text.delete(1.0, END)
-        self.show_text.insert(END, output)
+        self.show_text.insert(END, text)
         self.show_text.config(state='disabled')
 
+    def set_rows(self, rows):
+        """用结果列表替换显示栏的全部内容（扫描、搜索结果，行数可能很多）"""
+        self._show_pane(self.show_list)
+        self.show_list.set_rows(rows)
+
+    def append_text(self, text):
+        """在结果列表末尾追加内容（按行）"""
+        self.show_list.append(text.splitlines())
+
+    def _set_stats_dimensions(self, world_path, dimensions):
+        """用存档中发现的维度（含数据包维度）填充方块统计的维度菜单"""
+        self.stats_dimensions_path = world_path
+        self.stats_dimensions = dimensions
+        menu = self.stats_dimension_menu["menu"]
+        menu.delete(0, END)
+        for label in dimensions.values():
+            menu.add_command(label=label, command=tk._setit(self.stats_dimension_var, label))
+        if self.stats_dimension_var.get() not in dimensions.values():
+            self.stats_dimension_var.set(dimensions.get(OVERWORLD) or next(iter(dimensions.values()), ""))
+
+    def start_block_stats(self):
+        """在进程池中统计方块组成与矿石分布；按区块缓存，再次统计只计算变化的区块"""
+        world_path = self.path_entry.get().strip()
+        if not world_path:
+            messagebox.showerror("错误", "请输入存档路径！")
+            return
+        if self.stats_task is not None:
+            messagebox.showwarning("警告", "方块统计正在进行")
+            return
+        box = None
+        box_text = self.stats_box_entry.get().strip()
+        if box_text:
+            try:
+                box = tuple(int(v) for v in box_text.replace("，", ",").split(","))
+            except ValueError:
+                box = ()
+            if len(box) != 4:
+                messagebox.showerror("错误", "范围格式应为 x1,z1,x2,z2")
+                return
+        if world_path != self.stats_dimensions_path:
+            # 未加载过该存档：先按当前路径重新发现维度
+            self._set_stats_dimensions(world_path, world_dimensions(world_path))
+        if not self.stats_dimensions:
+            messagebox.showerror("错误", "该存档中没有区块数据")
+            return
+        label = self.stats_dimension_var.get()
+        dimension = next(k for k, v in self.stats_dimensions.items() if v == label)
+
+        def job(task):
+            stats = WorldStats(world_path, dimension)
+            if not stats.region_files:
+                raise FileNotFoundError(world_path)
+            return stats.compute(box, progress=lambda done, total: task.report((done, total)),
+                                 should_stop=lambda: task.cancelled)
+
+        def on_progress(item):
+            self.stats_status_label.config(text=f"统计中: {item[0]}/{item[1]} 区域")
+
+        def on_done(result):
+            self.stats_task = None
+            self.stats_btn.config(state='normal')
+            self._show_block_stats(result)
+
+        def on_error(error):
+            self.stats_task = None
+            self.stats_btn.config(state='normal')
+            self.stats_status_label.config(text="")
+            if isinstance(error, FileNotFoundError):
+                messagebox.showerror("错误", "找不到区域文件！")
+            else:
+                logger.error("方块统计失败: %s", error, exc_info=error)
+                messagebox.showerror("错误", f"方块统计失败：{error}")
+
+        def on_cancel():
+            self.stats_task = None
+            self.stats_btn.config(state='normal')
+
+        logger.info(f"开始方块统计: {dimension} {box or '整个维度'}")
+        self.stats_btn.config(state='disabled')
+        self.stats_task = BackgroundTask(self.root, job, on_done=on_done, on_error=on_error,
+                                         on_progress=on_progress, on_cancel=on_cancel, poll_ms=100).start()
+
+    def _show_block_stats(self, result):
+        """矿石排在前面，其余方块按数量降序"""
+        self.block_stats = result
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        totals = result.totals()
+        ores = {name: count for name, count in totals.items() if is_ore(name)}
+        for name, count in list(ores.items()) + [(n, c) for n, c in totals.items() if n not in ores]:
+            self.stats_tree.insert("", END, values=(name, count))
+        text = f"{result.chunks} 个区块（本次计算 {result.computed}）"
+        if result.errors:
+            text += f"，{result.errors} 个读取失败"
+        self.stats_status_label.config(text=text)
+        logger.info(f"方块统计完成: {text}")
+
+    def show_block_levels(self, _event=None):
+        """在显示栏中列出所选方块按 Y 的分布（矿石逐层，其它方块按分段）"""
+        selection = self.stats_tree.selection()
+        if not selection or self.block_stats is None:
+            return
+        name = self.stats_tree.item(selection[0], "values")[0]
+        levels = self.block_stats.by_y(name)
+        unit = "层" if is_ore(name) else "分段（16 层）"
+        peak = max((count for _y, count in levels), default=0)
+        lines = [f"📊 {name} 按{unit}分布："]
+        for y, count in sorted(levels, reverse=True):
+            bar = "█" * max(1, round(count / peak * 40)) if peak else ""
+            lines.append(f"  Y={y:>4}  {count:>8}  {bar}")
+        self.set_text("\n".join(lines))
+
+    def start_world_scan(self):
+        """在进程池中扫描整个世界，结果逐个区域追加到显示栏"""
+        world_path = self.path_entry.get().strip()
+        if not world_path:
+            messagebox.showerror("错误", "请输入存档路径！")
+            return
+        if self.scan is not None:
+            messagebox.showwarning("警告", "已有扫描正在进行，请先取消")
+            return
+
+        query = next(k for k, v in QUERY_NAMES.items() if v == self.scan_query_var.get())
+        targets = self.scan_target_entry.get().split(",")
+        if query == QUERY_COUNT_BLOCKS and not any(t.strip() for t in targets):
+            messagebox.showerror("错误", "请输入要统计的方块 ID（多个用逗号分隔）")
+            return
+
+        scan = WorldScan(world_path, query, targets)
+        if not scan.region_files:
+            messagebox.showerror("错误", "找不到区域文件！")
+            return
+        logger.info(f"开始全局扫描: {query} {sorted(scan.targets)}，共 {len(scan.region_files)} 个区域文件")
+
+        self.scan = scan
+        self.scan_total = 0
+        self.set_rows([f"🔍 {QUERY_NAMES[query]}：{', '.join(sorted(scan.targets)) or '全部'}"])
+        self.scan_start_btn.config(state='disabled')
+        self.scan_cancel_btn.config(state='normal')
+
+        def job(task):
+            for item in scan.iter_results():
+                task.report(item)
+
+        self.scan_task = BackgroundTask(
+            self.root, job,
+            on_done=lambda _: self._on_world_scan_finished("✅ 扫描完成"),
+            on_error=self._on_world_scan_failed,
+            on_progress=self._on_world_scan_progress,
+            on_cancel=lambda: self._on_world_scan_finished("⏹ 扫描已取消"),
+            poll_ms=100,
+        ).start()
+
+    def _on_world_scan_progress(self, item):
+        """每完成一个区域文件，追加其结果并刷新进度"""
+        done, total, result = item
+        lines = []
+        if "count" in result:
+            self.scan_total += result["count"]
+        else:
+            self.scan_total += len(result["hits"])
+            for hit in result["hits"]:
+                lines.append(f"  {hit['id']} @ X={hit['x']}, Y={hit['y']}, Z={hit['z']}")
+        if result.get("error"):
+            lines.append(f"  ⚠ {os.path.basename(result['path'] or '?')}: 读取失败：{result['error']}")
+        elif result.get("errors"):
+            lines.append(f"  ⚠ {os.path.basename(result['path'] or '?')}: {result['errors']} 个区块读取失败")
+        if lines:
+            self.show_list.append(lines)
+        self.scan_status_label.config(text=f"进度: {done}/{total} 区域 | 结果: {self.scan_total}")
+
+    def _on_world_scan_failed(self, error):
+        logger.error("全局扫描失败: %s", error, exc_info=error)
+        self.append_text(f"❌ 扫描失败：{error}\n")
+        self._on_world_scan_finished("⏹ 扫描中止")
+
+    def _on_world_scan_finished(self, message):
+        self.append_text(f"{message}，结果总计：{self.scan_total}\n")
+        logger.info(f"全局扫描结束，结果总计: {self.scan_total}")
+        self.scan = None
+        self.scan_task = None
+        self.scan_start_btn.config(state='normal')
+        self.scan_cancel_btn.config(state='disabled')
+
+    def cancel_world_scan(self):
+        """取消正在进行的全局扫描"""
+        if self.scan is not None:
+            self.scan.cancel()
+            self.scan_task.cancel()
+            self.scan_cancel_btn.config(state='disabled')
+            logger.info("用户取消了全局扫描")
+
+    def refresh_world_index(self):
+        """增量更新存档的本地索引，只重新扫描发生变化的区域文件和区块"""
+        world_path = self.path_entry.get().strip()
+        if not world_path:
+            messagebox.showerror("错误", "请输入存档路径！")
+            return
+        if self.index_task is not None:
+            messagebox.showwarning("警告", "索引正在更新中，请稍候")
+            return
+
+        def job(task):
+            # SQLite 连接只能在创建它的线程中使用
+            with WorldIndex(world_path) as index:
+                stats = index.refresh(progress=lambda done, total: task.report((done, total)))
+                return {
+                    "stats": stats,
+                    "chunks": index.chunk_count(),
+                    "entities": index.entity_total(),
+                    "blocks": index.block_totals(limit=20),
+                }
+
+        self.index_btn.config(state='disabled')
+        self.scan_status_label.config(text="正在更新索引…")
+        self.index_task = BackgroundTask(
+            self.root, job,
+            on_done=self._on_index_refreshed,
+            on_error=self._on_index_refresh_failed,
+            on_progress=lambda p: self.scan_status_label.config(text=f"索引进度: {p[0]}/{p[1]} 区域"),
+            poll_ms=100,
+        ).start()
+
+    def _on_index_refresh_failed(self, error):
+        self.index_task = None
+        self.index_btn.config(state='normal')
+        logger.error(f"更新索引失败: {error}")
+        self.scan_status_label.config(text="")
+        messagebox.showerror("错误", f"更新索引失败：{error}")
+
+    def _on_index_refreshed(self, payload):
+        self.index_task = None
+        self.index_btn.config(state='normal')
+        stats = payload["stats"]
+        logger.info(f"索引已更新: {stats}")
+        text = f"索引已更新：重新扫描 {stats['regions']} 个区域，{stats['chunks']} 个区块"
+        if stats["errors"]:
+            text += f"，{len(stats['errors'])} 个文件读取失败"
+            for path, error in stats["errors"]:
+                logger.warning(f"索引文件读取失败 {path}: {error}")
+        self.scan_status_label.config(text=text)
+        output = "📇 存档索引：\n"
+        output += f"  区块总数：{payload['chunks']}\n"
+        output += f"  实体总数：{payload['entities']}\n"
+        output += "  方块数量（前 20）：\n"
+        for block, total in payload["blocks"]:
+            output += f"    {block.replace('minecraft:', '')}: {total}\n"
+        self.set_text(output)
+
+    def search_items(self):
+        """在物品倒排索引中搜索（需先更新索引），条件写在扫描输入框中
+
+        例如 “netherite_block”、“enchant=sharpness level=5”、“name=钻石剑”。
+        """
+        world_path = self.path_entry.get().strip()
+        if not world_path:
+            messagebox.showerror("错误", "请输入存档路径！")
+            return
+        query = parse_item_query(self.scan_target_entry.get())
+        if not query:
+            messagebox.showerror("错误", "请输入物品 ID 或 enchant= / name= 条件")
+            return
+
+        def job(task):
+            with WorldIndex(world_path) as index:
+                if not index.get_meta("level_dat_mtime"):
+                    raise RuntimeError("该存档还没有索引，请先点击“更新索引”")
+                return index.find_items(**query)
+
+        def on_done(hits):
+            logger.info(f"物品搜索 {query}: {len(hits)} 条结果")
+            rows = [f"🔎 物品搜索：{query}，共 {len(hits)} 条结果"]
+            for hit in hits:
+                x, y, z = (f"{v:.0f}" if v is not None else "?" for v in hit["pos"])
+                line = f"  {hit['item'].replace('minecraft:', '')} ×{hit['count']} @ X={x}, Y={y}, Z={z}  [{hit['container']}]"
+                if hit["name"]:
+                    line += f" “{hit['name']}”"
+                if hit["enchantments"]:
+                    line += " " + ", ".join(f"{e.replace('minecraft:', '')} {lvl}" for e, lvl in hit["enchantments"])
+                rows.append(line)
+            self.set_rows(rows)
+            self.scan_status_label.config(text=f"物品搜索结果: {len(hits)}")
+
+        def on_error(e):
+            logger.error(f"物品搜索失败: {e}")
+            messagebox.showerror("错误", f"物品搜索失败：{e}")
+
+        BackgroundTask(self.root, job, on_done=on_done, on_error=on_error).start()
+
     def export_to_json(self):
-        """导出为 JSON 文件"""
+        """导出为 JSON 文件（在后台线程中转换并写入）"""
         logger.debug("开始导出为 JSON")
         if not hasattr(self, 'world_info') or not self.world_info:
             messagebox.showwarning("警告", "请先加载存档后再导出 JSON")
@@ -451,31 +1054,587 @@ class MinecraftToolGUI:
             logger.info("用户取消了导出操作")
             return
 
-        try:
-            export_data = {
-                "世界信息": self.world_info,
-                "玩家位置": self.player_pos,
-                "所在维度": self.dimension,
-                "玩家背包": self.inventory
-            }
+        export_data = {
+            "世界信息": self.world_info,
+            "玩家位置": self.player_pos,
+            "所在维度": self.dimension,
+            "玩家背包": self.inventory
+        }
+
+        def job(task):
+            data = nbt_to_primitive(export_data)
+            task.check_cancelled()
             with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=4)
-            logger.info(f"数据已保存至：{file_path}")
-            messagebox.showinfo("成功", f"数据已保存至：{file_path}")
-        except Exception as e:
-            logger.exception(f"导出 JSON 时发生错误: {e}")
+                json.dump(data, f, ensure_ascii=False, indent=4, default=nbt_json_default)
+            return file_path
+
+        def on_done(path):
+            logger.info(f"数据已保存至：{path}")
+            self.status_label.config(text="导出完成")
+            self.cancel_load_btn.config(state='disabled')
+            messagebox.showinfo("成功", f"数据已保存至：{path}")
+
+        def on_error(e):
+            logger.error(f"导出 JSON 时发生错误: {e}", exc_info=e)
+            self.status_label.config(text="")
+            self.cancel_load_btn.config(state='disabled')
             messagebox.showerror("错误", f"导出 JSON 时发生错误：{e}")
 
+        self.status_label.config(text=f"正在导出：{file_path}")
+        self.cancel_load_btn.config(state='normal')
+        self.export_task = BackgroundTask(
+            self.root, job, on_done=on_done, on_error=on_error,
+            on_cancel=lambda: self.status_label.config(text="导出已取消"),
+        ).start()
+
+    def export_world_stream(self):
+        """流式导出整个世界（区块、实体、level.dat），内存占用与世界大小无关"""
+        world_path = self.path_entry.get().strip()
+        if not world_path:
+            messagebox.showerror("错误", "请输入存档路径！")
+            return
+        if self.export_task is not None and not self.export_task.finished:
+            messagebox.showwarning("警告", "已有导出正在进行")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".ndjson.gz",
+            filetypes=[
+                ("NDJSON (gzip)", "*.ndjson.gz"),
+                ("NDJSON (zstd)", "*.ndjson.zst"),
+                ("NDJSON", "*.ndjson"),
+                ("JSON", "*.json"),
+            ],
+            title="导出整个世界"
+        )
+        if not file_path:
+            logger.info("用户取消了导出操作")
+            return
+        fmt = FORMAT_JSON if file_path.endswith((".json", ".json.gz", ".json.zst")) else FORMAT_NDJSON
+
+        def job(task):
+            stats = export_world(world_path, file_path, fmt,
+                                 progress=task.report, should_stop=lambda: task.cancelled)
+            task.check_cancelled()
+            return stats
+
+        def on_progress(stats):
+            self.status_label.config(
+                text=f"正在导出：{stats['records']} 条记录，"
+                     f"{stats['source_bytes'] / 1024 / 1024:.1f} MB（{stats['source_mb_per_s']:.1f} MB/s）")
+
+        def on_done(stats):
+            summary = (f"{stats['records']} 条记录，用时 {stats['seconds']:.1f} 秒，"
+                       f"读取 {stats['source_mb_per_s']:.1f} MB/s，写出 {stats['json_mb_per_s']:.1f} MB/s")
+            logger.info(f"世界已导出至 {file_path}：{summary}")
+            self.status_label.config(text=f"导出完成：{summary}")
+            self.cancel_load_btn.config(state='disabled')
+            messagebox.showinfo("成功", f"数据已保存至：{file_path}\n{summary}")
+
+        def on_error(e):
+            logger.error(f"导出世界时发生错误: {e}", exc_info=e)
+            self.status_label.config(text="")
+            self.cancel_load_btn.config(state='disabled')
+            messagebox.showerror("错误", f"导出世界时发生错误：{e}")
+
+        self.status_label.config(text=f"正在导出：{file_path}")
+        self.cancel_load_btn.config(state='normal')
+        self.export_task = BackgroundTask(
+            self.root, job, on_done=on_done, on_error=on_error, on_progress=on_progress,
+            on_cancel=lambda: self.status_label.config(text="导出已取消"), poll_ms=100,
+        ).start()
+
+    def open_dashboard(self):
+        """打开多存档总览窗口：发现根目录下所有存档并并发读取摘要"""
+        window = tk.Toplevel(self.root)
+        window.title("多存档总览")
+        window.geometry("1000x600")
+
+        top = tk.Frame(window, bg=STYLE['bg'])
+        root_entry = tk.Entry(top, bg=STYLE['entry_bg'], fg=STYLE['entry_fg'], font=("微软雅黑", 10))
+        status = tk.Label(top, text="", bg=STYLE['label_bg'], fg=STYLE['label_fg'], font=("微软雅黑", 10))
+
+        columns = {
+            "name": "世界名称",
+            "last_played": "最后游玩",
+            "size": "大小",
+            "game_mode": "游戏模式",
+            "difficulty": "难度",
+            "path": "路径",
+        }
+        table_frame = tk.Frame(window)
+        tree = ttk.Treeview(table_frame, columns=list(columns), show="headings")
+        scrollbar = tk.Scrollbar(table_frame, command=tree.yview)
+        tree.config(yscrollcommand=scrollbar.set)
+        rows = {}
+        sort_state = {"column": "last_played", "reverse": True}
+
+        def apply_sort():
+            # 按原始值排序（时间戳、字节数），而不是显示文本
+            column = sort_state["column"]
+            ordered = sorted(rows.items(), key=lambda kv: (kv[1].get(column) is None, kv[1].get(column, "")),
+                             reverse=sort_state["reverse"])
+            for index, (item_id, _summary) in enumerate(ordered):
+                tree.move(item_id, "", index)
+
+        def sort_by(column):
+            reverse = not sort_state["reverse"] if sort_state["column"] == column else False
+            sort_state.update(column=column, reverse=reverse)
+            apply_sort()
+
+        for key, title in columns.items():
+            tree.heading(key, text=title, command=lambda k=key: sort_by(k))
+            tree.column(key, width=260 if key == "path" else 130)
+
+        def add_row(summary):
+            if "error" in summary:
+                values = ("读取失败", "", "", "", summary["error"], summary["path"])
+            else:
+                values = (
+                    summary["name"],
+                    format_real_time(summary["last_played"]),
+                    format_size(summary["size"]),
+                    summary["game_mode"],
+                    summary["difficulty"],
+                    summary["path"],
+                )
+            rows[tree.insert("", END, values=values)] = summary
+
+        def open_selected(_event):
+            selection = tree.selection()
+            if selection:
+                self.path_entry.delete(0, tk.END)
+                self.path_entry.insert(0, rows[selection[0]]["path"])
+                self.load_world_info()
+
+        tree.bind("<Double-1>", open_selected)
+        scan_state = {"task": None}
+
+        def cancel_scan(_event=None):
+            task = scan_state["task"]
+            if task is not None and not task.finished:
+                task.cancel()
+
+        def scan():
+            root_path = root_entry.get().strip()
+            if not root_path or not os.path.isdir(root_path):
+                messagebox.showerror("错误", "请选择有效的存档根目录！", parent=window)
+                return
+            # 重新扫描时取消旧任务，以免旧结果混入新的表格
+            cancel_scan()
+            tree.delete(*tree.get_children())
+            rows.clear()
+            status.config(text="正在查找存档…")
+
+            def job(task):
+                worlds = discover_worlds(root_path)
+                task.report(("found", len(worlds)))
+                return load_summaries(worlds, cache=SummaryCache(), on_result=lambda s: task.report(("row", s)),
+                                      should_stop=lambda: task.cancelled)
+
+            def on_progress(message):
+                kind, payload = message
+                if kind == "found":
+                    status.config(text=f"找到 {payload} 个存档，正在读取…")
+                else:
+                    add_row(payload)
+
+            def on_done(results):
+                apply_sort()
+                status.config(text=f"共 {len(results)} 个存档")
+                logger.info(f"多存档总览已加载 {len(results)} 个存档: {root_path}")
+
+            def on_error(e):
+                logger.error(f"多存档总览加载失败: {e}", exc_info=e)
+                status.config(text="")
+                messagebox.showerror("错误", f"加载失败：{e}", parent=window)
+
+            scan_state["task"] = BackgroundTask(self.root, job, on_done=on_done, on_error=on_error,
+                                                on_progress=on_progress).start()
+
+        def browse():
+            path = filedialog.askdirectory(title="选择存档根目录（如 saves/ 或备份目录）", parent=window)
+            if path:
+                root_entry.delete(0, tk.END)
+                root_entry.insert(0, path)
+                scan()
+
+        tk.Label(top, text="根目录:", bg=STYLE['label_bg'], fg=STYLE['label_fg'],
+                 font=("微软雅黑", 10)).pack(side=tk.LEFT, padx=5)
+        root_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        window.bind("<Destroy>", cancel_scan, add="+")
+        tk.Button(top, text="扫描", command=scan, bg=STYLE['button_bg'], fg=STYLE['button_fg'],
+                  font=("微软雅黑", 10)).pack(side=tk.RIGHT, padx=5)
+        tk.Button(top, text="选择目录", command=browse, bg=STYLE['button_bg'], fg=STYLE['button_fg'],
+                  font=("微软雅黑", 10)).pack(side=tk.RIGHT, padx=5)
+        status.pack(side=tk.RIGHT, padx=5)
+        top.pack(fill=tk.X, pady=5)
+
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        # 默认使用当前存档路径的上一级目录（通常是 saves/）
+        current = self.path_entry.get().strip()
+        if current:
+            root_entry.insert(0, os.path.dirname(os.path.abspath(current)))
+
+    def open_performance_panel(self):
+        """性能面板：开启/关闭埋点，查看各区段耗时汇总，导出 Chrome Trace，调整日志级别"""
+        window = tk.Toplevel(self.root)
+        window.title("性能")
+        window.geometry("820x420")
+
+        top = tk.Frame(window, bg=STYLE['bg'])
+        enabled_var = tk.BooleanVar(value=profiling.is_enabled())
+        allocs_var = tk.BooleanVar(value=profiling.tracks_allocations())
+        level_var = tk.StringVar(value=logging.getLevelName(logging.getLogger().level))
+
+        columns = {
+            "name": "区段",
+            "count": "次数",
+            "total_ms": "总耗时 (ms)",
+            "mean_ms": "平均 (ms)",
+            "max_ms": "最长 (ms)",
+            "bytes": "字节数",
+            "allocs": "内存块净增",
+        }
+        table_frame = tk.Frame(window)
+        tree = ttk.Treeview(table_frame, columns=list(columns), show="headings")
+        scrollbar = tk.Scrollbar(table_frame, command=tree.yview)
+        tree.config(yscrollcommand=scrollbar.set)
+        for key, title in columns.items():
+            tree.heading(key, text=title)
+            tree.column(key, width=160 if key == "name" else 100, anchor="w" if key == "name" else "e")
+
+        cache_label = tk.Label(window, anchor="w", bg=STYLE['label_bg'], fg=STYLE['label_fg'], font=("微软雅黑", 10))
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            for entry in profiling.summary():
+                tree.insert("", END, values=(
+                    entry["name"], entry["count"], f"{entry['total_ms']:.2f}", f"{entry['mean_ms']:.3f}",
+                    f"{entry['max_ms']:.2f}", format_size(entry["bytes"]), entry["allocs"],
+                ))
+            stats = shared_cache().stats()
+            cache_label.config(text=(
+                f"区块缓存：{stats['entries']} 个区块，{format_size(stats['bytes'])} / {format_size(stats['budget'])}，"
+                f"命中 {stats['hits']}，未命中 {stats['misses']}（命中率 {stats['hit_rate']:.0%}），淘汰 {stats['evictions']}"
+            ))
+
+        def toggle():
+            if enabled_var.get():
+                profiling.enable(allocations=allocs_var.get())
+            else:
+                profiling.disable()
+            logger.info(f"性能埋点已{'开启' if enabled_var.get() else '关闭'}")
+
+        def clear():
+            profiling.reset()
+            refresh()
+
+        def export_trace():
+            path = filedialog.asksaveasfilename(
+                title="导出 Chrome Trace", defaultextension=".json",
+                filetypes=[("Chrome Trace", "*.json")], parent=window)
+            if not path:
+                return
+            try:
+                count = profiling.export_chrome_trace(path)
+            except OSError as e:
+                messagebox.showerror("错误", f"导出失败：{e}", parent=window)
+                return
+            logger.info(f"已导出 {count} 个区段到 {path}")
+            messagebox.showinfo("成功", f"已导出 {count} 个区段\n可在 chrome://tracing 或 ui.perfetto.dev 中打开",
+                                parent=window)
+
+        def set_level(level):
+            logging.getLogger().setLevel(getattr(logging, level))
+            logger.warning(f"日志级别已调整为 {level}")
+
+        tk.Checkbutton(top, text="启用性能埋点", variable=enabled_var, command=toggle,
+                       bg=STYLE['bg'], fg=STYLE['fg'], font=("微软雅黑", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Checkbutton(top, text="统计内存分配（较慢）", variable=allocs_var, command=toggle,
+                       bg=STYLE['bg'], fg=STYLE['fg'], font=("微软雅黑", 10)).pack(side=tk.LEFT, padx=5)
+        tk.Label(top, text="日志级别:", bg=STYLE['label_bg'], fg=STYLE['label_fg'],
+                 font=("微软雅黑", 10)).pack(side=tk.LEFT, padx=5)
+        tk.OptionMenu(top, level_var, *LOG_LEVELS, command=set_level).pack(side=tk.LEFT, padx=5)
+        for text, command in (("导出 Chrome Trace", export_trace), ("清空", clear), ("刷新", refresh)):
+            tk.Button(top, text=text, command=command, bg=STYLE['button_bg'], fg=STYLE['button_fg'],
+                      font=("微软雅黑", 10)).pack(side=tk.RIGHT, padx=5)
+        top.pack(fill=tk.X, pady=5)
+        cache_label.pack(fill=tk.X, padx=5)
+
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        refresh()
+
+    def open_map_view(self):
+        """打开俯视地图：瓦片在进程池中渲染，渲染完成一个显示一个，可缩放和拖动"""
+        world_path = self.path_entry.get().strip()
+        if not world_path:
+            messagebox.showerror("错误", "请输入存档路径！")
+            return
+        renderer = MapRenderer(world_path)
+        if not renderer.region_files:
+            messagebox.showerror("错误", "找不到区域文件！")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(f"地图 - {world_path}")
+        window.geometry("1000x800")
+        status = tk.Label(window, text="正在渲染地图…", anchor="w", bg=STYLE['label_bg'], fg=STYLE['label_fg'],
+                          font=("微软雅黑", 10))
+        status.pack(fill=tk.X)
+        canvas = tk.Canvas(window, bg="black", highlightthickness=0)
+        canvas.pack(fill=tk.BOTH, expand=True)
+
+        # 缩放级别：负数为缩小倍数（subsample），正数为放大倍数（zoom）
+        zoom_levels = [-8, -4, -2, 1, 2, 4]
+        state = {"zoom": 3, "rendered": 0, "tiles": 0, "failed": 0}
+        base_images = {}
+        shown_images = {}
+
+        def scale():
+            level = zoom_levels[state["zoom"]]
+            return 1 / -level if level < 0 else level
+
+        def place_tile(coords):
+            level = zoom_levels[state["zoom"]]
+            image = base_images[coords]
+            shown = image.subsample(-level) if level < 0 else image.zoom(level) if level > 1 else image
+            shown_images[coords] = shown
+            size = TILE_SIZE * scale()
+            canvas.delete(f"tile_{coords[0]}_{coords[1]}")
+            canvas.create_image(coords[0] * size, coords[1] * size, image=shown, anchor="nw",
+                                tags=("tile", f"tile_{coords[0]}_{coords[1]}"))
+
+        def set_zoom(delta, event=None):
+            new_zoom = min(max(state["zoom"] + delta, 0), len(zoom_levels) - 1)
+            if new_zoom == state["zoom"]:
+                return
+            # 以鼠标位置（或窗口中心）为缩放中心
+            ex = event.x if event else canvas.winfo_width() // 2
+            ey = event.y if event else canvas.winfo_height() // 2
+            cx, cy = canvas.canvasx(ex), canvas.canvasy(ey)
+            old_scale = scale()
+            state["zoom"] = new_zoom
+            for coords in base_images:
+                place_tile(coords)
+            ratio = scale() / old_scale
+            x0, y0, x1, y1 = canvas.bbox("all")
+            canvas.config(scrollregion=(x0, y0, x1, y1))
+            canvas.xview_moveto((cx * ratio - ex - x0) / max(x1 - x0, 1))
+            canvas.yview_moveto((cy * ratio - ey - y0) / max(y1 - y0, 1))
+
+        loader = DimensionLoader(world_path, OVERWORLD, "")
+
+        def on_click(event):
+            x = int(canvas.canvasx(event.x) / scale() // 1)
+            z = int(canvas.canvasy(event.y) / scale() // 1)
+            text = f"方块坐标: X={x}, Z={z} | 区块: {x >> 4}, {z >> 4}"
+            try:
+                # 解码后的区块经过共享缓存，反复点击同一区域不会重复解码
+                chunk = loader.decoded_chunk(x >> 4, z >> 4)
+                top_block = chunk.top_block(x, z) if chunk is not None else None
+            except Exception as e:
+                logger.error(f"读取区块失败: {e}")
+                top_block = None
+            if top_block is not None:
+                text += f" | 最高方块: {top_block[1]} (Y={top_block[0]})"
+            status.config(text=text)
+
+        canvas.bind("<ButtonPress-1>", lambda e: (canvas.scan_mark(e.x, e.y), on_click(e)))
+        canvas.bind("<B1-Motion>", lambda e: canvas.scan_dragto(e.x, e.y, gain=1))
+        canvas.bind("<MouseWheel>", lambda e: set_zoom(1 if e.delta > 0 else -1, e))
+        canvas.bind("<Button-4>", lambda e: set_zoom(1, e))
+        canvas.bind("<Button-5>", lambda e: set_zoom(-1, e))
+
+        def job(task):
+            for tile in renderer.iter_tiles(should_stop=lambda: task.cancelled):
+                task.report(tile)
+
+        def on_progress(tile):
+            state["tiles"] += 1
+            if tile.get("error"):
+                # 单个区域渲染失败时跳过该瓦片，其余区域继续显示
+                state["failed"] += 1
+                logger.warning(f"区域 {tile['coords']} 渲染失败: {tile['error']}")
+                return
+            state["rendered"] += tile["rendered"]
+            with span(SPAN_RENDER, tile=tile["coords"]) as s:
+                base_images[tile["coords"]] = tk.PhotoImage(file=tile["png"])
+                place_tile(tile["coords"])
+                s.add_bytes(os.path.getsize(tile["png"]))
+            if len(base_images) == 1:
+                # 第一个瓦片出现时把视图移到它的位置
+                canvas.config(scrollregion=canvas.bbox("all"))
+            status.config(text=f"渲染进度: {state['tiles']}/{len(renderer.region_files)} 区域，"
+                               f"重新渲染 {state['rendered']} 个区块")
+
+        def on_done(_result):
+            canvas.config(scrollregion=canvas.bbox("all"))
+            failed = f"，{state['failed']} 个区域渲染失败" if state["failed"] else ""
+            status.config(text=f"地图渲染完成：{state['tiles']} 个区域，重新渲染 {state['rendered']} 个区块{failed}"
+                               f"（滚轮缩放，拖动平移，单击查看坐标）")
+            logger.info(f"地图渲染完成: {world_path}，重新渲染 {state['rendered']} 个区块")
+
+        def on_error(e):
+            logger.error(f"地图渲染失败: {e}", exc_info=e)
+            status.config(text=f"地图渲染失败：{e}")
+
+        task = BackgroundTask(self.root, job, on_done=on_done, on_error=on_error, on_progress=on_progress,
+                              poll_ms=100).start()
+        window.bind("<Destroy>", lambda _e: (task.cancel(), loader.close()), add="+")
+
+
+def format_size(num_bytes):
+    """字节数转为易读的大小"""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def parse_item_query(text):
+    """解析物品搜索条件：单独的词为物品 ID，另支持 enchant= / level= / name="""
+    query = {}
+    keys = {"id": "item_id", "enchant": "enchantment", "level": "min_level", "name": "name"}
+    for token in text.replace(",", " ").split():
+        key, sep, value = token.partition("=")
+        if not sep:
+            key, value = "id", token
+        if key in keys and value:
+            if key == "level" and not value.isdigit():
+                continue
+            query[keys[key]] = int(value) if key == "level" else value
+    return query
+
+
+def load_world_job(task, world_path):
+    """工作线程：读取世界信息并构建显示文本
+
+    存档目录的索引中 level.dat 摘要仍然有效时直接使用索引，不再解析 level.dat；
+    否则读取 level.dat，并把摘要写回索引。索引只是缓存：无法打开或读写时直接读取 level.dat。
+    """
+    index = None
+    if os.path.isfile(os.path.join(world_path, "level.dat")):
+        # 压缩包备份或路径有误时不建立索引（出错时由调用方提示）
+        try:
+            index = WorldIndex(world_path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"无法打开存档索引，直接读取 level.dat: {e}")
+    try:
+        summary, chunks, entities = None, 0, 0
+        if index is not None:
+            try:
+                summary = index.fresh_summary()
+                chunks, entities = index.chunk_count(), index.entity_total()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"读取存档索引失败，直接读取 level.dat: {e}")
+                index.close()
+                index = None
+        if summary is not None:
+            task.report("正在读取存档索引…")
+            result = summary_state(summary)
+        else:
+            saver, result = parse_world_job(task, world_path)
+            if index is not None:
+                try:
+                    index.refresh_level_dat(saver)
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning(f"更新存档索引摘要失败: {e}")
+        if chunks:
+            result["output"] += f"\n📇 存档索引（上次更新索引时）：区块 {chunks}，实体 {entities}\n"
+    finally:
+        if index is not None:
+            index.close()
+    result["dimensions"] = world_dimensions(world_path)
+    task.check_cancelled()
+    return result
+
+
+def world_dimensions(world_path):
+    """存档中有数据的全部维度：{维度 ID: 显示名称}（只列目录，不打开区域文件）"""
+    return {dimension: dimension_label(dimension)
+            for dimension in discover_dimensions(world_path, open_world_fs(world_path))}
+
+
+def parse_world_job(task, world_path):
+    """工作线程：读取 level.dat、转换 NBT 并构建显示文本，返回 (MinecraftSaver, 显示状态)"""
+    task.report("正在读取 level.dat…")
+    saver = MinecraftSaver(world_path)
+    task.check_cancelled()
+    task.report("正在转换 NBT 数据…")
+    result = world_state(saver)
+    task.check_cancelled()
+    return saver, result
+
+
+def summary_state(summary):
+    """由索引中的世界摘要（已转换为原生类型）构建显示状态"""
+    with span(SPAN_FORMAT):
+        output = build_world_output(summary["world_info"], summary["player_pos"],
+                                    summary["dimension"], summary["inventory"])
+    return {**summary, "output": output}
+
+
+def world_state(saver):
+    """从已读取的 level.dat 中取出显示所需的字段并构建显示文本"""
+    world_info = saver.get_world_info()
+    player_pos = saver.get_player_position()
+    dimension = saver.get_dimension()
+    inventory = saver.get_player_inventory()
+    converted = [nbt_to_primitive(v) for v in (world_info, player_pos, dimension, inventory)]
+    with span(SPAN_FORMAT):
+        output = build_world_output(*converted)
+    return {
+        "world_info": world_info,
+        "player_pos": player_pos,
+        "dimension": dimension,
+        "inventory": inventory,
+        "output": output,
+    }
+
+
+def build_world_output(world_info, player_pos, dimension_info, inventory_info):
+    """构建世界信息的显示文本"""
+    output = f"✨ 世界名称：{world_info.get('世界名称', '未知')}\n"
+    output += "🌍 世界信息：\n"
+    output += f"  游戏模式：{world_info.get('游戏模式', '未知')}\n"
+    output += f"  出生点坐标：X={world_info['出生点']['x']}, Y={world_info['出生点']['y']}, Z={world_info['出生点']['z']}\n"
+    output += f"  世界时间：{format_minecraft_time(world_info.get('世界时间', 0))}（游戏内）\n"
+    output += f"  最后保存时间：{format_real_time(world_info.get('最后保存时间', 0))}\n"
+    output += f"  世界难度：{world_info.get('世界难度', '未知')}\n"
+    output += f"🎮 所在维度：{dimension_info}\n"
+    output += "游戏角色坐标：\n"
+    output += f"  X={player_pos['x']:.2f}, Y={player_pos['y']:.2f}, Z={player_pos['z']:.2f}\n"
+
+    # 显示背包信息
+    output += "\n🎒 玩家背包信息：\n"
+    if inventory_info:
+        for item in inventory_info:
+            slot = item.get('槽位', -1)
+            name = item.get('物品ID', '未知').replace('minecraft:', '')
+            count = item.get('数量') + 1
+            nbt = item.get('NBT')
+            formatted_nbt = format_nbt(nbt) if nbt else "无 NBT 数据"
+            output += f"  槽位 {slot}: {name} ×{count}\n     └─ NBT: {formatted_nbt}\n"
+    else:
+        output += "  您的物品栏无内容\n"
+    return output
+
 def format_minecraft_time(tick):
     """将 tick 转换为游戏时间"""
-    logger.debug(f"转换世界时间: {tick}")
     try:
         tick = int(tick)
         days = tick // 24000
         remaining = tick % 24000
         hours = remaining // 1000
         minutes = (remaining % 1000) * 60 // 1000
-        logger.info(f"世界时间转换结果: {days} 天 {hours} 小时 {minutes} 分钟")
         return f"{days} 天 {hours} 小时 {minutes} 分钟"
     except Exception as e:
         logger.error(f"世界时间转换失败: {e}")
@@ -483,11 +1642,9 @@ def format_minecraft_time(tick):
 
 def format_real_time(timestamp_ms):
     """将毫秒时间戳转换为现实时间"""
-    logger.debug(f"转换现实时间: {timestamp_ms}")
     try:
         timestamp = int(timestamp_ms) / 1000
         dt = datetime.fromtimestamp(timestamp, tz=timezone.utc)
-        logger.info(f"现实时间转换结果: {dt.strftime('%Y-%m-%d %H:%M:%S')} UTC")
         return dt.strftime("%Y-%m-%d %H:%M:%S") + " UTC"
     except Exception as e:
         logger.error(f"现实时间转换失败: {e}")
@@ -495,7 +1652,6 @@ def format_real_time(timestamp_ms):
 
 def roman_numeral(num):
     """将数字转为罗马数字"""
-    logger.debug(f"开始转换罗马数字: {num}")
     val = [(1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'),
            (100, 'C'), (90, 'XC'), (50, 'L'), (40, 'XL'),
            (10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I')]
@@ -505,32 +1661,10 @@ def roman_numeral(num):
         while num >= value:
             res += symbol
             num -= value
-    logger.info(f"罗马数字转换结果: {res or 'I'}")
     return res or 'I'
 
-def nbt_to_primitive(nbt_data, max_depth=32):
-    """安全将 NBT 数据转换为 Python 原生类型"""
-    logger.debug(f"转换 NBT 数据: {repr(nbt_data)}")
-    if max_depth <= 0:
-        logger.warning("NBT 转换超出最大递归深度")
-        return "..."
-    if isinstance(nbt_data, (int, float, str)):
-        return nbt_data
-    elif hasattr(nbt_data, 'py_data'):
-        return nbt_to_primitive(nbt_data.py_data, max_depth - 1)
-    elif isinstance(nbt_data, dict):
-        return {
-            nbt_to_primitive(k, max_depth - 1): nbt_to_primitive(v, max_depth - 1)
-            for k, v in nbt_data.items()
-        }
-    elif hasattr(nbt_data, '__iter__') and not isinstance(nbt_data, (str, bytes)):
-        return [nbt_to_primitive(item, max_depth - 1) for item in nbt_data]
-    else:
-        return repr(nbt_data)
-
 def format_nbt(nbt_data):
     """格式化显示 NBT 中的常用字段（如附魔）"""
-    logger.debug(f"开始处理 NBT 数据: {nbt_data}")
     if not isinstance(nbt_data, dict):
         return "无 NBT 数据"
 
@@ -599,6 +1733,8 @@ def format_nbt(nbt_data):
     return " | ".join(result) if result else "无 NBT 数据"
 
 if __name__ == "__main__":
+    # 打包为可执行文件后，进程池的子进程需要此调用
+    multiprocessing.freeze_support()
     root = tk.Tk()
     icon_path = os.path.join(os.path.dirname(sys.argv[0]), "icons", "mc_icon.ico")
     if os.path.exists(icon_path):
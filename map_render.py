@@ -0,0 +1,225 @@
+# map_render.py
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from blockstates import chunk_heightmap, chunk_min_y, iter_block_sections, unpack_indices
+from region import RegionFile, list_region_files, region_coords
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".minecraft_archive_viewer", "cache", "map")
+TILE_CHUNKS = 32
+TILE_SIZE = TILE_CHUNKS * 16
+RENDER_VERSION = 1
+
+_CHUNK_PATHS = ("DataVersion", "yPos", "sections", "Heightmaps", "Level.Sections", "Level.Heightmaps")
+
+# 常见方块的俯视颜色，未列出的方块按名称生成稳定的颜色
+BLOCK_COLORS = {
+    "minecraft:air": (0, 0, 0),
+    "minecraft:grass_block": (110, 160, 70),
+    "minecraft:dirt": (134, 96, 67),
+    "minecraft:coarse_dirt": (119, 85, 59),
+    "minecraft:podzol": (91, 63, 24),
+    "minecraft:stone": (125, 125, 125),
+    "minecraft:deepslate": (80, 80, 82),
+    "minecraft:andesite": (136, 136, 136),
+    "minecraft:diorite": (188, 188, 188),
+    "minecraft:granite": (149, 103, 85),
+    "minecraft:gravel": (131, 127, 126),
+    "minecraft:sand": (219, 207, 163),
+    "minecraft:red_sand": (190, 102, 33),
+    "minecraft:sandstone": (216, 203, 155),
+    "minecraft:water": (52, 90, 180),
+    "minecraft:lava": (207, 92, 20),
+    "minecraft:ice": (145, 183, 253),
+    "minecraft:packed_ice": (141, 180, 250),
+    "minecraft:snow": (249, 254, 254),
+    "minecraft:snow_block": (249, 254, 254),
+    "minecraft:clay": (160, 166, 179),
+    "minecraft:oak_leaves": (60, 110, 40),
+    "minecraft:spruce_leaves": (50, 90, 50),
+    "minecraft:birch_leaves": (80, 120, 55),
+    "minecraft:jungle_leaves": (48, 120, 30),
+    "minecraft:acacia_leaves": (75, 115, 35),
+    "minecraft:dark_oak_leaves": (45, 95, 30),
+    "minecraft:mangrove_leaves": (60, 110, 40),
+    "minecraft:oak_log": (109, 85, 50),
+    "minecraft:spruce_log": (58, 37, 16),
+    "minecraft:birch_log": (216, 215, 210),
+    "minecraft:short_grass": (110, 160, 70),
+    "minecraft:grass": (110, 160, 70),
+    "minecraft:tall_grass": (110, 160, 70),
+    "minecraft:seagrass": (52, 90, 180),
+    "minecraft:kelp": (52, 90, 180),
+    "minecraft:netherrack": (97, 38, 38),
+    "minecraft:soul_sand": (81, 62, 50),
+    "minecraft:basalt": (73, 72, 77),
+    "minecraft:blackstone": (42, 35, 40),
+    "minecraft:bedrock": (85, 85, 85),
+    "minecraft:end_stone": (219, 222, 158),
+    "minecraft:obsidian": (15, 10, 24),
+    "minecraft:terracotta": (152, 94, 67),
+    "minecraft:mycelium": (111, 99, 105),
+    "minecraft:cobblestone": (127, 127, 127),
+    "minecraft:oak_planks": (162, 130, 78),
+    "minecraft:farmland": (143, 102, 70),
+}
+
+
+def block_color(name):
+    """方块的俯视颜色 (R, G, B)"""
+    color = BLOCK_COLORS.get(name)
+    if color is None:
+        digest = hashlib.md5(name.encode("utf-8")).digest()
+        color = tuple(64 + b % 160 for b in digest[:3])
+        BLOCK_COLORS[name] = color
+    return color
+
+
+def render_chunk(chunk):
+    """计算区块每一列最高方块的颜色，返回 (16, 16, 3) 的 uint8 数组（行为 Z，列为 X）"""
+    image = np.zeros((16, 16, 3), dtype=np.uint8)
+    top_y = chunk_heightmap(chunk)
+    if top_y is None:
+        return image
+    sections = {y: (names, data, spanning) for y, names, data, spanning in iter_block_sections(chunk)}
+    section_y = top_y >> 4
+    zs, xs = np.indices((16, 16))
+    for sy in np.unique(section_y).tolist():
+        if sy not in sections:
+            continue
+        names, data, spanning = sections[sy]
+        indices = unpack_indices(data, len(names), spanning)
+        mask = section_y == sy
+        # 分段内索引顺序为 (y * 16 + z) * 16 + x
+        positions = ((top_y[mask] & 15) * 16 + zs[mask]) * 16 + xs[mask]
+        palette_colors = np.array([block_color(name) for name in names], dtype=np.uint8)
+        image[mask] = palette_colors[indices[positions]]
+
+    # 按与北侧相邻方块的高度差做简单明暗处理，便于分辨地形
+    north = np.vstack([top_y[:1], top_y[:-1]])
+    shade = np.clip(1.0 + (top_y - north) * 0.08, 0.75, 1.25)
+    return np.clip(image * shade[:, :, None], 0, 255).astype(np.uint8)
+
+
+def write_png(path, rgb):
+    """把 (H, W, 3) 的 uint8 数组写为 PNG（无需额外图像库）"""
+    height, width, _ = rgb.shape
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    png = b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) + \
+        chunk(b"IEND", b"")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(png)
+    os.replace(tmp_path, path)
+
+
+def _tile_paths(cache_dir, rx, rz):
+    base = os.path.join(cache_dir, f"r.{rx}.{rz}")
+    return base + ".png", base + ".npy", base + ".json"
+
+
+def render_region_tile(region_path, cache_dir):
+    """渲染单个区域的 512x512 瓦片（在子进程中运行）
+
+    瓦片像素与各区块时间戳缓存在磁盘上，只有时间戳变化的区块会被重新渲染。
+    返回 {"coords", "png", "rendered", "chunks"}。
+    """
+    with RegionFile(region_path) as region:
+        rx, rz = region.coords
+        png_path, pixels_path, meta_path = _tile_paths(cache_dir, rx, rz)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            pixels = np.load(pixels_path)
+            if meta.get("version") != RENDER_VERSION:
+                raise ValueError("瓦片缓存版本不一致")
+            stamps = {int(k): v for k, v in meta["timestamps"].items()}
+        except (OSError, ValueError, KeyError):
+            pixels = np.zeros((TILE_SIZE, TILE_SIZE, 3), dtype=np.uint8)
+            stamps = {}
+
+        rendered = 0
+        current = {}
+        have_png = os.path.exists(png_path)
+        for x, z in region.iter_chunks():
+            index = RegionFile.index(x, z)
+            timestamp = region.chunk_timestamp(x, z)
+            current[index] = timestamp
+            if have_png and stamps.get(index) == timestamp:
+                continue
+            try:
+                chunk = region.read_chunk_tags(x, z, _CHUNK_PATHS) or {}
+                tile = render_chunk(chunk)
+            except Exception:
+                tile = np.zeros((16, 16, 3), dtype=np.uint8)
+            pixels[z * 16:z * 16 + 16, x * 16:x * 16 + 16] = tile
+            rendered += 1
+        # 已被删除的区块清空为黑色
+        for index in set(stamps) - set(current):
+            x, z = index & 31, index >> 5
+            pixels[z * 16:z * 16 + 16, x * 16:x * 16 + 16] = 0
+            rendered += 1
+
+    if rendered or not os.path.exists(png_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        write_png(png_path, pixels)
+        np.save(pixels_path, pixels)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"version": RENDER_VERSION, "timestamps": current}, f)
+    return {"coords": (rx, rz), "png": png_path, "rendered": rendered, "chunks": len(current)}
+
+
+def tile_cache_dir(world_path, dimension="region"):
+    world_path = os.path.abspath(world_path)
+    digest = hashlib.sha1(world_path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"{os.path.basename(world_path) or 'world'}-{digest}", dimension.replace("/", "_"))
+
+
+class MapRenderer:
+    """在进程池中按区域渲染俯视地图瓦片，每完成一个瓦片产出一次结果
+
+    单个区域渲染失败时产出带 "error" 的瓦片（png 为 None），其余区域照常渲染。
+    """
+
+    def __init__(self, world_path, region_dir="region", cache_dir=None, max_workers=None):
+        self.world_path = world_path
+        self.region_files = list_region_files(os.path.join(world_path, region_dir))
+        self.cache_dir = cache_dir or tile_cache_dir(world_path, region_dir)
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def iter_tiles(self, should_stop=None):
+        if not self.region_files:
+            return
+        pending = iter(self.region_files)
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+            while True:
+                while len(in_flight) < self.max_workers * 2 and not (should_stop and should_stop()):
+                    path = next(pending, None)
+                    if path is None:
+                        break
+                    in_flight[executor.submit(render_region_tile, path, self.cache_dir)] = path
+                if not in_flight:
+                    return
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    path = in_flight.pop(future)
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield {"coords": region_coords(path), "png": None, "rendered": 0, "chunks": 0,
+                               "error": f"{type(e).__name__}: {e}"}
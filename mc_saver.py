@@ -1,56 +1,233 @@
 # mc_saver.py
 
+import array
+import io
+import logging
 import os
-from tkinter import messagebox
-import nbtlib
+import sys
 
+from dimensions import (
+    DIMENSION_LABELS, OVERWORLD, DimensionRegistry, dimension_label, discover_dimensions, normalize_dimension,
+)
+from items import flatten_items, nested_items
+from nbt_stream import read_nbt_paths
+from profiling import SPAN_CONVERT, SPAN_LEVEL_DAT, span
+from vfs import open_world_fs
 
-def nbt_to_primitive(nbt_data, max_depth=32):
-    """安全将 NBT 数据转换为 Python 原生类型"""
-    if max_depth <= 0:
-        return "..."
-    if isinstance(nbt_data, (int, float, str)):
-        return nbt_data
-    elif hasattr(nbt_data, 'py_data'):
-        return nbt_to_primitive(nbt_data.py_data, max_depth - 1)
-    elif isinstance(nbt_data, dict):
-        return {
-            nbt_to_primitive(k, max_depth - 1): nbt_to_primitive(v, max_depth - 1)
-            for k, v in nbt_data.items()
-        }
-    elif hasattr(nbt_data, '__iter__') and not isinstance(nbt_data, (str, bytes)):
-        return [nbt_to_primitive(item, max_depth - 1) for item in nbt_data]
+
+logger = logging.getLogger("Vanction Minecraft Archive Viewer")
+
+# ===== NBT -> Python 原生类型转换 =====
+# 按类型分派的转换方式；nbtlib 的标签类在 nbtlib 被导入后登记
+_SCALAR, _DICT, _LIST, _ARRAY, _UNWRAP, _REPR = range(6)
+
+_KINDS = {
+    int: (_SCALAR, None),
+    float: (_SCALAR, None),
+    str: (_SCALAR, None),
+    bool: (_SCALAR, None),
+    type(None): (_SCALAR, None),
+    dict: (_DICT, None),
+    list: (_LIST, None),
+    tuple: (_LIST, None),
+    bytes: (_ARRAY, memoryview),
+    bytearray: (_ARRAY, memoryview),
+    array.array: (_ARRAY, memoryview),
+}
+_nbtlib_registered = False
+
+
+def _register_nbtlib():
+    """登记 nbtlib 标签类：数值/字符串拆为内置类型，数组转为零拷贝的 NumPy 视图"""
+    global _nbtlib_registered
+    import numpy as np
+    from nbtlib import tag
+    for cls in (tag.Byte, tag.Short, tag.Int, tag.Long):
+        _KINDS[cls] = (_SCALAR, int)
+    for cls in (tag.Float, tag.Double):
+        _KINDS[cls] = (_SCALAR, float)
+    _KINDS[tag.String] = (_SCALAR, str)
+    _KINDS[tag.Compound] = (_DICT, None)
+    _KINDS[tag.List] = (_LIST, None)
+    for cls in (tag.ByteArray, tag.IntArray, tag.LongArray, np.ndarray):
+        _KINDS[cls] = (_ARRAY, np.asarray)
+    _nbtlib_registered = True
+
+
+def _classify(cls):
+    """未登记的类型按 MRO 找到最近的已登记基类，并缓存结果"""
+    if hasattr(cls, "py_data"):
+        kind = (_UNWRAP, None)
     else:
-        return repr(nbt_data)
+        kind = next((_KINDS[base] for base in cls.__mro__[1:] if base in _KINDS), None)
+        if kind is None:
+            kind = (_LIST, None) if hasattr(cls, "__iter__") else (_REPR, None)
+    _KINDS[cls] = kind
+    return kind
+
+
+def nbt_to_primitive(nbt_data, max_depth=32):
+    """安全将 NBT 数据转换为 Python 原生类型
+
+    使用显式栈代替递归；ByteArray/IntArray/LongArray 等数组转换为
+    零拷贝的 memoryview / NumPy 视图（导出 JSON 时用 nbt_json_default 处理）。
+    """
+    with span(SPAN_CONVERT):
+        return _convert(nbt_data, max_depth)
+
+
+def _convert(nbt_data, max_depth):
+    if not _nbtlib_registered and "nbtlib" in sys.modules:
+        _register_nbtlib()
+    kinds = _KINDS
+    root = [None]
+    stack = [(nbt_data, root, 0, max_depth)]
+    nodes = 0
+    while stack:
+        value, parent, key, depth = stack.pop()
+        nodes += 1
+        if depth <= 0:
+            parent[key] = "..."
+            continue
+        cls = type(value)
+        kind, convert = kinds.get(cls) or _classify(cls)
+        if kind == _SCALAR:
+            parent[key] = convert(value) if convert else value
+        elif kind == _DICT:
+            # 先按原顺序占位，子节点出栈后原地填充
+            result = dict.fromkeys(value)
+            parent[key] = result
+            stack.extend((v, result, k, depth - 1) for k, v in value.items())
+        elif kind == _LIST:
+            items = value if isinstance(value, (list, tuple)) else list(value)
+            result = [None] * len(items)
+            parent[key] = result
+            stack.extend((v, result, i, depth - 1) for i, v in enumerate(items))
+        elif kind == _ARRAY:
+            parent[key] = convert(value)
+        elif kind == _UNWRAP:
+            stack.append((value.py_data, parent, key, depth - 1))
+        else:
+            parent[key] = repr(value)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("NBT 转换完成，共 %d 个节点", nodes)
+    return root[0]
+
+
+def nbt_json_default(obj):
+    """json.dump 的 default 钩子：把数组视图转换为列表"""
+    if isinstance(obj, memoryview):
+        return obj.tolist()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"无法序列化为 JSON: {type(obj).__name__}")
+
+
+# 各字段（get_world_info / get_player_*）实际用到的 level.dat 标签路径
+FIELD_PATHS = {
+    "world_info": (
+        "Data.LevelName",
+        "Data.SpawnX",
+        "Data.SpawnY",
+        "Data.SpawnZ",
+        "Data.Time",
+        "Data.LastPlayed",
+        "Data.Difficulty",
+        "Data.Player.playerGameType",
+    ),
+    "player_pos": ("Data.Player.Pos",),
+    "dimension": ("Data.Player.Dimension",),
+    "inventory": ("Data.Player.Inventory",),
+    "ender_chest": ("Data.Player.EnderItems",),
+}
+LEVEL_DAT_PATHS = tuple(path for paths in FIELD_PATHS.values() for path in paths)
 
 
 class MinecraftSaver:
-    def __init__(self, world_path):
+    def __init__(self, world_path, fields=None):
+            """fields 为 FIELD_PATHS 中的字段名列表，只读取这些字段需要的标签
+
+            world_path 可以是存档目录，也可以是 .zip/.tar.gz 备份（不解压整个压缩包）
+            """
             self.world_path = world_path
-            self.level_dat = self._load_level_dat()
+            self.fs = open_world_fs(world_path)
+            self.level_path = os.path.join(self.world_path, "level.dat")
+            self._dimensions = None
+            paths = LEVEL_DAT_PATHS if fields is None else [p for f in fields for p in FIELD_PATHS[f]]
+            with span(SPAN_LEVEL_DAT, path=self.level_path) as s:
+                self.tags = read_nbt_paths(self.fs.open("level.dat"), paths)
+                s.add_bytes(self.fs.getsize("level.dat"))
+            self._level_dat = None
+
+    @property
+    def level_dat(self):
+        """完整的 level.dat（nbtlib 对象树），仅在首次访问时加载"""
+        if self._level_dat is None:
+            self._level_dat = self._load_level_dat()
+        return self._level_dat
+
     def _load_level_dat(self):
-            level_path = os.path.join(self.world_path, "level.dat")
-            return nbtlib.load(level_path)
+            import gzip
+            import nbtlib
+            with self.fs.open("level.dat") as f:
+                data = f.read()
+            if data[:2] == b"\x1f\x8b":
+                data = gzip.decompress(data)
+            return nbtlib.File.from_fileobj(io.BytesIO(data))
+
+    def _tag(self, path, default=None):
+        return self.tags.get(path, default)
+
+    def get_region_files(self, kind="region", dimension=OVERWORLD):
+        """列出某维度的区域文件（kind 可为 region / entities / poi），返回值可传给 open_region"""
+        if normalize_dimension(dimension) == OVERWORLD:
+            return self.fs.list_region_files(kind)
+        return self.get_dimension_loader(dimension).region_files(kind)
+
+    def get_chunk(self, cx, cz, dimension=OVERWORLD):
+        """按全局区块坐标读取解码后的区块（DecodedChunk），经过共享的区块缓存"""
+        return self.get_dimension_loader(dimension).decoded_chunk(cx, cz)
+
+    def get_dimension_loader(self, dimension):
+        """某维度的按需加载器；维度注册表在首次使用时才创建"""
+        if self._dimensions is None:
+            self._dimensions = DimensionRegistry(self.world_path, fs=self.fs)
+        return self._dimensions.get(dimension)
+
+    def open_region(self, path):
+        """以内存映射方式打开区域文件（压缩包中则映射或解压对应成员），区块按需解压"""
+        return self.fs.open_region(path)
+
+    def get_player_files(self):
+        """playerdata/ 中各玩家的 UUID"""
+        return [name[:-4] for name in self.fs.listdir("playerdata") if name.endswith(".dat")]
+
+    def get_player_data(self, uuid):
+        """读取单个玩家的 playerdata（坐标、维度、背包等，格式同 players.parse_playerdata）"""
+        # players 依赖 NumPy，只在读取玩家数据时导入
+        from players import parse_playerdata
+
+        with self.fs.open(f"playerdata/{uuid}.dat") as f:
+            return parse_playerdata(f)
 
     def get_world_info(self):
-        data = self.level_dat['Data']
-        player = data.get('Player', {})
+        player = {"playerGameType": self._tag("Data.Player.playerGameType", 0)}
         return {
-            "世界名称": str(data.get('LevelName', "未知")),
+            "世界名称": str(self._tag("Data.LevelName", "未知")),
             "游戏模式": self.get_game_mode(player),
             "出生点": {
-                "x": int(data.get('SpawnX', 0)),
-                "y": int(data.get('SpawnY', 0)),
-                "z": int(data.get('SpawnZ', 0))
+                "x": int(self._tag("Data.SpawnX", 0)),
+                "y": int(self._tag("Data.SpawnY", 0)),
+                "z": int(self._tag("Data.SpawnZ", 0))
             },
-            "世界时间": int(data.get('Time', 0)),
-            "最后保存时间": int(data.get('LastPlayed', 0)),
-            "世界难度": self.get_difficulty(data)
+            "世界时间": int(self._tag("Data.Time", 0)),
+            "最后保存时间": int(self._tag("Data.LastPlayed", 0)),
+            "世界难度": self.get_difficulty({"Difficulty": self._tag("Data.Difficulty", 0)})
         }
 
     def get_player_position(self):
         try:
-            pos = self.level_dat['Data']['Player']['Pos']
+            pos = self.tags['Data.Player.Pos']
             return {
                 "x": float(pos[0]),
                 "y": float(pos[1]),
@@ -61,23 +238,30 @@ class MinecraftSaver:
 
     def get_dimension(self):
         try:
-            dimension = self.level_dat['Data']['Player'].get('Dimension', 'minecraft:overworld')
-            dimension_map = {
-                'minecraft:overworld': '主世界',
-                'overworld': '主世界',
-                'minecraft:the_nether': '下界',
-                'nether': '下界',
-                'minecraft:the_end': '末地',
-                'end': '末地'
-            }
-            return dimension_map.get(str(dimension), f"未知维度({dimension})")
+            dimension = self._tag('Data.Player.Dimension')
+            if dimension is None:
+                return "无法读取维度"
+            if normalize_dimension(dimension) in DIMENSION_LABELS:
+                return dimension_label(dimension)
+            return f"未知维度({dimension})"
         except Exception:
             return "无法读取维度"
 
+    def get_dimensions(self):
+        """存档中的全部维度（含数据包维度）：{维度 ID: 显示名称}"""
+        return {dimension: dimension_label(dimension) for dimension in discover_dimensions(self.world_path, self.fs)}
+
     def get_player_inventory(self):
         """获取玩家背包信息"""
+        return self._get_items('Data.Player.Inventory')
+
+    def get_player_ender_chest(self):
+        """获取玩家末影箱信息"""
+        return self._get_items('Data.Player.EnderItems')
+
+    def _get_items(self, path):
         try:
-            inventory_nbt = self.level_dat['Data']['Player'].get('Inventory', [])
+            inventory_nbt = self._tag(path, [])
             inventory = []
             for item in inventory_nbt:
                 if 'id' not in item:
@@ -86,7 +270,9 @@ class MinecraftSaver:
                     "槽位": int(item.get('Slot', -1)),
                     "物品ID": str(item['id']),
                     "数量": int(item.get('Count', 0)),
-                    "NBT": item.get('tag', None)
+                    "NBT": item.get('tag', None),
+                    # 潜影盒等容器物品中的物品
+                    "内含物品": flatten_items(nested_items(item), "container"),
                 })
             return inventory
         except Exception as e:
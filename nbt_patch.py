@@ -0,0 +1,287 @@
+# nbt_patch.py
+"""就地修改 level.dat 与 playerdata 中的个别字段（出生点、难度、游戏模式、玩家坐标等）
+
+解压后的 NBT 字节流中，只定位被修改的标签：长度不变（整数、浮点数、定长列表）时直接
+覆盖原字节；长度改变（字符串、列表长度变化）或新增标签时只重新编码该标签并拼接，
+其余字节原样保留。结果用快速压缩级别重新 gzip，写入临时文件后替换原文件。
+
+标签保持原有类型（如 Difficulty 仍为 Byte），新增的标签按值推断类型。
+列表中的单个元素可用下标指定，如 Pos.1。
+
+用法:
+    python -m nbt_patch saves/MyWorld --set Data.SpawnX=0 --set Data.SpawnY=80 --set Data.SpawnZ=0
+    python -m nbt_patch "saves/*" --set Data.Difficulty=2 -j 8
+    python -m nbt_patch saves/MyWorld --player <uuid> --set "Pos=[0.5, 80, 0.5]"
+    python -m nbt_patch saves/MyWorld --all-players --set playerGameType=0
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from archive_cli import expand_world_paths
+from nbt_stream import (
+    FIXED_SIZES, TAG_COMPOUND, TAG_END, TAG_LIST, ByteSource, NBTFormatError, NBTReader, encode_payload, encode_tag,
+    infer_tag_type,
+)
+from vfs import is_archive
+
+# 重新压缩使用的 gzip 级别：这类文件很小，速度比压缩率重要
+GZIP_LEVEL = 1
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_FORMAT_GZIP, _FORMAT_ZLIB, _FORMAT_RAW = range(3)
+
+
+class PatchError(ValueError):
+    """修改无法应用（标签或父标签不存在、值与类型不符、文件被同时写入）"""
+
+
+def _build_trie(paths):
+    trie = {}
+    for path in paths:
+        node = trie
+        parts = path.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if node is None:
+                raise PatchError(f"路径重叠: {path}")
+        if parts[-1] in node:
+            raise PatchError(f"路径重叠: {path}")
+        node[parts[-1]] = None
+    return trie
+
+
+def locate(data, paths):
+    """在解压后的 NBT 字节中定位标签
+
+    返回 (tags, compounds)：tags 为 {路径: (类型, 内容起始偏移, 内容结束偏移, 列表元素类型)}，
+    compounds 为沿途各复合标签（"" 为根）结束标记 TAG_End 的偏移，用于新增标签。
+    """
+    source = ByteSource.from_bytes(bytes(data))
+    reader = NBTReader(source)
+    tags, compounds = {}, {}
+    tag_type, _name = reader.read_tag_header()
+    if tag_type != TAG_COMPOUND:
+        raise NBTFormatError("NBT 根标签不是复合标签")
+
+    def walk(trie, prefix):
+        while True:
+            tag_type = reader.read_byte()
+            if tag_type == TAG_END:
+                compounds[prefix] = source.consumed - 1
+                return
+            name = reader.read_string()
+            path = f"{prefix}.{name}" if prefix else name
+            start = source.consumed
+            if name not in trie:
+                reader.skip_payload(tag_type)
+                continue
+            node = trie[name]
+            if node is not None and tag_type == TAG_COMPOUND:
+                walk(node, path)
+                continue
+            item_type = None
+            if tag_type == TAG_LIST:
+                item_type = reader.read_byte()
+                length = int.from_bytes(source.read(4), "big", signed=True)
+                size = FIXED_SIZES.get(item_type)
+                # 按下标修改定长列表中的元素
+                for key in node or ():
+                    if size is not None and key.isdigit() and int(key) < length:
+                        offset = start + 5 + int(key) * size
+                        tags[f"{path}.{key}"] = (item_type, offset, offset + size, None)
+                if size is not None:
+                    source.skip(size * length)
+                else:
+                    for _ in range(length):
+                        reader.skip_payload(item_type)
+            else:
+                reader.skip_payload(tag_type)
+            if node is None:
+                tags[path] = (tag_type, start, source.consumed, item_type)
+
+    walk(_build_trie(paths), "")
+    return tags, compounds
+
+
+def patch_nbt(data, patch):
+    """把 patch（{路径: 值}）应用到解压后的 NBT 字节上
+
+    长度不变的修改直接写入 data（需为 bytearray）；有长度变化或新增标签时拼接出新的字节串。
+    返回 (结果, 实际改变的路径列表)。
+    """
+    tags, compounds = locate(data, patch)
+    edits = []
+    for path, value in patch.items():
+        try:
+            if path in tags:
+                tag_type, start, end, item_type = tags[path]
+                payload = encode_payload(tag_type, value, item_type)
+                if data[start:end] != payload:
+                    edits.append((start, end, payload, path))
+                continue
+            parent, _dot, name = path.rpartition(".")
+            if parent not in compounds:
+                raise PatchError(f"找不到标签 {path}（父标签 {parent or '根'} 不存在）")
+            position = compounds[parent]
+            edits.append((position, position, encode_tag(infer_tag_type(value), name, value), path))
+        except NBTFormatError as e:
+            raise PatchError(f"{path}: {e}") from None
+
+    edits.sort(key=lambda edit: edit[0])
+    if all(end - start == len(payload) for start, end, payload, _path in edits):
+        for start, end, payload, _path in edits:
+            data[start:end] = payload
+        return data, [path for *_rest, path in edits]
+    parts = []
+    position = 0
+    for start, end, payload, _path in edits:
+        parts.append(data[position:start])
+        parts.append(payload)
+        position = end
+    parts.append(data[position:])
+    return bytearray(b"".join(parts)), [path for *_rest, path in edits]
+
+
+def _decode_file(raw):
+    if raw[:2] == _GZIP_MAGIC:
+        return _FORMAT_GZIP, bytearray(gzip.decompress(raw))
+    if raw[:1] == b"\x78":
+        return _FORMAT_ZLIB, bytearray(zlib.decompress(raw))
+    return _FORMAT_RAW, bytearray(raw)
+
+
+def _encode_file(fmt, data):
+    if fmt == _FORMAT_GZIP:
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if fmt == _FORMAT_ZLIB:
+        return zlib.compress(data, GZIP_LEVEL)
+    return bytes(data)
+
+
+def patch_file(path, patch):
+    """修改单个 NBT 文件（保持原压缩格式），返回实际改变的路径列表；没有变化时不写文件
+
+    写入前重新定位一遍确认结果；文件在读取后被其它程序改写（如服务器正在保存）时放弃修改。
+    """
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    fmt, data = _decode_file(raw)
+    data, changed = patch_nbt(data, patch)
+    if not changed:
+        return changed
+
+    tags, _compounds = locate(data, patch)
+    for path_ in patch:
+        tag_type, start, end, item_type = tags[path_]
+        if data[start:end] != encode_payload(tag_type, patch[path_], item_type):
+            raise PatchError(f"{path_}: 写入后校验失败")
+
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(_encode_file(fmt, data))
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, tmp_path)
+        now = os.stat(path)
+        if (now.st_mtime_ns, now.st_size) != (st.st_mtime_ns, st.st_size):
+            raise PatchError(f"{path} 在修改期间被其它程序写入")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return changed
+
+
+def target_files(world_path, players=(), all_players=False):
+    """要修改的文件：默认为 level.dat，给出玩家时为 playerdata/<uuid>.dat"""
+    if is_archive(world_path.partition("!")[0]):
+        raise PatchError("压缩包中的存档只能查看，不能修改")
+    if not players and not all_players:
+        return [os.path.join(world_path, "level.dat")]
+    playerdata = os.path.join(world_path, "playerdata")
+    if all_players:
+        return [os.path.join(playerdata, name) for name in sorted(os.listdir(playerdata)) if name.endswith(".dat")]
+    return [os.path.join(playerdata, f"{uuid}.dat") for uuid in players]
+
+
+def _error_text(e):
+    if isinstance(e, FileNotFoundError):
+        return f"找不到文件: {e.filename}"
+    return f"{type(e).__name__}: {e}"
+
+
+def patch_world(world_path, patch, players=(), all_players=False):
+    """修改单个存档，返回可序列化为 JSON 的结果
+
+    {"path", "files": {文件: 改变的路径 或 {"error": 错误}}, "error"?}；
+    单个文件失败（如某个玩家文件损坏）时记录在该文件下，其余文件照常修改。
+    """
+    record = {"path": world_path, "files": {}}
+    try:
+        paths = target_files(world_path, players, all_players)
+    except Exception as e:
+        record["error"] = _error_text(e)
+        return record
+    for path in paths:
+        try:
+            record["files"][os.path.relpath(path, world_path)] = patch_file(path, patch)
+        except Exception as e:
+            record["files"][os.path.relpath(path, world_path)] = {"error": _error_text(e)}
+    return record
+
+
+def parse_assignment(text):
+    """解析 PATH=VALUE；VALUE 按 JSON 解析（数字、列表、带引号的字符串），否则作为字符串"""
+    path, sep, value = text.partition("=")
+    if not sep or not path.strip():
+        raise argparse.ArgumentTypeError(f"格式应为 路径=值: {text}")
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        parsed = value
+    return path.strip(), parsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="nbt_patch", description="批量修改存档 level.dat 或玩家数据中的字段")
+    parser.add_argument("paths", nargs="+", help="存档目录、level.dat 路径或通配符")
+    parser.add_argument("--set", dest="assignments", type=parse_assignment, action="append", required=True,
+                        metavar="PATH=VALUE", help="要修改的标签路径与值（可重复），如 Data.SpawnX=0")
+    parser.add_argument("--player", action="append", default=[], help="修改该玩家（UUID）的 playerdata（可重复）")
+    parser.add_argument("--all-players", action="store_true", help="修改 playerdata 中的所有玩家")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    patch = dict(args.assignments)
+    worlds = expand_world_paths(args.paths)
+    failed = 0
+    if len(worlds) <= 1 or args.jobs == 1:
+        results = (patch_world(world, patch, args.player, args.all_players) for world in worlds)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=args.jobs)
+        futures = [executor.submit(patch_world, world, patch, args.player, args.all_players) for world in worlds]
+        results = (future.result() for future in as_completed(futures))
+    try:
+        for record in results:
+            failed += "error" in record or any(isinstance(result, dict) for result in record["files"].values())
+            sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
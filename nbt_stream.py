@@ -0,0 +1,407 @@
+# nbt_stream.py
+
+import array
+import io
+import struct
+import sys
+import zlib
+
+from profiling import SPAN_DECOMPRESS, SPAN_NBT_PARSE, span
+
+# ===== NBT 标签类型 =====
+TAG_END = 0
+TAG_BYTE = 1
+TAG_SHORT = 2
+TAG_INT = 3
+TAG_LONG = 4
+TAG_FLOAT = 5
+TAG_DOUBLE = 6
+TAG_BYTE_ARRAY = 7
+TAG_STRING = 8
+TAG_LIST = 9
+TAG_COMPOUND = 10
+TAG_INT_ARRAY = 11
+TAG_LONG_ARRAY = 12
+
+# 定长标签的字节数，跳过时直接按长度前进
+FIXED_SIZES = {
+    TAG_BYTE: 1,
+    TAG_SHORT: 2,
+    TAG_INT: 4,
+    TAG_LONG: 8,
+    TAG_FLOAT: 4,
+    TAG_DOUBLE: 8,
+}
+
+# 数组标签的元素字节数与 array 类型码
+ARRAY_TYPES = {
+    TAG_BYTE_ARRAY: (1, 'b'),
+    TAG_INT_ARRAY: (4, 'i'),
+    TAG_LONG_ARRAY: (8, 'q'),
+}
+
+_SCALAR_STRUCTS = {
+    TAG_BYTE: struct.Struct(">b"),
+    TAG_SHORT: struct.Struct(">h"),
+    TAG_INT: struct.Struct(">i"),
+    TAG_LONG: struct.Struct(">q"),
+    TAG_FLOAT: struct.Struct(">f"),
+    TAG_DOUBLE: struct.Struct(">d"),
+}
+_USHORT = struct.Struct(">H")
+_INT = _SCALAR_STRUCTS[TAG_INT]
+
+_READ_CHUNK = 64 * 1024
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class NBTFormatError(ValueError):
+    """NBT 数据结构不合法（截断或未知标签类型）"""
+
+
+class ByteSource:
+    """按需解压的字节源：只解压读取到的部分，跳过的数据不构建任何对象"""
+
+    def __init__(self, fileobj, compressed=True):
+        self._file = fileobj
+        # wbits=47 自动识别 gzip 与 zlib 头
+        self._decomp = zlib.decompressobj(47) if compressed else None
+        self._buf = b""
+        self._pos = 0
+        self._eof = False
+        self.consumed = 0
+
+    @classmethod
+    def open(cls, path):
+        """打开 NBT 文件（路径或可 seek 的二进制文件对象），按文件头判断是否压缩"""
+        f = path if hasattr(path, "read") else open(path, "rb")
+        head = f.read(2)
+        f.seek(0)
+        return cls(f, compressed=head == _GZIP_MAGIC or head[:1] == b"\x78")
+
+    @classmethod
+    def from_bytes(cls, data, compressed=False):
+        """从内存中的（可能压缩的）字节构建字节源"""
+        return cls(io.BytesIO(data), compressed=compressed)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _next_chunk(self):
+        if self._eof:
+            return b""
+        while True:
+            raw = self._file.read(_READ_CHUNK)
+            if not raw:
+                self._eof = True
+                return self._decomp.flush() if self._decomp else b""
+            if self._decomp:
+                with span(SPAN_DECOMPRESS) as s:
+                    data = self._decomp.decompress(raw)
+                    s.add_bytes(len(raw))
+            else:
+                data = raw
+            if data:
+                return data
+
+    def read(self, n):
+        pos = self._pos
+        end = pos + n
+        if end <= len(self._buf):
+            self._pos = end
+            self.consumed += n
+            return self._buf[pos:end]
+        pieces = [self._buf[pos:]]
+        have = len(pieces[0])
+        while have < n:
+            chunk = self._next_chunk()
+            if not chunk:
+                raise NBTFormatError("NBT 数据意外结束")
+            pieces.append(chunk)
+            have += len(chunk)
+        self._buf = b"".join(pieces)
+        self._pos = n
+        self.consumed += n
+        return self._buf[:n]
+
+    def skip(self, n):
+        self.consumed += n
+        avail = len(self._buf) - self._pos
+        if n <= avail:
+            self._pos += n
+            return
+        n -= avail
+        self._buf = b""
+        self._pos = 0
+        while n > 0:
+            chunk = self._next_chunk()
+            if not chunk:
+                raise NBTFormatError("NBT 数据意外结束")
+            if len(chunk) > n:
+                self._buf = chunk
+                self._pos = n
+                return
+            n -= len(chunk)
+
+
+class NBTReader:
+    """流式 NBT 读取器，读取为 Python 原生类型，或按长度前缀跳过"""
+
+    def __init__(self, source):
+        self.source = source
+
+    def read_byte(self):
+        return self.source.read(1)[0]
+
+    def read_string(self):
+        length = _USHORT.unpack(self.source.read(2))[0]
+        return self.source.read(length).decode("utf-8", errors="replace")
+
+    def read_tag_header(self):
+        """读取标签头，返回 (类型, 名称)；TAG_End 的名称为 None"""
+        tag_type = self.read_byte()
+        if tag_type == TAG_END:
+            return TAG_END, None
+        return tag_type, self.read_string()
+
+    def read_payload(self, tag_type):
+        """读取标签内容并转换为 Python 原生类型"""
+        fmt = _SCALAR_STRUCTS.get(tag_type)
+        if fmt is not None:
+            return fmt.unpack(self.source.read(fmt.size))[0]
+        if tag_type == TAG_STRING:
+            return self.read_string()
+        if tag_type == TAG_COMPOUND:
+            result = {}
+            while True:
+                child_type, name = self.read_tag_header()
+                if child_type == TAG_END:
+                    return result
+                result[name] = self.read_payload(child_type)
+        if tag_type == TAG_LIST:
+            item_type = self.read_byte()
+            length = _INT.unpack(self.source.read(4))[0]
+            fmt = _SCALAR_STRUCTS.get(item_type)
+            if fmt is not None and length > 0:
+                raw = self.source.read(fmt.size * length)
+                return list(struct.unpack(f">{length}{fmt.format[1:]}", raw))
+            return [self.read_payload(item_type) for _ in range(max(length, 0))]
+        if tag_type in ARRAY_TYPES:
+            size, code = ARRAY_TYPES[tag_type]
+            length = _INT.unpack(self.source.read(4))[0]
+            values = array.array(code, self.source.read(size * length))
+            if size > 1 and sys.byteorder == "little":
+                values.byteswap()
+            return values
+        raise NBTFormatError(f"未知的 NBT 标签类型: {tag_type}")
+
+    def skip_payload(self, tag_type):
+        """跳过标签内容：定长、字符串、数组与定长列表直接按长度前缀跳过"""
+        size = FIXED_SIZES.get(tag_type)
+        if size is not None:
+            self.source.skip(size)
+        elif tag_type == TAG_STRING:
+            self.source.skip(_USHORT.unpack(self.source.read(2))[0])
+        elif tag_type in ARRAY_TYPES:
+            length = _INT.unpack(self.source.read(4))[0]
+            self.source.skip(ARRAY_TYPES[tag_type][0] * length)
+        elif tag_type == TAG_LIST:
+            item_type = self.read_byte()
+            length = _INT.unpack(self.source.read(4))[0]
+            size = FIXED_SIZES.get(item_type)
+            if size is not None:
+                self.source.skip(size * length)
+            else:
+                for _ in range(length):
+                    self.skip_payload(item_type)
+        elif tag_type == TAG_COMPOUND:
+            while True:
+                child_type = self.read_byte()
+                if child_type == TAG_END:
+                    return
+                self.source.skip(_USHORT.unpack(self.source.read(2))[0])
+                self.skip_payload(child_type)
+        else:
+            raise NBTFormatError(f"未知的 NBT 标签类型: {tag_type}")
+
+    def read_root(self):
+        """完整读取根复合标签"""
+        tag_type, _ = self.read_tag_header()
+        if tag_type != TAG_COMPOUND:
+            raise NBTFormatError("NBT 根标签不是复合标签")
+        return self.read_payload(TAG_COMPOUND)
+
+    def read_paths(self, paths):
+        """单次遍历读取指定路径（如 'Data.Player.Pos'），未请求的子树全部跳过
+
+        返回 {路径: 值}，不存在的路径不会出现在结果中。
+        """
+        trie = _build_path_trie(paths)
+        found = {}
+        tag_type, _ = self.read_tag_header()
+        if tag_type != TAG_COMPOUND:
+            raise NBTFormatError("NBT 根标签不是复合标签")
+        self._walk(trie, "", found, _count_leaves(trie))
+
+        # 若同时请求了父路径与子路径，子路径从已读取的父路径中取值
+        for path in paths:
+            if path not in found:
+                value = _resolve_from_ancestor(found, path)
+                if value is not _MISSING:
+                    found[path] = value
+        return found
+
+    def _walk(self, trie, prefix, found, remaining):
+        """遍历复合标签，返回尚未找到的叶子数；为 0 时立即停止读取"""
+        while remaining > 0:
+            tag_type, name = self.read_tag_header()
+            if tag_type == TAG_END:
+                return remaining
+            if name not in trie:
+                self.skip_payload(tag_type)
+                continue
+            node = trie[name]
+            path = prefix + name
+            if node is None:
+                found[path] = self.read_payload(tag_type)
+                remaining -= 1
+            elif tag_type == TAG_COMPOUND:
+                before = _count_leaves(node)
+                left = self._walk(node, path + ".", found, before)
+                remaining -= before - left
+                if left == 0 and remaining > 0:
+                    # 子树已找齐，但仍需越过该复合标签剩余的内容
+                    self.skip_payload(TAG_COMPOUND)
+            else:
+                self.skip_payload(tag_type)
+        return remaining
+
+
+_MISSING = object()
+
+
+def _build_path_trie(paths):
+    trie = {}
+    for path in paths:
+        node = trie
+        parts = path.split(".")
+        for part in parts[:-1]:
+            child = node.get(part, {})
+            if child is None:
+                break  # 父路径已整体读取
+            node[part] = child
+            node = child
+        else:
+            node[parts[-1]] = None
+    return trie
+
+
+def _count_leaves(trie):
+    return sum(1 if node is None else _count_leaves(node) for node in trie.values())
+
+
+def _resolve_from_ancestor(found, path):
+    parts = path.split(".")
+    for i in range(len(parts) - 1, 0, -1):
+        ancestor = ".".join(parts[:i])
+        if ancestor in found:
+            value = found[ancestor]
+            for part in parts[i:]:
+                if not isinstance(value, dict) or part not in value:
+                    return _MISSING
+                value = value[part]
+            return value
+    return _MISSING
+
+
+def nest_paths(found):
+    """把 read_paths 的扁平结果 {'a.b': v} 还原为嵌套字典 {'a': {'b': v}}"""
+    nested = {}
+    for path, value in found.items():
+        node = nested
+        parts = path.split(".")
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return nested
+
+
+def read_nbt_paths(path, paths):
+    """从 NBT 文件（如 level.dat）中只读取指定的标签路径；path 也可以是已打开的文件对象"""
+    with ByteSource.open(path) as source, span(SPAN_NBT_PARSE, path=getattr(path, "name", path)) as s:
+        found = NBTReader(source).read_paths(paths)
+        s.add_bytes(source.consumed)
+        return found
+
+
+def read_nbt_file(path):
+    """完整读取 NBT 文件为 Python 原生类型；path 也可以是已打开的文件对象"""
+    with ByteSource.open(path) as source, span(SPAN_NBT_PARSE, path=getattr(path, "name", path)) as s:
+        root = NBTReader(source).read_root()
+        s.add_bytes(source.consumed)
+        return root
+
+
+# ===== 编码 =====
+
+def infer_tag_type(value):
+    """按 Python 值推断新建标签的类型：bool -> Byte，int -> Int（超出范围为 Long），float -> Double"""
+    if isinstance(value, bool):
+        return TAG_BYTE
+    if isinstance(value, int):
+        return TAG_INT if -2 ** 31 <= value < 2 ** 31 else TAG_LONG
+    if isinstance(value, float):
+        return TAG_DOUBLE
+    if isinstance(value, str):
+        return TAG_STRING
+    if isinstance(value, dict):
+        return TAG_COMPOUND
+    if isinstance(value, (list, tuple)):
+        return TAG_LIST
+    raise NBTFormatError(f"无法推断 NBT 类型: {type(value).__name__}")
+
+
+def encode_payload(tag_type, value, item_type=None):
+    """把 Python 值编码为指定类型的标签内容（不含标签头）
+
+    列表的元素类型为 item_type，未给出时按第一个元素推断；复合标签的子标签类型按值推断。
+    """
+    fmt = _SCALAR_STRUCTS.get(tag_type)
+    if fmt is not None:
+        try:
+            return fmt.pack(float(value) if tag_type in (TAG_FLOAT, TAG_DOUBLE) else int(value))
+        except (struct.error, TypeError, ValueError) as e:
+            raise NBTFormatError(f"值 {value!r} 无法写入该类型的标签: {e}") from None
+    if tag_type == TAG_STRING:
+        raw = str(value).encode("utf-8")
+        if len(raw) > 0xFFFF:
+            raise NBTFormatError("字符串过长")
+        return _USHORT.pack(len(raw)) + raw
+    if tag_type == TAG_COMPOUND:
+        if not isinstance(value, dict):
+            raise NBTFormatError(f"值 {value!r} 不是复合标签")
+        return b"".join(encode_tag(infer_tag_type(v), k, v) for k, v in value.items()) + bytes((TAG_END,))
+    if tag_type == TAG_LIST:
+        if not isinstance(value, (list, tuple)):
+            raise NBTFormatError(f"值 {value!r} 不是列表")
+        if item_type is None or (item_type == TAG_END and value):
+            item_type = infer_tag_type(value[0]) if value else TAG_END
+        return bytes((item_type,)) + _INT.pack(len(value)) + b"".join(encode_payload(item_type, v) for v in value)
+    if tag_type in ARRAY_TYPES:
+        size, code = ARRAY_TYPES[tag_type]
+        values = array.array(code, value)
+        if size > 1 and sys.byteorder == "little":
+            values.byteswap()
+        return _INT.pack(len(value)) + values.tobytes()
+    raise NBTFormatError(f"未知的 NBT 标签类型: {tag_type}")
+
+
+def encode_tag(tag_type, name, value):
+    """编码带标签头（类型与名称）的完整标签"""
+    return bytes((tag_type,)) + encode_payload(TAG_STRING, name) + encode_payload(tag_type, value)
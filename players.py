@@ -0,0 +1,297 @@
+# players.py
+"""多人存档的玩家数据：playerdata/*.dat、stats/*.json、advancements/*.json
+
+用法:
+    python -m players <存档目录> holders diamond
+    python -m players <存档目录> top [--limit 10]
+    python -m players <存档目录> near <x> <z> [--radius 100] [--dimension minecraft:overworld]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dimensions import normalize_dimension
+from items import flatten_items
+from nbt_stream import read_nbt_paths
+from world_scan import normalize_id
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".minecraft_archive_viewer", "cache", "players")
+CACHE_VERSION = 1
+
+# playerdata/<uuid>.dat 中实际用到的标签
+PLAYER_PATHS = ("Pos", "Dimension", "playerGameType", "XpLevel", "Health", "Inventory", "EnderItems")
+
+# 1.13 之前的统计键名 -> 新版 minecraft:custom 下的键名
+_LEGACY_STATS = {"stat.playOneMinute": "minecraft:play_time", "stat.deaths": "minecraft:deaths"}
+# 1.13–1.16 中 minecraft:custom 下后来改名的统计键
+_RENAMED_STATS = {"minecraft:play_one_minute": "minecraft:play_time"}
+
+KIND_PLAYERDATA = "playerdata"
+KIND_STATS = "stats"
+KIND_ADVANCEMENTS = "advancements"
+_KIND_SUFFIXES = {KIND_PLAYERDATA: ".dat", KIND_STATS: ".json", KIND_ADVANCEMENTS: ".json"}
+
+
+def parse_playerdata(path):
+    """解析 playerdata/<uuid>.dat，只读取 PLAYER_PATHS 中的标签"""
+    tags = read_nbt_paths(path, PLAYER_PATHS)
+    # 旧版本用数字表示维度
+    dimension = normalize_dimension(tags.get("Dimension", "minecraft:overworld"))
+    pos = tags.get("Pos")
+    return {
+        "pos": [float(v) for v in pos] if pos is not None and len(pos) == 3 else None,
+        "dimension": dimension,
+        "game_mode": int(tags.get("playerGameType", 0)),
+        "xp_level": int(tags.get("XpLevel", 0)),
+        "health": float(tags.get("Health", 0.0)),
+        "items": flatten_items(tags.get("Inventory", []), "inventory")
+        + flatten_items(tags.get("EnderItems", []), "ender_chest"),
+    }
+
+
+def parse_stats(path):
+    """解析 stats/<uuid>.json，返回 minecraft:custom 分类下的统计（兼容 1.13 之前的扁平格式）"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if "stats" in data:
+        custom = dict(data["stats"].get("minecraft:custom", {}))
+        for old, new in _RENAMED_STATS.items():
+            if old in custom:
+                custom.setdefault(new, custom.pop(old))
+        return {"custom": custom}
+    return {"custom": {new: data[old] for old, new in _LEGACY_STATS.items() if old in data}}
+
+
+def parse_advancements(path):
+    """解析 advancements/<uuid>.json，统计已完成的进度（不含配方解锁）"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    done = sum(
+        1 for key, value in data.items()
+        if isinstance(value, dict) and value.get("done") and "recipes/" not in key
+    )
+    return {"advancements": done}
+
+
+_PARSERS = {
+    KIND_PLAYERDATA: parse_playerdata,
+    KIND_STATS: parse_stats,
+    KIND_ADVANCEMENTS: parse_advancements,
+}
+
+
+def parse_player_file(kind, path):
+    """在工作进程中解析单个文件，失败时返回 {"error": ...}"""
+    try:
+        return _PARSERS[kind](path)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def cache_path_for(world_path):
+    world_path = os.path.abspath(world_path)
+    digest = hashlib.sha1(world_path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"{os.path.basename(world_path) or 'world'}-{digest}.json")
+
+
+def load_usercache(world_path):
+    """服务器根目录（存档的上一级）中的 usercache.json：uuid -> 玩家名"""
+    names = {}
+    for folder in (world_path, os.path.dirname(os.path.abspath(world_path))):
+        try:
+            with open(os.path.join(folder, "usercache.json"), "r", encoding="utf-8") as f:
+                for entry in json.load(f):
+                    names.setdefault(entry["uuid"], entry["name"])
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+    return names
+
+
+class PlayerData:
+    """存档中所有玩家的数据
+
+    refresh() 只重新解析 mtime/大小变化的文件（结果缓存在本地 JSON 中），
+    之后的查询都基于内存中的结果与倒排索引，不再扫描目录。
+    """
+
+    def __init__(self, world_path, cache_path=None):
+        self.world_path = world_path
+        self.cache_path = cache_path or cache_path_for(world_path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            self._files = cached["files"] if cached.get("version") == CACHE_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self._files = {}
+        self.players = {}
+        self._items = {}
+        self._positions = None
+
+    def _list_files(self):
+        """[(类型, 相对路径, 绝对路径, (mtime, 大小))]"""
+        files = []
+        for kind, suffix in _KIND_SUFFIXES.items():
+            folder = os.path.join(self.world_path, kind)
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(suffix):
+                    st = entry.stat()
+                    files.append((kind, f"{kind}/{entry.name}", entry.path, [st.st_mtime, st.st_size]))
+        return files
+
+    def refresh(self, progress=None, max_workers=None):
+        """增量解析玩家文件，progress(已完成, 总数) 用于进度回调
+
+        返回 {"files": 文件总数, "parsed": 重新解析数, "removed": 已删除数}。
+        """
+        files = self._list_files()
+        changed = [f for f in files if (self._files.get(f[1]) or {}).get("stat") != f[3]]
+        removed = set(self._files) - {f[1] for f in files}
+        for key in removed:
+            del self._files[key]
+
+        if changed:
+            workers = max_workers or os.cpu_count() or 1
+            kinds = [f[0] for f in changed]
+            paths = [f[2] for f in changed]
+            chunksize = max(1, len(changed) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = executor.map(parse_player_file, kinds, paths, chunksize=chunksize)
+                for done, ((_kind, key, _path, stat), data) in enumerate(zip(changed, results), 1):
+                    self._files[key] = {"stat": stat, "data": data}
+                    if progress:
+                        progress(done, len(changed))
+        if changed or removed:
+            self.save()
+        self._rebuild()
+        return {"files": len(files), "parsed": len(changed), "removed": len(removed)}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with self._lock:
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "files": self._files}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+
+    def _rebuild(self):
+        """按 UUID 合并三类文件，并重建物品倒排索引与坐标数组"""
+        names = load_usercache(self.world_path)
+        players = {}
+        for key, entry in self._files.items():
+            kind, name = key.split("/", 1)
+            uuid = os.path.splitext(name)[0]
+            player = players.setdefault(uuid, {"uuid": uuid, "name": names.get(uuid, uuid)})
+            data = entry["data"]
+            if "error" in data:
+                player.setdefault("errors", {})[kind] = data["error"]
+            else:
+                player.update(data)
+        self.players = players
+
+        items = {}
+        for uuid, player in players.items():
+            for item in player.get("items", ()):
+                holders = items.setdefault(item["id"], {})
+                holders[uuid] = holders.get(uuid, 0) + item["count"]
+        self._items = items
+
+        located = [p for p in players.values() if p.get("pos")]
+        self._positions = (
+            [p["uuid"] for p in located],
+            np.array([p["pos"] for p in located], dtype=np.float64).reshape(-1, 3),
+            np.array([p["dimension"] for p in located], dtype=object),
+        )
+
+    # ===== 查询 =====
+
+    def holders(self, item_id):
+        """持有某物品的玩家（含末影箱与容器物品内），按数量降序：[(uuid, 名称, 数量)]"""
+        holders = self._items.get(normalize_id(item_id), {})
+        ranked = sorted(holders.items(), key=lambda kv: kv[1], reverse=True)
+        return [(uuid, self.players[uuid]["name"], count) for uuid, count in ranked]
+
+    def top_by_stat(self, stat="minecraft:play_time", limit=10):
+        """按 minecraft:custom 下的统计值排序：[(uuid, 名称, 值)]"""
+        stat = normalize_id(stat)
+        ranked = sorted(
+            ((p["uuid"], p["name"], p.get("custom", {}).get(stat, 0)) for p in self.players.values()),
+            key=lambda row: row[2], reverse=True,
+        )
+        return ranked[:limit] if limit else ranked
+
+    def top_by_playtime(self, limit=10):
+        """游玩时长（tick）最长的玩家"""
+        return self.top_by_stat("minecraft:play_time", limit)
+
+    def near(self, x, z, radius, dimension="minecraft:overworld", y=None):
+        """距离给定坐标 radius 格以内的玩家，按距离升序：[(距离, uuid, 名称)]
+
+        不给出 y 时按水平距离计算。
+        """
+        uuids, positions, dimensions = self._positions
+        if not uuids:
+            return []
+        delta = positions - np.array([x, 0.0 if y is None else y, z])
+        if y is None:
+            delta[:, 1] = 0.0
+        distance = np.sqrt((delta * delta).sum(axis=1))
+        mask = distance <= radius
+        if dimension:
+            mask &= dimensions == normalize_dimension(dimension)
+        hits = sorted((float(distance[i]), uuids[i]) for i in np.flatnonzero(mask).tolist())
+        return [(d, uuid, self.players[uuid]["name"]) for d, uuid in hits]
+
+
+def format_playtime(ticks):
+    hours = ticks / 20 / 3600
+    return f"{math.floor(hours)} 小时 {math.floor((hours % 1) * 60)} 分"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="players", description="查询多人存档中的玩家数据")
+    parser.add_argument("world", help="存档目录")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    holders = sub.add_parser("holders", help="谁持有某物品")
+    holders.add_argument("item")
+    top = sub.add_parser("top", help="游玩时长排行")
+    top.add_argument("--stat", default="minecraft:play_time")
+    top.add_argument("--limit", type=int, default=10)
+    near = sub.add_parser("near", help="某坐标附近的玩家")
+    near.add_argument("x", type=float)
+    near.add_argument("z", type=float)
+    near.add_argument("--radius", type=float, default=100.0)
+    near.add_argument("--dimension", default="minecraft:overworld")
+    args = parser.parse_args(argv)
+
+    data = PlayerData(args.world)
+    stats = data.refresh(max_workers=args.jobs)
+    print(f"共 {len(data.players)} 名玩家，重新解析 {stats['parsed']}/{stats['files']} 个文件", file=sys.stderr)
+    if args.command == "holders":
+        for uuid, name, count in data.holders(args.item):
+            print(f"{name}\t{uuid}\t{count}")
+    elif args.command == "top":
+        for uuid, name, value in data.top_by_stat(args.stat, args.limit):
+            shown = format_playtime(value) if args.stat.endswith("play_time") else value
+            print(f"{name}\t{uuid}\t{shown}")
+    else:
+        for distance, uuid, name in data.near(args.x, args.z, args.radius, args.dimension):
+            print(f"{name}\t{uuid}\t{distance:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# profiling.py
+"""轻量的性能埋点：命名区段 (span) 的耗时、字节数与内存分配计数
+
+未启用时 span() 直接返回一个共享的空对象，开销只有一次函数调用。
+启用后记录每个区段，可按名称汇总，或导出为 Chrome Trace JSON
+（在 chrome://tracing 或 https://ui.perfetto.dev 中打开）。
+
+环境变量 MCAV_PROFILE=1 在启动时开启埋点，MCAV_PROFILE=alloc 同时统计内存分配。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+# 加载流程中的标准区段名
+SPAN_LEVEL_DAT = "level.dat 读取"
+SPAN_DECOMPRESS = "解压"
+SPAN_NBT_PARSE = "NBT 解析"
+SPAN_CONVERT = "NBT 转换"
+SPAN_FORMAT = "格式化"
+SPAN_RENDER = "渲染"
+
+# 最多保留的区段记录数，超出后不再记录（避免长时间开启时占用过多内存）
+MAX_RECORDS = 200000
+
+_enabled = os.environ.get("MCAV_PROFILE", "") not in ("", "0")
+# sys.getallocatedblocks() 的开销随堆大小增长，因此分配计数需要单独开启
+_track_allocs = os.environ.get("MCAV_PROFILE", "") == "alloc"
+_records = []
+_lock = threading.Lock()
+_epoch_ns = time.perf_counter_ns()
+
+
+class _NullSpan:
+    """未启用时使用的空区段"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_bytes(self, n):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一次区段记录；字节数由调用方通过 add_bytes() 累加"""
+
+    __slots__ = ("name", "args", "start_ns", "duration_ns", "bytes", "allocs", "tid")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.bytes = 0
+        self.allocs = 0
+        self.duration_ns = 0
+
+    def add_bytes(self, n):
+        self.bytes += n
+
+    def __enter__(self):
+        self.tid = threading.get_ident()
+        # 已分配内存块数的净增量，作为分配次数的近似
+        if _track_allocs:
+            self.allocs = sys.getallocatedblocks()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration_ns = time.perf_counter_ns() - self.start_ns
+        if _track_allocs:
+            self.allocs = sys.getallocatedblocks() - self.allocs
+        with _lock:
+            if len(_records) < MAX_RECORDS:
+                _records.append(self)
+        return False
+
+
+def span(name, **args):
+    """用法: with span(SPAN_NBT_PARSE, path=path) as s: ...; s.add_bytes(n)"""
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, args)
+
+
+def enable(allocations=False):
+    """开启埋点；allocations=True 时同时统计每个区段的内存块净增量（较慢）"""
+    global _enabled, _track_allocs
+    _enabled = True
+    _track_allocs = allocations
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def tracks_allocations():
+    return _track_allocs
+
+
+def reset():
+    with _lock:
+        _records.clear()
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def summary():
+    """按区段名汇总：[{name, count, total_ms, mean_ms, max_ms, bytes, allocs}]，按总耗时降序"""
+    totals = {}
+    for record in records():
+        entry = totals.setdefault(record.name, {
+            "name": record.name, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "bytes": 0, "allocs": 0,
+        })
+        ms = record.duration_ns / 1e6
+        entry["count"] += 1
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+        entry["bytes"] += record.bytes
+        entry["allocs"] += record.allocs
+    for entry in totals.values():
+        entry["mean_ms"] = entry["total_ms"] / entry["count"]
+    return sorted(totals.values(), key=lambda e: e["total_ms"], reverse=True)
+
+
+def chrome_trace():
+    """Chrome Trace Event 格式（完整事件 ph=X，时间单位为微秒）"""
+    pid = os.getpid()
+    events = []
+    for record in records():
+        args = {key: str(value) for key, value in record.args.items()}
+        args["bytes"] = record.bytes
+        args["allocs"] = record.allocs
+        events.append({
+            "name": record.name,
+            "ph": "X",
+            "ts": (record.start_ns - _epoch_ns) / 1000,
+            "dur": record.duration_ns / 1000,
+            "pid": pid,
+            "tid": record.tid,
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path):
+    trace = chrome_trace()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(trace, f, ensure_ascii=False)
+    return len(trace["traceEvents"])
@@ -0,0 +1,289 @@
+# region.py
+
+import array
+import glob
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+
+from nbt_stream import ByteSource, NBTReader, nest_paths
+from profiling import SPAN_DECOMPRESS, SPAN_NBT_PARSE, span
+
+SECTOR_SIZE = 4096
+CHUNKS_PER_REGION = 1024
+
+# 区块压缩类型
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+COMPRESSION_LZ4 = 4
+COMPRESSION_CUSTOM = 127
+# 压缩类型字节最高位表示区块数据存放在外部 c.X.Z.mcc 文件中
+EXTERNAL_FLAG = 0x80
+
+_CHUNK_HEADER = struct.Struct(">iB")
+_LZ4_BLOCK_HEADER = struct.Struct("<8sBiii")
+_LZ4_MAGIC = b"LZ4Block"
+_REGION_NAME = re.compile(r"^r\.(-?\d+)\.(-?\d+)\.mca$")
+
+
+class RegionFormatError(ValueError):
+    """区域文件或区块数据损坏"""
+
+
+def region_coords(path):
+    """从文件名 r.X.Z.mca 中解析区域坐标，无法解析时返回 None"""
+    match = _REGION_NAME.match(os.path.basename(path))
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def list_region_files(directory):
+    """列出目录下所有 .mca 区域文件（按区域坐标排序）"""
+    files = [p for p in glob.glob(os.path.join(directory, "r.*.*.mca")) if region_coords(p)]
+    return sorted(files, key=region_coords)
+
+
+def sectors_for(length):
+    """长度为 length 字节的区块记录占用的扇区数"""
+    return (length + SECTOR_SIZE - 1) // SECTOR_SIZE
+
+
+def write_region_file(path, entries):
+    """写出区域文件：entries 为 {头部索引: (时间戳, 原始区块记录)}，区块按索引顺序紧密排列
+
+    先写入同目录的临时文件再替换，写入中途失败不会损坏原文件。
+    """
+    locations = array.array("I", bytes(CHUNKS_PER_REGION * 4))
+    timestamps = array.array("I", bytes(CHUNKS_PER_REGION * 4))
+    sector = 2
+    for index, (timestamp, entry) in sorted(entries.items()):
+        count = sectors_for(len(entry))
+        if count > 0xFF:
+            raise RegionFormatError(f"区块记录过大（{count} 个扇区）")
+        locations[index] = (sector << 8) | count
+        timestamps[index] = timestamp
+        sector += count
+    if sys.byteorder == "little":
+        locations.byteswap()
+        timestamps.byteswap()
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(locations.tobytes())
+            f.write(timestamps.tobytes())
+            for _index, (_timestamp, entry) in sorted(entries.items()):
+                f.write(entry)
+                f.write(bytes(-len(entry) % SECTOR_SIZE))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return sector * SECTOR_SIZE
+
+
+def _decompress_lz4_blocks(data):
+    """解码 lz4-java LZ4BlockOutputStream 格式（24w04a 起可选的区块压缩）"""
+    try:
+        import lz4.block
+    except ImportError as e:
+        raise RegionFormatError("读取 LZ4 压缩区块需要安装 lz4 库") from e
+    out = []
+    pos = 0
+    while pos + _LZ4_BLOCK_HEADER.size <= len(data):
+        magic, token, comp_len, raw_len, _checksum = _LZ4_BLOCK_HEADER.unpack_from(data, pos)
+        if magic != _LZ4_MAGIC:
+            raise RegionFormatError("LZ4 块头不合法")
+        pos += _LZ4_BLOCK_HEADER.size
+        if raw_len == 0:
+            break
+        block = bytes(data[pos:pos + comp_len])
+        pos += comp_len
+        if token & 0xF0 == 0x10:
+            out.append(block)
+        else:
+            out.append(lz4.block.decompress(block, uncompressed_size=raw_len))
+    return b"".join(out)
+
+
+def decompress_chunk(compression, payload):
+    """按压缩类型完整解压区块数据"""
+    with span(SPAN_DECOMPRESS, compression=compression) as s:
+        s.add_bytes(len(payload))
+        return _decompress(compression, payload)
+
+
+def _decompress(compression, payload):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(payload)
+    if compression == COMPRESSION_GZIP:
+        return zlib.decompress(payload, 31)
+    if compression == COMPRESSION_NONE:
+        return bytes(payload)
+    if compression == COMPRESSION_LZ4:
+        return _decompress_lz4_blocks(payload)
+    raise RegionFormatError(f"不支持的区块压缩类型: {compression}")
+
+
+def chunk_source(compression, payload):
+    """为区块数据构建按需解压的字节源，便于只读取部分标签"""
+    if compression in (COMPRESSION_ZLIB, COMPRESSION_GZIP):
+        return ByteSource.from_bytes(payload, compressed=True)
+    return ByteSource.from_bytes(decompress_chunk(compression, payload))
+
+
+class RegionFile:
+    """内存映射的 .mca 区域文件
+
+    头部 4 KiB 位置表与 4 KiB 时间戳表解析为紧凑的 array 索引，
+    区块数据只在被请求时才从映射中切片并解压。
+    """
+
+    def __init__(self, path, buffer=None, read_sibling=None):
+        """buffer 为已在内存中的区域文件内容（如压缩包成员），此时 path 只用于显示；
+        read_sibling(文件名) 读取同目录下的外部区块文件 c.X.Z.mcc
+        """
+        self.path = path
+        self.coords = region_coords(path)
+        self._read_sibling = read_sibling
+        self._file = None
+        self._map = None
+        if buffer is not None:
+            size = len(buffer)
+        else:
+            self._file = open(path, "rb")
+            size = os.fstat(self._file.fileno()).st_size
+        self.locations = array.array("I", bytes(CHUNKS_PER_REGION * 4))
+        self.timestamps = array.array("I", bytes(CHUNKS_PER_REGION * 4))
+        if size >= 2 * SECTOR_SIZE:
+            if buffer is not None:
+                self._map = buffer
+            else:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.locations = array.array("I", bytes(self._map[:SECTOR_SIZE]))
+            self.timestamps = array.array("I", bytes(self._map[SECTOR_SIZE:2 * SECTOR_SIZE]))
+            if sys.byteorder == "little":
+                self.locations.byteswap()
+                self.timestamps.byteswap()
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def index(x, z):
+        """区块坐标（全局或区域内均可）对应的头部索引"""
+        return (x & 31) + (z & 31) * 32
+
+    def chunk_exists(self, x, z):
+        return self.locations[self.index(x, z)] != 0
+
+    def chunk_timestamp(self, x, z):
+        return self.timestamps[self.index(x, z)]
+
+    def sector_span(self, x, z):
+        """返回 (起始扇区, 扇区数)"""
+        loc = self.locations[self.index(x, z)]
+        return loc >> 8, loc & 0xFF
+
+    def iter_chunks(self):
+        """遍历已生成区块的区域内坐标 (x, z)"""
+        for i, loc in enumerate(self.locations):
+            if loc:
+                yield i & 31, i >> 5
+
+    def chunk_count(self):
+        return sum(1 for loc in self.locations if loc)
+
+    def read_chunk_bytes(self, x, z):
+        """返回 (压缩类型, 压缩数据)；区块不存在时返回 None"""
+        offset, count = self.sector_span(x, z)
+        if offset == 0 or self._map is None:
+            return None
+        start = offset * SECTOR_SIZE
+        if start + _CHUNK_HEADER.size > len(self._map):
+            raise RegionFormatError(f"区块 ({x}, {z}) 的扇区超出文件范围")
+        length, compression = _CHUNK_HEADER.unpack_from(self._map, start)
+        if compression & EXTERNAL_FLAG:
+            return compression & ~EXTERNAL_FLAG, self._read_external(x, z)
+        if length <= 0 or length > count * SECTOR_SIZE:
+            raise RegionFormatError(f"区块 ({x}, {z}) 的长度字段不合法: {length}")
+        payload_start = start + _CHUNK_HEADER.size
+        # mmap 切片即为 bytes；memoryview 缓冲区的切片同样复制出来，调用方不持有对缓冲区的引用
+        return compression, bytes(self._map[payload_start:payload_start + length - 1])
+
+    def read_chunk_entry(self, x, z):
+        """区块在文件中的原始记录（长度与压缩类型头 + 压缩数据），不解压，用于原样复制区块
+
+        区块不存在时返回 None；数据存放在外部 .mcc 文件中的区块只返回文件内的头部。
+        """
+        offset, count = self.sector_span(x, z)
+        if offset == 0 or self._map is None:
+            return None
+        start = offset * SECTOR_SIZE
+        if start + _CHUNK_HEADER.size > len(self._map):
+            raise RegionFormatError(f"区块 ({x}, {z}) 的扇区超出文件范围")
+        length, compression = _CHUNK_HEADER.unpack_from(self._map, start)
+        if compression & EXTERNAL_FLAG:
+            length = 1
+        elif length <= 0 or length > count * SECTOR_SIZE or start + 4 + length > len(self._map):
+            raise RegionFormatError(f"区块 ({x}, {z}) 的长度字段不合法: {length}")
+        return bytes(self._map[start:start + 4 + length])
+
+    def _read_external(self, x, z):
+        rx, rz = self.coords or (0, 0)
+        name = f"c.{rx * 32 + (x & 31)}.{rz * 32 + (z & 31)}.mcc"
+        if self._read_sibling is not None:
+            return self._read_sibling(name)
+        with open(os.path.join(os.path.dirname(self.path), name), "rb") as f:
+            return f.read()
+
+    def read_chunk_raw(self, x, z):
+        """返回解压后的区块 NBT 字节"""
+        data = self.read_chunk_bytes(x, z)
+        if data is None:
+            return None
+        return decompress_chunk(*data)
+
+    def read_chunk(self, x, z):
+        """完整读取区块为 Python 原生类型"""
+        data = self.read_chunk_bytes(x, z)
+        if data is None:
+            return None
+        with span(SPAN_NBT_PARSE, x=x, z=z) as s:
+            source = chunk_source(*data)
+            chunk = NBTReader(source).read_root()
+            s.add_bytes(source.consumed)
+            return chunk
+
+    def read_chunk_paths(self, x, z, paths):
+        """只读取区块中的指定标签路径（如 'Level.InhabitedTime'）"""
+        data = self.read_chunk_bytes(x, z)
+        if data is None:
+            return None
+        with span(SPAN_NBT_PARSE, x=x, z=z) as s:
+            source = chunk_source(*data)
+            found = NBTReader(source).read_paths(paths)
+            s.add_bytes(source.consumed)
+            return found
+
+    def read_chunk_tags(self, x, z, paths):
+        """只读取指定标签路径，并按原结构返回嵌套字典（区块不存在时返回 None）"""
+        found = self.read_chunk_paths(x, z, paths)
+        return None if found is None else nest_paths(found)
@@ -0,0 +1,82 @@
+# tasks.py
+
+import queue
+import threading
+
+
+class TaskCancelled(Exception):
+    """任务已被取消（由工作线程在检查点抛出）"""
+
+
+class BackgroundTask:
+    """在工作线程中运行耗时任务，结果经队列由 Tk 主线程的 after 轮询取回
+
+    func(task) 在工作线程中执行，可调用 task.report(...) 报告进度、
+    task.check_cancelled() 在阶段之间响应取消。所有回调都在 Tk 主线程中执行；
+    任务被取消后不再调用 on_done / on_progress，只在线程退出后调用 on_cancel。
+    """
+
+    def __init__(self, root, func, on_done, on_error=None, on_progress=None, on_cancel=None, poll_ms=50):
+        self.root = root
+        self.func = func
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self.finished = False
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report(self, value):
+        """从工作线程报告进度或增量结果"""
+        self._queue.put(("progress", value))
+
+    def _run(self):
+        try:
+            result = self.func(self)
+        except TaskCancelled:
+            self._queue.put(("cancelled", None))
+        except Exception as e:
+            self._queue.put(("error", e))
+        else:
+            self._queue.put(("done", result))
+
+    def _poll(self):
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                self.root.after(self.poll_ms, self._poll)
+                return
+            if kind == "progress":
+                if self.on_progress and not self.cancelled:
+                    self.on_progress(payload)
+                continue
+            break
+
+        self.finished = True
+        if self.cancelled or kind == "cancelled":
+            if self.on_cancel:
+                self.on_cancel()
+        elif kind == "error":
+            if self.on_error:
+                self.on_error(payload)
+        else:
+            self.on_done(payload)
@@ -0,0 +1,360 @@
+# vfs.py
+"""存档的虚拟文件系统：同样的接口读取目录、.zip 与 .tar(.gz/.bz2/.xz) 备份中的存档
+
+压缩包的成员索引（名称 -> 偏移、大小、压缩方式）在打开时只建立一次，并按压缩包
+路径、mtime 与大小缓存，同一备份被反复打开时不再扫描。
+只有被读取的成员才会解压：zip 中以 stored 方式保存的成员和未压缩 .tar 中的成员
+直接映射压缩包的对应字节，支持随机访问；压缩的成员在首次需要随机访问时整体解压一次，
+解压结果按内存预算缓存。
+
+路径一律使用相对存档根目录、以 / 分隔的形式，如 "region/r.0.0.mca"。
+"""
+
+import io
+import mmap
+import os
+import posixpath
+import struct
+import tarfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+
+from region import RegionFile, region_coords
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+# 解压后的成员缓存预算（字节）与已打开压缩包的缓存数
+MEMBER_CACHE_BYTES = 256 * 1024 * 1024
+MAX_OPEN_ARCHIVES = 4
+
+_ZIP_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_ZIP_LOCAL_MAGIC = b"PK\x03\x04"
+
+
+def is_archive(path):
+    """路径是否为支持的压缩包（按扩展名判断）"""
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _norm(rel):
+    rel = rel.replace("\\", "/").strip("/")
+    return "" if rel in ("", ".") else posixpath.normpath(rel)
+
+
+class DirectoryFS:
+    """普通目录中的存档"""
+
+    def __init__(self, root):
+        self.root = root
+        self.label = root
+
+    def real_path(self, rel):
+        return os.path.join(self.root, *_norm(rel).split("/")) if _norm(rel) else self.root
+
+    def exists(self, rel):
+        return os.path.exists(self.real_path(rel))
+
+    def isfile(self, rel):
+        return os.path.isfile(self.real_path(rel))
+
+    def isdir(self, rel):
+        return os.path.isdir(self.real_path(rel))
+
+    def listdir(self, rel=""):
+        try:
+            return sorted(os.listdir(self.real_path(rel)))
+        except OSError:
+            return []
+
+    def getsize(self, rel):
+        return os.path.getsize(self.real_path(rel))
+
+    def getmtime(self, rel):
+        return os.path.getmtime(self.real_path(rel))
+
+    def open(self, rel):
+        return open(self.real_path(rel), "rb")
+
+    def read_bytes(self, rel):
+        with self.open(rel) as f:
+            return f.read()
+
+    def list_region_files(self, rel_dir):
+        """目录下的 .mca 文件（按区域坐标排序），返回可传给 open_region 的绝对路径
+
+        存档路径为相对路径时也返回绝对路径，open_region 不会把存档目录再拼接一次。
+        """
+        names = [n for n in self.listdir(rel_dir) if region_coords(n)]
+        return [os.path.abspath(self.real_path(posixpath.join(rel_dir, n))) for n in sorted(names, key=region_coords)]
+
+    def open_region(self, path):
+        """path 为 list_region_files 返回的绝对路径，或相对存档根目录的路径"""
+        return RegionFile(path if os.path.isabs(path) else self.real_path(path))
+
+    def close(self):
+        pass
+
+
+class _Member:
+    __slots__ = ("name", "size", "mtime", "data_offset", "stored", "info")
+
+    def __init__(self, name, size, mtime, data_offset, stored, info):
+        self.name = name
+        self.size = size
+        self.mtime = mtime
+        # 成员数据在压缩包文件中的偏移；未知或成员被压缩时为 None
+        self.data_offset = data_offset
+        self.stored = stored
+        self.info = info
+
+
+class ArchiveFS:
+    """压缩包中的存档；root 为存档根目录在压缩包中的路径（level.dat 所在目录）"""
+
+    def __init__(self, archive_path, root=None):
+        self.archive_path = archive_path
+        self._lock = threading.RLock()
+        self._members = {}
+        self._dirs = {"": set()}
+        self._map = None
+        self._file = None
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._build_index()
+        self.root = _norm(root) if root is not None else self._find_root()
+        self.label = f"{archive_path}!/{self.root}" if self.root else f"{archive_path}!"
+
+    # ===== 索引 =====
+
+    def _add(self, member):
+        name = _norm(member.name)
+        self._members[name] = member
+        parent, child = posixpath.split(name)
+        while True:
+            self._dirs.setdefault(parent, set()).add(child)
+            if not parent:
+                break
+            parent, child = posixpath.split(parent)
+
+    def _add_dir(self, name):
+        name = _norm(name)
+        if name:
+            self._dirs.setdefault(name, set())
+            parent, child = posixpath.split(name)
+            self._dirs.setdefault(parent, set()).add(child)
+
+    def _find_root(self):
+        """level.dat 所在的最浅目录；找不到时为压缩包根目录"""
+        candidates = [posixpath.dirname(name) for name in self._members if posixpath.basename(name) == "level.dat"]
+        return min(candidates, key=lambda d: (d.count("/") if d else -1, d)) if candidates else ""
+
+    def _mapped(self):
+        """压缩包文件的只读内存映射（首次使用时创建）"""
+        with self._lock:
+            if self._map is None:
+                self._file = open(self.archive_path, "rb")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+    # ===== 路径 =====
+
+    def _full(self, rel):
+        rel = _norm(rel)
+        return posixpath.join(self.root, rel) if self.root and rel else (rel or self.root)
+
+    def _member(self, rel):
+        member = self._members.get(self._full(rel))
+        if member is None:
+            raise FileNotFoundError(f"{self.label}/{_norm(rel)}")
+        return member
+
+    def exists(self, rel):
+        return self.isfile(rel) or self.isdir(rel)
+
+    def isfile(self, rel):
+        return self._full(rel) in self._members
+
+    def isdir(self, rel):
+        return self._full(rel) in self._dirs
+
+    def listdir(self, rel=""):
+        return sorted(self._dirs.get(self._full(rel), ()))
+
+    def getsize(self, rel):
+        return self._member(rel).size
+
+    def getmtime(self, rel):
+        return self._member(rel).mtime
+
+    # ===== 读取 =====
+
+    def buffer(self, rel):
+        """成员内容的随机访问缓冲区
+
+        stored 成员直接返回压缩包映射的 memoryview 切片（不复制、不解压），
+        压缩成员整体解压一次并放入缓存。
+        """
+        member = self._member(rel)
+        if member.stored and member.data_offset is not None:
+            return memoryview(self._mapped())[member.data_offset:member.data_offset + member.size]
+        with self._lock:
+            data = self._cache.get(member.name)
+            if data is not None:
+                self._cache.move_to_end(member.name)
+                return data
+        with self.open(rel) as f:
+            data = f.read()
+        with self._lock:
+            if len(data) <= MEMBER_CACHE_BYTES and member.name not in self._cache:
+                self._cache[member.name] = data
+                self._cache_bytes += len(data)
+                while self._cache_bytes > MEMBER_CACHE_BYTES:
+                    _name, old = self._cache.popitem(last=False)
+                    self._cache_bytes -= len(old)
+        return data
+
+    def read_bytes(self, rel):
+        return bytes(self.buffer(rel))
+
+    def list_region_files(self, rel_dir):
+        names = [n for n in self.listdir(rel_dir) if region_coords(n)]
+        return [posixpath.join(_norm(rel_dir), n) for n in sorted(names, key=region_coords)]
+
+    def open_region(self, path):
+        """path 为相对存档根目录的路径；区块按需从成员缓冲区中切片解压"""
+        rel_dir = posixpath.dirname(_norm(path))
+        return RegionFile(f"{self.label}/{_norm(path)}", buffer=self.buffer(path),
+                          read_sibling=lambda name: self.read_bytes(posixpath.join(rel_dir, name)))
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    # 仍有区域文件引用映射中的切片，交给垃圾回收
+                    pass
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._cache.clear()
+            self._cache_bytes = 0
+
+
+class ZipFS(ArchiveFS):
+    """.zip 备份；成员索引来自中央目录，不读取成员内容"""
+
+    def _build_index(self):
+        self._zip = zipfile.ZipFile(self.archive_path)
+        for info in self._zip.infolist():
+            if info.is_dir():
+                self._add_dir(info.filename)
+                continue
+            stored = info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1
+            mtime = _zip_mtime(info)
+            self._add(_Member(info.filename, info.file_size, mtime, None, stored, info))
+
+    def _member(self, rel):
+        member = super()._member(rel)
+        if member.stored and member.data_offset is None:
+            # 本地文件头的扩展字段长度可能与中央目录不同，需要读取本地头才能确定数据偏移
+            header = _ZIP_LOCAL_HEADER.unpack_from(self._mapped(), member.info.header_offset)
+            if header[0] == _ZIP_LOCAL_MAGIC:
+                member.data_offset = member.info.header_offset + _ZIP_LOCAL_HEADER.size + header[10] + header[11]
+            else:
+                member.stored = False
+        return member
+
+    def open(self, rel):
+        return self._zip.open(self._member(rel).info)
+
+    def close(self):
+        super().close()
+        self._zip.close()
+
+
+def _zip_mtime(info):
+    try:
+        return time.mktime(info.date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return 0.0
+
+
+class TarFS(ArchiveFS):
+    """.tar 备份（可为 gzip/bzip2/xz 压缩）
+
+    未压缩的 .tar 中成员数据是连续存放的，可直接映射；压缩的 .tar 建立索引时
+    需要完整读一遍压缩流，之后按成员解压。
+    """
+
+    def _build_index(self):
+        self._tar = tarfile.open(self.archive_path, "r:*")
+        self._plain = _is_plain_tar(self.archive_path)
+        for info in self._tar:
+            if info.isdir():
+                self._add_dir(info.name)
+            elif info.isreg():
+                offset = info.offset_data if self._plain and not info.sparse else None
+                self._add(_Member(info.name, info.size, float(info.mtime), offset, offset is not None, info))
+        self._tar.members = []
+
+    def open(self, rel):
+        member = self._member(rel)
+        if self._plain:
+            return io.BytesIO(self.buffer(rel))
+        with self._lock:
+            # 压缩的 tar 共用一个解压流，读出后再交给调用方，避免多线程交错读取
+            return io.BytesIO(self._tar.extractfile(member.info).read())
+
+    def close(self):
+        super().close()
+        self._tar.close()
+
+
+def _is_plain_tar(path):
+    with open(path, "rb") as f:
+        head = f.read(6)
+    return not (head.startswith(b"\x1f\x8b") or head.startswith(b"BZh") or head.startswith(b"\xfd7zXZ"))
+
+
+_open_archives = OrderedDict()
+_archives_lock = threading.Lock()
+
+
+def open_archive(archive_path, root=None):
+    """打开压缩包中的存档；同一压缩包（mtime 与大小不变）的索引只建立一次"""
+    st = os.stat(archive_path)
+    key = (os.path.abspath(archive_path), st.st_mtime_ns, st.st_size, root)
+    with _archives_lock:
+        fs = _open_archives.get(key)
+        if fs is not None:
+            _open_archives.move_to_end(key)
+            return fs
+    cls = ZipFS if zipfile.is_zipfile(archive_path) else TarFS
+    fs = cls(archive_path, root)
+    with _archives_lock:
+        _open_archives[key] = fs
+        while len(_open_archives) > MAX_OPEN_ARCHIVES:
+            # 只移出缓存而不关闭：MinecraftSaver 等可能仍在使用，文件与映射在对象回收时释放
+            _open_archives.popitem(last=False)
+    return fs
+
+
+def open_world_fs(path):
+    """按路径返回存档的文件系统：目录 -> DirectoryFS，压缩包 -> ZipFS/TarFS
+
+    压缩包内有多个存档时，可写作 "backup.zip!/saves/world" 指定其中之一。
+    """
+    archive, sep, inner = path.partition("!")
+    if sep and is_archive(archive):
+        return open_archive(archive, inner.strip("/"))
+    if is_archive(path):
+        return open_archive(path)
+    return DirectoryFS(path)
+
+
+def is_world_path(path):
+    """路径是否可作为存档打开（目录或压缩包）"""
+    return os.path.isdir(path) or is_archive(path.partition("!")[0])
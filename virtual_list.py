@@ -0,0 +1,164 @@
+# virtual_list.py
+
+import itertools
+import tkinter as tk
+from tkinter import font as tkfont
+
+from profiling import SPAN_RENDER, span
+
+
+class RowSource:
+    """虚拟列表的数据源：已加载的行 + 可选的后备迭代器（按页拉取）"""
+
+    def __init__(self, rows=None, iterator=None, page_size=1000):
+        self.rows = list(rows or [])
+        self._iterator = iterator
+        self.page_size = page_size
+
+    @property
+    def exhausted(self):
+        return self._iterator is None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def append(self, rows):
+        self.rows.extend(rows)
+
+    def ensure(self, count):
+        """确保至少加载 count 行（迭代器还有数据时按页拉取）"""
+        while self._iterator is not None and len(self.rows) < count:
+            page = list(itertools.islice(self._iterator, self.page_size))
+            self.rows.extend(page)
+            if len(page) < self.page_size:
+                self._iterator = None
+
+    def slice(self, start, stop):
+        self.ensure(stop)
+        return self.rows[start:stop]
+
+
+class VirtualList(tk.Frame):
+    """只绘制可见行的只读列表，行数再多滚动开销也保持不变
+
+    数据可以一次性给出、逐批 append（扫描进行中），或来自按页拉取的迭代器。
+    停在末尾时追加的新行会自动滚入视图。单击选中一行，Ctrl+C 复制。
+    """
+
+    def __init__(self, master, bg="white", fg="black", font=("微软雅黑", 10), **kwargs):
+        super().__init__(master, bg=bg, **kwargs)
+        self.fg = fg
+        self.font = tkfont.Font(font=font)
+        self.row_height = self.font.metrics("linespace") + 2
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0, takefocus=1)
+        self.scrollbar = tk.Scrollbar(self, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.source = RowSource()
+        self.first = 0
+        self.selected = None
+        self._items = []
+        self._redraw_pending = False
+        self._highlight = self.canvas.create_rectangle(0, 0, 0, 0, fill="#cce8ff", outline="", state="hidden")
+
+        self.canvas.bind("<Configure>", lambda _e: self._schedule_redraw())
+        self.canvas.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda _e: self.yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda _e: self.yview("scroll", 1, "units"))
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Control-c>", lambda _e: self.copy_selected())
+        self.canvas.bind("<Prior>", lambda _e: self.yview("scroll", -1, "pages"))
+        self.canvas.bind("<Next>", lambda _e: self.yview("scroll", 1, "pages"))
+
+    # ===== 数据 =====
+
+    def clear(self):
+        self.set_source(RowSource())
+
+    def set_rows(self, rows):
+        self.set_source(RowSource(rows))
+
+    def set_source(self, source):
+        self.source = source
+        self.first = 0
+        self.selected = None
+        self._schedule_redraw()
+
+    def append(self, rows):
+        """追加行；视图停在末尾时自动跟随"""
+        following = self.first + self.visible_rows() >= len(self.source)
+        self.source.append(rows)
+        if following:
+            self.first = max(0, len(self.source) - self.visible_rows() + 1)
+        self._schedule_redraw()
+
+    def __len__(self):
+        return len(self.source)
+
+    # ===== 滚动与绘制 =====
+
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height + 1)
+
+    def yview(self, *args):
+        """滚动条回调：支持 moveto 与 scroll units/pages"""
+        visible = self.visible_rows()
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.source))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (visible - 1 if args[2] == "pages" else 3)
+            self.first += step
+        # 滚到已加载数据的末尾附近时，从迭代器再拉取一页
+        if not self.source.exhausted:
+            self.source.ensure(self.first + visible * 2)
+        self.first = max(0, min(self.first, len(self.source) - visible + 1))
+        self._schedule_redraw()
+
+    def _schedule_redraw(self):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+    def _redraw(self):
+        self._redraw_pending = False
+        with span(SPAN_RENDER):
+            self._draw_rows()
+
+    def _draw_rows(self):
+        visible = self.visible_rows()
+        if not self.source.exhausted:
+            self.source.ensure(self.first + visible * 2)
+        while len(self._items) < visible:
+            self._items.append(self.canvas.create_text(
+                4, len(self._items) * self.row_height, anchor="nw", font=self.font, fill=self.fg, text=""))
+        rows = self.source.slice(self.first, self.first + visible)
+        for i, item in enumerate(self._items):
+            self.canvas.itemconfigure(item, text=rows[i] if i < len(rows) else "")
+
+        if self.selected is not None and 0 <= self.selected - self.first < visible:
+            y = (self.selected - self.first) * self.row_height
+            self.canvas.coords(self._highlight, 0, y, self.canvas.winfo_width(), y + self.row_height)
+            self.canvas.itemconfigure(self._highlight, state="normal")
+            self.canvas.tag_lower(self._highlight)
+        else:
+            self.canvas.itemconfigure(self._highlight, state="hidden")
+
+        total = len(self.source)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    # ===== 选择 =====
+
+    def _on_click(self, event):
+        self.canvas.focus_set()
+        index = self.first + event.y // self.row_height
+        self.selected = index if index < len(self.source) else None
+        self._schedule_redraw()
+
+    def copy_selected(self):
+        if self.selected is not None:
+            self.clipboard_clear()
+            self.clipboard_append(str(self.source.rows[self.selected]))
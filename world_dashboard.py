@@ -0,0 +1,131 @@
+# world_dashboard.py
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from mc_saver import MinecraftSaver
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".minecraft_archive_viewer", "cache", "dashboard.json")
+
+
+def discover_worlds(root):
+    """找出根目录下所有包含 level.dat 的存档目录（找到存档后不再深入其子目录）"""
+    worlds = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if "level.dat" in filenames:
+            worlds.append(dirpath)
+            dirnames[:] = []
+        else:
+            dirnames.sort()
+    return worlds
+
+
+def directory_size(path):
+    """目录总字节数"""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            continue
+    return total
+
+
+def world_summary(world_path):
+    """总览表格中的一行：名称、最后游玩、大小、游戏模式、难度"""
+    info = MinecraftSaver(world_path, fields=["world_info"]).get_world_info()
+    return {
+        "path": world_path,
+        "name": info["世界名称"],
+        "last_played": info["最后保存时间"],
+        "size": directory_size(world_path),
+        "game_mode": info["游戏模式"],
+        "difficulty": info["世界难度"],
+    }
+
+
+class SummaryCache:
+    """按 level.dat mtime 缓存的存档摘要，保存在本地 JSON 文件中"""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, world_path, mtime):
+        entry = self._entries.get(os.path.abspath(world_path))
+        if entry and entry["mtime"] == mtime:
+            return entry["summary"]
+        return None
+
+    def put(self, world_path, mtime, summary):
+        with self._lock:
+            self._entries[os.path.abspath(world_path)] = {"mtime": mtime, "summary": summary}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+
+def load_summaries(worlds, cache=None, max_workers=8, on_result=None, should_stop=None):
+    """用有界线程池并发读取多个存档的摘要
+
+    缓存命中（level.dat mtime 未变）的存档直接返回；on_result(摘要) 每得到一个结果回调一次，
+    读取失败时摘要中带有 "error" 字段。
+    """
+    cache = cache if cache is not None else SummaryCache()
+    results = []
+
+    def emit(summary):
+        results.append(summary)
+        if on_result:
+            on_result(summary)
+
+    def load(world_path, mtime):
+        summary = world_summary(world_path)
+        cache.put(world_path, mtime, summary)
+        return summary
+
+    pending = []
+    for world_path in worlds:
+        try:
+            mtime = os.path.getmtime(os.path.join(world_path, "level.dat"))
+        except OSError as e:
+            emit({"path": world_path, "error": str(e)})
+            continue
+        cached = cache.get(world_path, mtime)
+        if cached is not None:
+            emit(cached)
+        else:
+            pending.append((world_path, mtime))
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(load, path, mtime): path for path, mtime in pending}
+            for future in as_completed(futures):
+                if should_stop and should_stop():
+                    for f in futures:
+                        f.cancel()
+                    break
+                try:
+                    emit(future.result())
+                except Exception as e:
+                    emit({"path": futures[future], "error": f"{type(e).__name__}: {e}"})
+        cache.save()
+    return results
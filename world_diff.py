@@ -0,0 +1,334 @@
+# world_diff.py
+"""按区块粒度比较两个存档快照（如两次备份）的差异
+
+用法: python -m world_diff <旧存档目录> <新存档目录> [--json] [-j 进程数]
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from blockstates import chunk_level, iter_block_sections, unpack_sections
+from dimensions import discover_dimensions
+from items import block_entity_items, entity_items
+from mc_saver import MinecraftSaver, nbt_json_default
+from region import CHUNKS_PER_REGION, SECTOR_SIZE, RegionFile
+
+# 每个维度中参与比较的区域文件目录
+DIFF_KINDS = ("region", "entities")
+# 每个区块最多列出的方块变化种类
+MAX_BLOCK_CHANGES = 10
+
+STATUS_ADDED = "added"
+STATUS_REMOVED = "removed"
+STATUS_MODIFIED = "modified"
+
+
+def _read_header(path):
+    """区域文件头部 8 KiB（位置表 + 时间戳表）；文件不存在时返回 None"""
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return f.read(2 * SECTOR_SIZE)
+
+
+def _section_names(chunk):
+    """{分段 Y: (调色板方块名列表, 解码后的调色板索引数组)}"""
+    sections = list(iter_block_sections(chunk))
+    decoded = unpack_sections([(len(names), data, spanning) for _y, names, data, spanning in sections])
+    return {y: (names, indices) for (y, names, _data, _spanning), indices in zip(sections, decoded)}
+
+
+def diff_blocks(chunk_a, chunk_b):
+    """逐分段比较方块，返回 {"changed": 变化的方块数, "changes": [(旧方块, 新方块, 数量)]}"""
+    sections_a = _section_names(chunk_a)
+    sections_b = _section_names(chunk_b)
+    air = (["minecraft:air"], np.zeros(4096, dtype=np.uint16))
+    changes = Counter()
+    changed = 0
+    for y in sorted(set(sections_a) | set(sections_b)):
+        names_a, indices_a = sections_a.get(y, air)
+        names_b, indices_b = sections_b.get(y, air)
+        # 把两个调色板映射到同一名称表后再逐方块比较
+        table = {name: i for i, name in enumerate(dict.fromkeys(names_a + names_b))}
+        ids_a = np.array([table[n] for n in names_a], dtype=np.uint32)[indices_a]
+        ids_b = np.array([table[n] for n in names_b], dtype=np.uint32)[indices_b]
+        mask = ids_a != ids_b
+        count = int(mask.sum())
+        if not count:
+            continue
+        changed += count
+        names = list(table)
+        pairs, counts = np.unique(ids_a[mask] * len(names) + ids_b[mask], return_counts=True)
+        for pair, n in zip(pairs.tolist(), counts.tolist()):
+            changes[(names[pair // len(names)], names[pair % len(names)])] += n
+    return {
+        "changed": changed,
+        "changes": [(old, new, n) for (old, new), n in changes.most_common(MAX_BLOCK_CHANGES)],
+    }
+
+
+def _item_counter(items):
+    counter = Counter()
+    for item in items:
+        counter[item["id"]] += item["count"]
+    return counter
+
+
+def _counter_delta(before, after):
+    """两个物品计数之差：({物品: 增加数}, {物品: 减少数})"""
+    return dict(after - before), dict(before - after)
+
+
+def diff_containers(chunk_a, chunk_b):
+    """按坐标比较方块实体中的物品，返回发生变化的容器列表"""
+    def containers(chunk):
+        block_entities = chunk.get("block_entities", chunk_level(chunk).get("TileEntities", []))
+        return {
+            (int(be.get("x", 0)), int(be.get("y", 0)), int(be.get("z", 0))): be
+            for be in block_entities
+        }
+
+    before, after = containers(chunk_a), containers(chunk_b)
+    result = []
+    for pos in sorted(set(before) | set(after)):
+        be_a, be_b = before.get(pos, {}), after.get(pos, {})
+        added, removed = _counter_delta(_item_counter(block_entity_items(be_a)),
+                                        _item_counter(block_entity_items(be_b)))
+        if added or removed or str(be_a.get("id")) != str(be_b.get("id")):
+            result.append({
+                "pos": pos,
+                "id": str(be_b.get("id", be_a.get("id", "?"))),
+                "before": str(be_a["id"]) if be_a else None,
+                "after": str(be_b["id"]) if be_b else None,
+                "items_added": added,
+                "items_removed": removed,
+            })
+    return result
+
+
+def _entity_key(entity):
+    uuid = entity.get("UUID")
+    if uuid is not None:
+        return tuple(int(v) for v in uuid)
+    if "UUIDMost" in entity:
+        return int(entity["UUIDMost"]), int(entity.get("UUIDLeast", 0))
+    pos = entity.get("Pos") or (0, 0, 0)
+    return str(entity.get("id", "?")), tuple(round(float(v), 1) for v in pos)
+
+
+def diff_entities(chunk_a, chunk_b):
+    """按 UUID 比较实体：新增/消失的实体按类型计数，以及实体携带物品的变化"""
+    def entities(chunk):
+        return {_entity_key(e): e for e in chunk.get("Entities", chunk_level(chunk).get("Entities", []))}
+
+    before, after = entities(chunk_a), entities(chunk_b)
+    added = Counter(str(after[k].get("id", "?")) for k in set(after) - set(before))
+    removed = Counter(str(before[k].get("id", "?")) for k in set(before) - set(after))
+    items_added, items_removed = _counter_delta(
+        _item_counter(item for e in before.values() for item in entity_items(e)),
+        _item_counter(item for e in after.values() for item in entity_items(e)),
+    )
+    return {"added": dict(added), "removed": dict(removed),
+            "items_added": items_added, "items_removed": items_removed}
+
+
+def diff_chunk(chunk_a, chunk_b, kind):
+    """解码后的两个区块之间的差异；kind 为区域文件所在目录名（region / entities）"""
+    result = {}
+    if kind == "region":
+        blocks = diff_blocks(chunk_a, chunk_b)
+        if blocks["changed"]:
+            result["blocks"] = blocks
+        containers = diff_containers(chunk_a, chunk_b)
+        if containers:
+            result["containers"] = containers
+    entities = diff_entities(chunk_a, chunk_b)
+    if any(entities.values()):
+        result["entities"] = entities
+    return result
+
+
+def diff_region(relpath, path_a, path_b):
+    """比较同一区域文件的两个版本（在子进程中运行）
+
+    依次比较：区域头部 -> 各区块时间戳 -> 压缩数据字节，只有压缩数据不同的区块才会被解码。
+    """
+    kind = os.path.basename(os.path.dirname(relpath))
+    stats = {"chunks": 0, "compared": 0, "decoded": 0, "bytes": 0}
+    result = {"region": relpath, "chunks": [], "stats": stats}
+    header_a, header_b = _read_header(path_a), _read_header(path_b)
+    if header_a == header_b:
+        # 位置表与时间戳表完全一致：没有任何区块被重新保存
+        return result
+
+    region_a = RegionFile(path_a) if path_a else None
+    region_b = RegionFile(path_b) if path_b else None
+    try:
+        coords = (region_a or region_b).coords or (0, 0)
+        for index in range(CHUNKS_PER_REGION):
+            x, z = index & 31, index >> 5
+            exists_a = region_a is not None and region_a.locations[index] != 0
+            exists_b = region_b is not None and region_b.locations[index] != 0
+            if not exists_a and not exists_b:
+                continue
+            stats["chunks"] += 1
+            record = {"region": relpath, "x": coords[0] * 32 + x, "z": coords[1] * 32 + z}
+            if exists_a != exists_b:
+                record["status"] = STATUS_ADDED if exists_b else STATUS_REMOVED
+                result["chunks"].append(record)
+                continue
+            if region_a.timestamps[index] == region_b.timestamps[index]:
+                continue
+            # 时间戳变化但压缩数据完全相同：区块被重新保存但内容未变
+            stats["compared"] += 1
+            try:
+                raw_a, raw_b = region_a.read_chunk_bytes(x, z), region_b.read_chunk_bytes(x, z)
+                stats["bytes"] += len(raw_a[1]) + len(raw_b[1])
+                if raw_a == raw_b:
+                    continue
+                stats["decoded"] += 1
+                changes = diff_chunk(region_a.read_chunk(x, z), region_b.read_chunk(x, z), kind)
+            except Exception as e:
+                changes = {"error": f"{type(e).__name__}: {e}"}
+            # 解码后没有可识别差异（如只有光照、tick 等数据变化）的区块也会报告
+            record["status"] = STATUS_MODIFIED
+            record.update(changes)
+            result["chunks"].append(record)
+    finally:
+        for region in (region_a, region_b):
+            if region is not None:
+                region.close()
+    return result
+
+
+def diff_level_dat(world_a, world_b):
+    """比较两个存档 level.dat 中 get_world_info 给出的字段：{字段: (旧值, 新值)}"""
+    info_a = MinecraftSaver(world_a, fields=["world_info"]).get_world_info()
+    info_b = MinecraftSaver(world_b, fields=["world_info"]).get_world_info()
+    return {key: (info_a.get(key), info_b.get(key)) for key in info_a if info_a.get(key) != info_b.get(key)}
+
+
+def region_pairs(world_a, world_b):
+    """两个存档中所有区域文件按相对路径配对：[(相对路径, 旧路径或 None, 新路径或 None)]"""
+    pairs = {}
+    for side, world in enumerate((world_a, world_b)):
+        folders = [
+            f"{base}/{kind}" if base else kind
+            for base in discover_dimensions(world).values()
+            for kind in DIFF_KINDS
+        ]
+        for folder in folders:
+            directory = os.path.join(world, folder)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(".mca"):
+                    pairs.setdefault(f"{folder}/{name}", [None, None])[side] = os.path.join(directory, name)
+    return [(rel, a, b) for rel, (a, b) in sorted(pairs.items())]
+
+
+def iter_region_diffs(world_a, world_b, max_workers=None, should_stop=None):
+    """在进程池中并行比较区域文件，每完成一个区域产出 (已完成数, 总数, 结果)"""
+    pairs = region_pairs(world_a, world_b)
+    if not pairs:
+        return
+    workers = max_workers or os.cpu_count() or 1
+    pending = iter(pairs)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = {}
+        while True:
+            while len(in_flight) < workers * 2 and not (should_stop and should_stop()):
+                pair = next(pending, None)
+                if pair is None:
+                    break
+                in_flight[executor.submit(diff_region, *pair)] = pair[0]
+            if not in_flight:
+                return
+            finished, _pending = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                relpath = in_flight.pop(future)
+                done += 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 单个区域文件损坏（如头部截断）时记录错误，继续比较其余区域
+                    result = {"region": relpath, "chunks": [], "stats": {}, "error": f"{type(e).__name__}: {e}"}
+                yield done, len(pairs), result
+
+
+def diff_worlds(world_a, world_b, max_workers=None, progress=None, should_stop=None):
+    """比较两个存档快照
+
+    返回 {"level": level.dat 差异, "chunks": 区块差异列表, "errors": 无法读取的区域 [(相对路径, 错误)], "stats": 统计}
+    """
+    stats = Counter()
+    chunks = []
+    errors = []
+    for done, total, result in iter_region_diffs(world_a, world_b, max_workers, should_stop):
+        stats.update(result["stats"])
+        stats["regions"] += 1
+        chunks.extend(result["chunks"])
+        if "error" in result:
+            errors.append((result["region"], result["error"]))
+        if progress:
+            progress(done, total)
+    chunks.sort(key=lambda c: (c["region"], c["z"], c["x"]))
+    errors.sort()
+    return {"level": diff_level_dat(world_a, world_b), "chunks": chunks, "errors": errors, "stats": dict(stats)}
+
+
+def format_chunk_diff(record):
+    """单个区块差异的一行摘要"""
+    line = f"{record['region']} 区块 ({record['x']}, {record['z']}) {record['status']}"
+    if "blocks" in record:
+        line += f"；方块变化 {record['blocks']['changed']}"
+        line += "（" + "，".join(f"{old.replace('minecraft:', '')}→{new.replace('minecraft:', '')} ×{n}"
+                                for old, new, n in record["blocks"]["changes"][:3]) + "）"
+    if "containers" in record:
+        line += f"；容器变化 {len(record['containers'])}"
+    if "entities" in record:
+        entities = record["entities"]
+        line += f"；实体 +{sum(entities['added'].values())} -{sum(entities['removed'].values())}"
+    if "error" in record:
+        line += f"；解码失败: {record['error']}"
+    return line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="world_diff", description=__doc__.splitlines()[0])
+    parser.add_argument("old", help="旧存档目录")
+    parser.add_argument("new", help="新存档目录")
+    parser.add_argument("--json", action="store_true", help="以 JSON Lines 输出每个发生变化的区块")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    diff = diff_worlds(args.old, args.new, max_workers=args.jobs)
+    if args.json:
+        print(json.dumps({"type": "level", "changes": diff["level"]}, ensure_ascii=False, default=nbt_json_default))
+        for record in diff["chunks"]:
+            print(json.dumps({"type": "chunk", **record}, ensure_ascii=False, default=nbt_json_default))
+        for region, error in diff["errors"]:
+            print(json.dumps({"type": "error", "region": region, "error": error}, ensure_ascii=False))
+    else:
+        for key, (old, new) in diff["level"].items():
+            print(f"level.dat {key}: {old} → {new}")
+        for record in diff["chunks"]:
+            print(format_chunk_diff(record))
+        for region, error in diff["errors"]:
+            print(f"{region} 读取失败: {error}")
+    stats = diff["stats"]
+    print(f"比较 {stats.get('regions', 0)} 个区域文件（头部不同的区域中有 {stats.get('chunks', 0)} 个区块）；"
+          f"{stats.get('compared', 0)} 个区块时间戳不同，其中 {stats.get('decoded', 0)} 个需要解码；"
+          f"{len(diff['chunks'])} 个区块有变化", file=sys.stderr)
+    return 1 if diff["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# world_export.py
+"""流式导出整个世界（level.dat、区块、实体）为 NDJSON 或紧凑 JSON
+
+用法: python -m world_export <存档目录> <输出文件> [--format ndjson|json] [--compress gzip|zstd]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from mc_saver import nbt_json_default
+from nbt_stream import read_nbt_file
+from region import RegionFile, list_region_files
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_JSON = "json"
+
+# 导出的区域文件目录及其记录类型
+_REGION_KINDS = (("region", "chunk"), ("entities", "entities"))
+_SEPARATORS = (",", ":")
+
+
+def detect_compression(path):
+    """按扩展名推断压缩方式"""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def open_output(path, compression=None):
+    """打开二进制输出流，可选 gzip / zstd 压缩（使用较快的压缩级别）"""
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=3)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise RuntimeError("zstd 压缩需要安装 zstandard 库") from e
+        raw = open(path, "wb")
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+    if compression:
+        raise ValueError(f"不支持的压缩方式: {compression}")
+    return open(path, "wb")
+
+
+def encode_record(record):
+    return json.dumps(record, ensure_ascii=False, separators=_SEPARATORS,
+                      default=nbt_json_default).encode("utf-8")
+
+
+def encode_region(path, record_type):
+    """读取并编码单个区域文件中的所有区块（在子进程中运行）
+
+    返回 (编码后的记录列表, 区域文件字节数)；内存占用以单个区域为上限。
+    """
+    lines = []
+    with RegionFile(path) as region:
+        rx, rz = region.coords or (0, 0)
+        for x, z in region.iter_chunks():
+            record = {"type": record_type, "x": rx * 32 + x, "z": rz * 32 + z}
+            try:
+                record["data"] = region.read_chunk(x, z)
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+            lines.append(encode_record(record))
+    return lines, os.path.getsize(path)
+
+
+def _ordered_map(executor, func, items, limit):
+    """按提交顺序产出结果，同时在途任务不超过 limit 个"""
+    pending = deque()
+    items = iter(items)
+    for item in items:
+        pending.append(executor.submit(func, *item))
+        if len(pending) >= limit:
+            break
+    while pending:
+        yield pending.popleft().result()
+        for item in items:
+            pending.append(executor.submit(func, *item))
+            break
+
+
+def iter_encoded_records(world_path, max_workers=None):
+    """生成器管线：依次产出 (编码后的记录, 读取的源文件字节数)"""
+    level_path = os.path.join(world_path, "level.dat")
+    yield encode_record({"type": "level", "data": read_nbt_file(level_path)}), os.path.getsize(level_path)
+
+    jobs = [
+        (path, record_type)
+        for kind, record_type in _REGION_KINDS
+        for path in list_region_files(os.path.join(world_path, kind))
+    ]
+    if not jobs:
+        return
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for lines, source_bytes in _ordered_map(executor, encode_region, jobs, workers * 2):
+            for i, line in enumerate(lines):
+                # 区域文件的字节数计在其最后一条记录上
+                yield line, source_bytes if i == len(lines) - 1 else 0
+            if not lines:
+                yield None, source_bytes
+
+
+def export_world(world_path, out_path, fmt=FORMAT_NDJSON, compression=None,
+                 progress=None, should_stop=None, max_workers=None):
+    """把整个世界流式写入磁盘，内存占用与世界大小无关
+
+    progress(统计字典) 每写完一个区域左右回调一次；should_stop() 返回 True 时中止。
+    先写入 out_path + ".tmp"，完整写完后才替换为 out_path；中止或出错时删除临时文件，
+    不会留下被截断的输出。返回统计：记录数、读取/写出字节数、耗时、吞吐量 (MB/s)
+    与是否被中止 (cancelled)。
+    """
+    if compression is None:
+        compression = detect_compression(out_path)
+    stats = {"records": 0, "source_bytes": 0, "json_bytes": 0, "seconds": 0.0, "cancelled": False}
+    start = time.perf_counter()
+    tmp_path = out_path + ".tmp"
+    try:
+        with open_output(tmp_path, compression) as out:
+            if fmt == FORMAT_JSON:
+                out.write(b"[")
+            for line, source_bytes in iter_encoded_records(world_path, max_workers):
+                if line is not None:
+                    if fmt == FORMAT_JSON:
+                        if stats["records"]:
+                            out.write(b",")
+                        out.write(line)
+                    else:
+                        out.write(line + b"\n")
+                    stats["records"] += 1
+                    stats["json_bytes"] += len(line) + 1
+                if source_bytes:
+                    stats["source_bytes"] += source_bytes
+                    if should_stop and should_stop():
+                        stats["cancelled"] = True
+                        break
+                    if progress:
+                        progress(_with_throughput(stats, start))
+            if fmt == FORMAT_JSON:
+                out.write(b"]")
+        if stats["cancelled"]:
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return _with_throughput(stats, start)
+
+
+def _with_throughput(stats, start):
+    seconds = max(time.perf_counter() - start, 1e-9)
+    stats["seconds"] = seconds
+    stats["source_mb_per_s"] = stats["source_bytes"] / seconds / 1024 / 1024
+    stats["json_mb_per_s"] = stats["json_bytes"] / seconds / 1024 / 1024
+    return dict(stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="world_export", description=__doc__.splitlines()[0])
+    parser.add_argument("world", help="存档目录")
+    parser.add_argument("output", help="输出文件（.gz / .zst 结尾时自动压缩）")
+    parser.add_argument("--format", choices=(FORMAT_NDJSON, FORMAT_JSON), default=FORMAT_NDJSON)
+    parser.add_argument("--compress", choices=("gzip", "zstd"), default=None)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    stats = export_world(args.world, args.output, args.format, args.compress, max_workers=args.jobs)
+    print(f"导出 {stats['records']} 条记录，用时 {stats['seconds']:.2f} 秒；"
+          f"读取 {stats['source_bytes'] / 1024 / 1024:.1f} MB ({stats['source_mb_per_s']:.1f} MB/s)，"
+          f"写出 JSON {stats['json_bytes'] / 1024 / 1024:.1f} MB ({stats['json_mb_per_s']:.1f} MB/s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,555 @@
+# world_index.py
+"""存档的本地 SQLite 索引：区块方块直方图、方块实体位置与物品倒排索引，增量更新
+
+查询只读已有索引，不会触发扫描；可一次在多个存档中查找物品。
+
+用法:
+    python -m world_index refresh "saves/*"
+    python -m world_index items "saves/*" --item netherite_block
+    python -m world_index items "saves/*" --enchant sharpness --level 5
+    python -m world_index totals saves/MyWorld [--limit 30]
+    python -m world_index block-entities saves/MyWorld chest
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from archive_cli import expand_world_paths
+from blockstates import chunk_level, iter_block_sections, unpack_sections
+from items import block_entity_items, entity_items, flatten_items
+from mc_saver import MinecraftSaver, nbt_json_default, nbt_to_primitive
+from nbt_stream import read_nbt_paths
+from region import RegionFile, list_region_files
+from world_scan import normalize_id
+
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".minecraft_archive_viewer", "index")
+SCHEMA_VERSION = 1
+
+# 建索引时只读取这些区块标签，其余内容跳过
+_REGION_PATHS = ("DataVersion", "sections", "Level.Sections", "block_entities",
+                 "Level.TileEntities", "Level.Entities")
+_ENTITY_PATHS = ("Entities",)
+# 玩家文件中参与物品索引的标签：playerdata/<uuid>.dat 为根标签，level.dat 在 Data.Player 下
+_PLAYER_ITEM_KEYS = (("Inventory", "inventory"), ("EnderItems", "ender_chest"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS regions (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    region TEXT NOT NULL,
+    x INTEGER NOT NULL,
+    z INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    entity_count INTEGER NOT NULL DEFAULT 0,
+    error INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (region, x, z)
+);
+CREATE TABLE IF NOT EXISTS chunk_blocks (
+    region TEXT NOT NULL,
+    x INTEGER NOT NULL,
+    z INTEGER NOT NULL,
+    block TEXT NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunk_blocks_chunk ON chunk_blocks (region, x, z);
+CREATE INDEX IF NOT EXISTS chunk_blocks_block ON chunk_blocks (block);
+CREATE TABLE IF NOT EXISTS block_entities (
+    region TEXT NOT NULL,
+    x INTEGER NOT NULL,
+    z INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    bx INTEGER NOT NULL,
+    by INTEGER NOT NULL,
+    bz INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS block_entities_chunk ON block_entities (region, x, z);
+CREATE INDEX IF NOT EXISTS block_entities_id ON block_entities (id);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    region TEXT NOT NULL,
+    x INTEGER NOT NULL,
+    z INTEGER NOT NULL,
+    item TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    container TEXT NOT NULL,
+    px REAL,
+    py REAL,
+    pz REAL,
+    name TEXT
+);
+CREATE INDEX IF NOT EXISTS items_chunk ON items (region, x, z);
+CREATE INDEX IF NOT EXISTS items_item ON items (item);
+CREATE INDEX IF NOT EXISTS items_name ON items (name) WHERE name IS NOT NULL;
+CREATE TABLE IF NOT EXISTS item_enchantments (
+    item_row INTEGER NOT NULL,
+    enchantment TEXT NOT NULL,
+    level INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS item_enchantments_row ON item_enchantments (item_row);
+CREATE INDEX IF NOT EXISTS item_enchantments_id ON item_enchantments (enchantment, level);
+"""
+
+
+def index_path_for(world_path):
+    """每个存档对应一个独立的 SQLite 索引文件"""
+    world_path = os.path.abspath(world_path)
+    digest = hashlib.sha1(world_path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(INDEX_DIR, f"{os.path.basename(world_path) or 'world'}-{digest}.sqlite")
+
+
+def block_histogram(chunk):
+    """区块方块直方图 {方块名: 数量}"""
+    sections = list(iter_block_sections(chunk))
+    decoded = unpack_sections([(len(names), data, spanning) for _y, names, data, spanning in sections])
+    totals = {}
+    for (_y, names, _data, _spanning), indices in zip(sections, decoded):
+        counts = np.bincount(indices, minlength=len(names))
+        for name, count in zip(names, counts.tolist()):
+            if count:
+                totals[name] = totals.get(name, 0) + count
+    return totals
+
+
+def index_region(path, kind, known):
+    """为单个区域文件中时间戳变化的区块生成聚合数据（在子进程中运行）
+
+    known 为 {(区域内 x, z): 已索引的时间戳}，时间戳未变的区块直接跳过。
+    """
+    present = []
+    changed = []
+    with RegionFile(path) as region:
+        rx, rz = region.coords or (0, 0)
+        for x, z in region.iter_chunks():
+            timestamp = region.chunk_timestamp(x, z)
+            present.append((x, z))
+            if known.get((x, z)) == timestamp:
+                continue
+            record = {
+                "x": rx * 32 + x, "z": rz * 32 + z, "timestamp": timestamp,
+                "entity_count": 0, "error": 0, "blocks": {}, "block_entities": [], "items": [],
+            }
+            try:
+                paths = _ENTITY_PATHS if kind == "entities" else _REGION_PATHS
+                chunk = region.read_chunk_tags(x, z, paths) or {}
+                level = chunk_level(chunk)
+                entities = chunk.get("Entities", level.get("Entities", []))
+                record["entity_count"] = len(entities)
+                for entity in entities:
+                    pos = entity.get("Pos") or (None, None, None)
+                    record["items"].extend((item, tuple(pos)) for item in entity_items(entity))
+                if kind == "region":
+                    record["blocks"] = block_histogram(chunk)
+                    for entity in chunk.get("block_entities", level.get("TileEntities", [])):
+                        pos = (int(entity.get("x", 0)), int(entity.get("y", 0)), int(entity.get("z", 0)))
+                        record["block_entities"].append((str(entity.get("id", "")), *pos))
+                        record["items"].extend((item, pos) for item in block_entity_items(entity))
+            except Exception:
+                record["error"] = 1
+            changed.append(record)
+    return {"path": path, "kind": kind, "present": present, "chunks": changed}
+
+
+def index_player_file(path, kind):
+    """提取玩家文件（playerdata/<uuid>.dat 或 level.dat）中背包与末影箱的物品（在子进程中运行）"""
+    prefix = "Data.Player." if kind == "level" else ""
+    paths = [prefix + "Pos"] + [prefix + key for key, _where in _PLAYER_ITEM_KEYS]
+    items = []
+    error = 0
+    try:
+        tags = read_nbt_paths(path, paths)
+        pos = tuple(tags.get(prefix + "Pos") or (None, None, None))
+        owner = "level.dat" if kind == "level" else os.path.splitext(os.path.basename(path))[0]
+        for key, where in _PLAYER_ITEM_KEYS:
+            items.extend((item, pos) for item in flatten_items(tags.get(prefix + key, []), f"player:{owner}/{where}"))
+    except Exception:
+        error = 1
+    return {"path": path, "kind": kind, "items": items, "error": error}
+
+
+class WorldIndex:
+    """存档的持久化 SQLite 侧车索引
+
+    refresh() 只重新扫描 mtime/大小变化的区域文件，
+    并且只解码其中头部时间戳变化的区块。
+    """
+
+    def __init__(self, world_path, index_path=None):
+        self.world_path = os.path.abspath(world_path)
+        self.index_path = index_path or index_path_for(world_path)
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        self.db = sqlite3.connect(self.index_path)
+        self.db.executescript(_SCHEMA)
+        if self.get_meta("schema_version") != str(SCHEMA_VERSION):
+            self._reset()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _reset(self):
+        with self.db:
+            for table in ("meta", "regions", "chunks", "chunk_blocks", "block_entities", "items", "item_enchantments"):
+                self.db.execute(f"DELETE FROM {table}")
+            self.set_meta("schema_version", SCHEMA_VERSION)
+
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _relpath(self, path):
+        return os.path.relpath(path, self.world_path).replace(os.sep, "/")
+
+    # ===== 刷新 =====
+
+    def refresh_level_dat(self, saver=None):
+        """level.dat 的 mtime 变化时才重新读取世界摘要；saver 为已读取该 level.dat 的 MinecraftSaver"""
+        level_path = os.path.join(self.world_path, "level.dat")
+        mtime = os.path.getmtime(level_path)
+        if self.get_meta("level_dat_mtime") == repr(mtime):
+            return False
+        saver = saver or MinecraftSaver(self.world_path)
+        summary = nbt_to_primitive({
+            "world_info": saver.get_world_info(),
+            "player_pos": saver.get_player_position(),
+            "dimension": saver.get_dimension(),
+            "inventory": saver.get_player_inventory(),
+        })
+        with self.db:
+            self.set_meta("summary", json.dumps(summary, ensure_ascii=False, default=nbt_json_default))
+            self.set_meta("level_dat_mtime", repr(mtime))
+        return True
+
+    def _source_files(self):
+        """参与索引的文件：区域文件、实体区域文件、玩家数据与 level.dat"""
+        for kind in ("region", "entities"):
+            for path in list_region_files(os.path.join(self.world_path, kind)):
+                yield path, kind
+        playerdata = os.path.join(self.world_path, "playerdata")
+        if os.path.isdir(playerdata):
+            for name in sorted(os.listdir(playerdata)):
+                if name.endswith(".dat"):
+                    yield os.path.join(playerdata, name), "playerdata"
+        level_path = os.path.join(self.world_path, "level.dat")
+        if os.path.exists(level_path):
+            yield level_path, "level"
+
+    def _changed_region_files(self):
+        """返回 (需要重新扫描的 [(路径, 类型)], 已不存在的文件键)"""
+        stored = {row[0]: (row[1], row[2]) for row in self.db.execute("SELECT path, mtime, size FROM regions")}
+        changed = []
+        seen = set()
+        for path, kind in self._source_files():
+            key = self._relpath(path)
+            seen.add(key)
+            st = os.stat(path)
+            if stored.get(key) != (st.st_mtime, st.st_size):
+                changed.append((path, kind))
+        return changed, set(stored) - seen
+
+    def _known_timestamps(self, key):
+        rows = self.db.execute("SELECT x, z, timestamp FROM chunks WHERE region = ?", (key,))
+        return {(x & 31, z & 31): timestamp for x, z, timestamp in rows}
+
+    def _delete_chunks(self, key, coords=None):
+        if coords is None:
+            self.db.execute("DELETE FROM item_enchantments WHERE item_row IN "
+                            "(SELECT id FROM items WHERE region = ?)", (key,))
+        else:
+            self.db.executemany("DELETE FROM item_enchantments WHERE item_row IN "
+                                "(SELECT id FROM items WHERE region = ? AND x = ? AND z = ?)",
+                                [(key, x, z) for x, z in coords])
+        for table in ("chunks", "chunk_blocks", "block_entities", "items"):
+            if coords is None:
+                self.db.execute(f"DELETE FROM {table} WHERE region = ?", (key,))
+            else:
+                self.db.executemany(f"DELETE FROM {table} WHERE region = ? AND x = ? AND z = ?",
+                                    [(key, x, z) for x, z in coords])
+
+    def _store_region(self, result):
+        path = result["path"]
+        key = self._relpath(path)
+        # 区块以全局坐标存储，按区域内坐标判断哪些区块已被删除
+        present = set(result["present"])
+        with self.db:
+            stored = self.db.execute("SELECT x, z FROM chunks WHERE region = ?", (key,)).fetchall()
+            removed = {(x, z) for x, z in stored if (x & 31, z & 31) not in present}
+            changed = {(c["x"], c["z"]) for c in result["chunks"]}
+            self._delete_chunks(key, removed | changed)
+            for c in result["chunks"]:
+                self.db.execute(
+                    "INSERT INTO chunks (region, x, z, timestamp, entity_count, error) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, c["x"], c["z"], c["timestamp"], c["entity_count"], c["error"]))
+                self.db.executemany(
+                    "INSERT INTO chunk_blocks (region, x, z, block, count) VALUES (?, ?, ?, ?, ?)",
+                    [(key, c["x"], c["z"], block, count) for block, count in c["blocks"].items()])
+                self.db.executemany(
+                    "INSERT INTO block_entities (region, x, z, id, bx, by, bz) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(key, c["x"], c["z"], *entity) for entity in c["block_entities"]])
+                self._insert_items(key, c["x"], c["z"], c["items"])
+            st = os.stat(path)
+            self.db.execute("INSERT OR REPLACE INTO regions (path, kind, mtime, size) VALUES (?, ?, ?, ?)",
+                            (key, result["kind"], st.st_mtime, st.st_size))
+
+    def _insert_items(self, key, x, z, items):
+        for item, (px, py, pz) in items:
+            row = self.db.execute(
+                "INSERT INTO items (region, x, z, item, count, container, px, py, pz, name) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, x, z, item["id"], item["count"], item["where"], px, py, pz, item["name"])).lastrowid
+            if item["enchantments"]:
+                self.db.executemany("INSERT INTO item_enchantments (item_row, enchantment, level) VALUES (?, ?, ?)",
+                                    [(row, eid, level) for eid, level in item["enchantments"]])
+
+    def _store_player_file(self, result):
+        """玩家文件作为一个整体存储（x = z = 0），文件变化时整体替换"""
+        path = result["path"]
+        key = self._relpath(path)
+        with self.db:
+            self._delete_chunks(key)
+            self.db.execute(
+                "INSERT INTO chunks (region, x, z, timestamp, entity_count, error) VALUES (?, 0, 0, 0, 0, ?)",
+                (key, result["error"]))
+            self._insert_items(key, 0, 0, result["items"])
+            st = os.stat(path)
+            self.db.execute("INSERT OR REPLACE INTO regions (path, kind, mtime, size) VALUES (?, ?, ?, ?)",
+                            (key, result["kind"], st.st_mtime, st.st_size))
+
+    def refresh(self, progress=None, max_workers=None):
+        """增量刷新索引，progress(已完成, 总数) 用于进度回调
+
+        返回 {"regions": 重新扫描的区域数, "chunks": 重新解码的区块数, "removed": 删除的区域数,
+        "errors": 读取失败的文件 [(相对路径, 错误)]}。失败的文件不记录 mtime，下次刷新时重试。
+        """
+        self.refresh_level_dat()
+        changed, removed = self._changed_region_files()
+        with self.db:
+            for key in removed:
+                self._delete_chunks(key)
+                self.db.execute("DELETE FROM regions WHERE path = ?", (key,))
+
+        stats = {"regions": len(changed), "chunks": 0, "removed": len(removed), "errors": []}
+        if not changed:
+            return stats
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(index_region, path, kind, self._known_timestamps(self._relpath(path)))
+                if kind in ("region", "entities") else executor.submit(index_player_file, path, kind): path
+                for path, kind in changed
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 单个文件损坏或进程池异常时记录错误，继续处理其余文件
+                    stats["errors"].append((self._relpath(futures[future]), f"{type(e).__name__}: {e}"))
+                    if progress:
+                        progress(done, len(futures))
+                    continue
+                if "chunks" in result:
+                    self._store_region(result)
+                    stats["chunks"] += len(result["chunks"])
+                else:
+                    self._store_player_file(result)
+                if progress:
+                    progress(done, len(futures))
+        return stats
+
+    # ===== 查询 =====
+
+    def summary(self):
+        value = self.get_meta("summary")
+        return json.loads(value) if value else None
+
+    def fresh_summary(self):
+        """level.dat 在上次读取后没有变化时返回索引中的世界摘要，否则返回 None"""
+        mtime = os.path.getmtime(os.path.join(self.world_path, "level.dat"))
+        if self.get_meta("level_dat_mtime") != repr(mtime):
+            return None
+        return self.summary()
+
+    def chunk_count(self):
+        return self.db.execute("SELECT COUNT(*) FROM chunks c JOIN regions r ON c.region = r.path "
+                               "WHERE r.kind = 'region'").fetchone()[0]
+
+    def block_totals(self, limit=None):
+        """全世界方块总数，按数量降序"""
+        sql = "SELECT block, SUM(count) AS total FROM chunk_blocks GROUP BY block ORDER BY total DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.db.execute(sql).fetchall()
+
+    def entity_total(self):
+        return self.db.execute("SELECT COALESCE(SUM(entity_count), 0) FROM chunks").fetchone()[0]
+
+    def find_block_entities(self, block_entity_id):
+        """某类方块实体的全部位置：[(ID, x, y, z)]"""
+        return self.db.execute("SELECT id, bx, by, bz FROM block_entities WHERE id = ? ORDER BY bx, bz, by",
+                               (normalize_id(block_entity_id),)).fetchall()
+
+    def find_items(self, item_id=None, enchantment=None, min_level=None, name=None, limit=None):
+        """在物品倒排索引中查找物品（各条件可组合）
+
+        name 为自定义名称的子串。返回
+        [{"item", "count", "container", "pos", "name", "source", "enchantments"}]，
+        source 为区域文件或玩家文件的相对路径。
+        """
+        sql = "SELECT i.id, i.item, i.count, i.container, i.px, i.py, i.pz, i.name, i.region FROM items i"
+        where, params = [], []
+        if item_id:
+            where.append("i.item = ?")
+            params.append(normalize_id(item_id))
+        if enchantment:
+            where.append("i.id IN (SELECT item_row FROM item_enchantments WHERE enchantment = ? AND level >= ?)")
+            params += [normalize_id(enchantment), min_level or 0]
+        if name:
+            where.append("i.name LIKE ?")
+            params.append(f"%{name}%")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY i.count DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        rows = self.db.execute(sql, params).fetchall()
+
+        enchantments = {}
+        ids = [row[0] for row in rows]
+        # 分批查询附魔，避免超过 SQLite 的参数个数上限
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            for row_id, eid, level in self.db.execute(
+                    f"SELECT item_row, enchantment, level FROM item_enchantments "
+                    f"WHERE item_row IN ({','.join('?' * len(batch))})", batch):
+                enchantments.setdefault(row_id, []).append((eid, level))
+        return [{
+            "item": item, "count": count, "container": container, "pos": (px, py, pz),
+            "name": item_name, "source": source, "enchantments": enchantments.get(row_id, []),
+        } for row_id, item, count, container, px, py, pz, item_name, source in rows]
+
+    def item_totals(self, limit=None):
+        """全世界各物品总数（含容器与玩家），按数量降序"""
+        sql = "SELECT item, SUM(count) AS total FROM items GROUP BY item ORDER BY total DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self.db.execute(sql).fetchall()
+
+
+def _open_existing(world_path):
+    """打开已建立的索引；没有索引时返回 None"""
+    if not os.path.exists(index_path_for(world_path)):
+        return None
+    return WorldIndex(world_path)
+
+
+def find_items_in_worlds(world_paths, **query):
+    """在多个存档的已有索引中查找物品（不触发扫描）：[(存档路径, 结果)]
+
+    没有索引的存档直接跳过；查询条件同 WorldIndex.find_items。
+    """
+    results = []
+    for world_path in world_paths:
+        index = _open_existing(world_path)
+        if index is None:
+            continue
+        with index:
+            results.extend((world_path, hit) for hit in index.find_items(**query))
+    return results
+
+
+def format_item_hit(hit):
+    """物品搜索结果的一行：物品 ×数量、坐标、所在容器、名称与附魔（以制表符分隔）"""
+    x, y, z = (f"{v:.0f}" if v is not None else "?" for v in hit["pos"])
+    enchantments = ", ".join(f"{e.replace('minecraft:', '')} {level}" for e, level in hit["enchantments"])
+    return "\t".join((f"{hit['item'].replace('minecraft:', '')} ×{hit['count']}", x, y, z,
+                      hit["container"], hit["name"] or "", enchantments))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="world_index", description="存档的本地索引：增量更新与跨存档物品搜索")
+    sub = parser.add_subparsers(dest="command", required=True)
+    refresh = sub.add_parser("refresh", help="增量更新索引（只重新扫描变化的区域与区块）")
+    refresh.add_argument("paths", nargs="+", help="存档目录或通配符")
+    refresh.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    items = sub.add_parser("items", help="在已建立索引的存档中查找物品")
+    items.add_argument("paths", nargs="+", help="存档目录或通配符；没有索引的存档会被跳过")
+    items.add_argument("--item", default=None, help="物品 ID，如 netherite_block")
+    items.add_argument("--enchant", default=None, help="附魔 ID，如 sharpness")
+    items.add_argument("--level", type=int, default=None, help="附魔的最低等级")
+    items.add_argument("--name", default=None, help="自定义名称包含的文字")
+    items.add_argument("--limit", type=int, default=None, help="每个存档最多列出的结果数")
+    totals = sub.add_parser("totals", help="各物品总数（含容器与玩家）")
+    totals.add_argument("world", help="存档目录")
+    totals.add_argument("--limit", type=int, default=30)
+    block_entities = sub.add_parser("block-entities", help="某类方块实体（如 chest）的全部位置")
+    block_entities.add_argument("world", help="存档目录")
+    block_entities.add_argument("id")
+    args = parser.parse_args(argv)
+
+    if args.command == "refresh":
+        failed = 0
+        for world_path in expand_world_paths(args.paths):
+            try:
+                with WorldIndex(world_path) as index:
+                    stats = index.refresh(max_workers=args.jobs)
+            except FileNotFoundError as e:
+                print(f"{world_path}\t找不到文件: {e.filename}", file=sys.stderr)
+                failed += 1
+                continue
+            except Exception as e:
+                print(f"{world_path}\t{type(e).__name__}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            print(f"{world_path}\t重新扫描 {stats['regions']} 个文件，{stats['chunks']} 个区块", file=sys.stderr)
+            for path, error in stats["errors"]:
+                print(f"{world_path}\t{path} 读取失败: {error}", file=sys.stderr)
+            failed += bool(stats["errors"])
+        return 1 if failed else 0
+
+    if args.command == "items":
+        if not (args.item or args.enchant or args.name):
+            parser.error("至少需要 --item、--enchant 或 --name 之一")
+        hits = find_items_in_worlds(expand_world_paths(args.paths), item_id=args.item, enchantment=args.enchant,
+                                    min_level=args.level, name=args.name, limit=args.limit)
+        for world_path, hit in hits:
+            print(f"{world_path}\t{format_item_hit(hit)}")
+        print(f"共 {len(hits)} 条结果", file=sys.stderr)
+        return 0
+
+    index = _open_existing(args.world)
+    if index is None:
+        print(f"{args.world} 还没有索引，请先运行 python -m world_index refresh", file=sys.stderr)
+        return 1
+    with index:
+        if args.command == "totals":
+            for item, total in index.item_totals(args.limit):
+                print(f"{item}\t{total}")
+        else:
+            for block_entity_id, x, y, z in index.find_block_entities(args.id):
+                print(f"{block_entity_id}\t{x}\t{y}\t{z}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
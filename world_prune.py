@@ -0,0 +1,388 @@
+# world_prune.py
+"""按 InhabitedTime 清理区块并压缩区域文件
+
+玩家只是飞过的区块 InhabitedTime（玩家在区块附近停留的累计刻数）很小，却占据了
+大部分存档体积。扫描只读取区域头部与每个区块的 InhabitedTime/LastUpdate 两个标签
+（读到即停止解压），按区域文件并行，结果按区域文件缓存；默认只输出可回收空间的报告。
+
+--apply 时在进程池中逐个区域重写文件：去掉选中的区块（同时去掉 entities/ 与 poi/
+中对应的记录），其余区块原样复制、紧密排列，先写临时文件再替换。
+请在服务器关闭时执行，并事先备份。
+
+用法:
+    python -m world_prune <存档目录> [--max-inhabited 1200] [--keep-radius 16] [--idle-ticks 0]
+    python -m world_prune <存档目录> --dimension minecraft:overworld --apply
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from dimensions import DATA_KINDS, KIND_REGION, OVERWORLD, dimension_label, discover_dimensions, normalize_dimension
+from nbt_stream import read_nbt_paths
+from region import (
+    CHUNKS_PER_REGION, EXTERNAL_FLAG, SECTOR_SIZE, RegionFile, list_region_files, region_coords, sectors_for,
+    write_region_file,
+)
+from vfs import is_archive
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".minecraft_archive_viewer", "cache", "prune")
+CACHE_VERSION = 1
+
+# 默认清理累计停留不足 1 分钟（1200 刻）的区块
+DEFAULT_MAX_INHABITED = 1200
+
+_NEW_PATHS = ("InhabitedTime", "LastUpdate")
+_OLD_PATHS = ("Level.InhabitedTime", "Level.LastUpdate")
+# 扫描结果的列：[头部索引, 时间戳, InhabitedTime, LastUpdate, 所需扇区数, 读取失败]
+_COLUMNS = 6
+
+
+def _chunk_times(region, x, z, paths):
+    """读取区块的 (InhabitedTime, LastUpdate, 实际使用的路径)；缺少标签时为 -1
+
+    1.18 前后标签位置不同，先按上一个区块的格式读取，找不到时再试另一种。
+    """
+    for candidate in (paths, _OLD_PATHS if paths is _NEW_PATHS else _NEW_PATHS):
+        found = region.read_chunk_paths(x, z, candidate)
+        if found and candidate[0] in found:
+            return int(found[candidate[0]]), int(found.get(candidate[1], -1)), candidate
+    return -1, -1, paths
+
+
+def scan_region(path):
+    """扫描单个区域文件（在子进程中运行）
+
+    返回 {"path", "size", "chunks": (n, 6) [头部索引, 时间戳, InhabitedTime, LastUpdate, 扇区数, 读取失败],
+    "siblings": {类型: (文件大小, 各区块扇区数 (1024,))}}，siblings 为同名的 entities/ 与 poi/ 文件。
+    """
+    rows = []
+    paths = _NEW_PATHS
+    with RegionFile(path) as region:
+        for x, z in region.iter_chunks():
+            index = region.index(x, z)
+            error = 0
+            inhabited = last_update = -1
+            try:
+                sectors = sectors_for(len(region.read_chunk_entry(x, z)))
+                inhabited, last_update, paths = _chunk_times(region, x, z, paths)
+            except Exception:
+                sectors = region.sector_span(x, z)[1]
+                error = 1
+            rows.append((index, region.chunk_timestamp(x, z), inhabited, last_update, sectors, error))
+    siblings = {}
+    folder = os.path.dirname(os.path.dirname(path))
+    for kind in DATA_KINDS:
+        sibling = os.path.join(folder, kind, os.path.basename(path))
+        if kind == KIND_REGION or not os.path.isfile(sibling):
+            continue
+        with RegionFile(sibling) as region:
+            siblings[kind] = (os.path.getsize(sibling),
+                              np.array([loc & 0xFF for loc in region.locations], dtype=np.int64))
+    return {
+        "path": path,
+        "size": os.path.getsize(path),
+        "chunks": np.array(rows, dtype=np.int64).reshape(-1, _COLUMNS),
+        "siblings": siblings,
+    }
+
+
+def scan_region_cached(path, cache_dir):
+    """带磁盘缓存的 scan_region：区域文件及其 entities/、poi/ 文件的 mtime/大小未变时直接读取 .npz"""
+    folder = os.path.dirname(os.path.dirname(path))
+    stamp = [CACHE_VERSION]
+    for kind in DATA_KINDS:
+        try:
+            st = os.stat(os.path.join(folder, kind, os.path.basename(path)))
+            stamp += [st.st_mtime_ns, st.st_size]
+        except OSError:
+            stamp += [0, 0]
+    stamp = np.array(stamp, dtype=np.int64)
+    cache_path = os.path.join(cache_dir, os.path.basename(path) + ".npz")
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if np.array_equal(cached["stamp"], stamp):
+                siblings = {
+                    kind: (int(cached[f"{kind}_size"]), cached[f"{kind}_sectors"])
+                    for kind in DATA_KINDS if f"{kind}_size" in cached
+                }
+                return {"path": path, "size": int(cached["size"]), "chunks": cached["chunks"], "siblings": siblings}
+    except (OSError, KeyError, ValueError):
+        pass
+    result = scan_region(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp.npz"
+    extra = {}
+    for kind, (size, sectors) in result["siblings"].items():
+        extra[f"{kind}_size"] = size
+        extra[f"{kind}_sectors"] = sectors
+    np.savez(tmp_path, stamp=stamp, size=result["size"], chunks=result["chunks"], **extra)
+    os.replace(tmp_path, cache_path)
+    return result
+
+
+def compact_file(path, remove, expected=None):
+    """重写单个区域文件：去掉 remove 中的区块（头部索引），其余区块原样复制并紧密排列
+
+    expected 为 {头部索引: 扫描时的时间戳}，扫描后被游戏重新保存过的区块会被保留。
+    全部区块都被去掉时删除该文件。返回 (实际去掉的索引, 原大小, 新大小)。
+    """
+    before = os.path.getsize(path)
+    entries = {}
+    removed = []
+    external = []
+    with RegionFile(path) as region:
+        rx, rz = region.coords or (0, 0)
+        for x, z in region.iter_chunks():
+            index = region.index(x, z)
+            timestamp = region.chunk_timestamp(x, z)
+            entry = region.read_chunk_entry(x, z)
+            if index in remove and (expected is None or expected.get(index) == timestamp):
+                removed.append(index)
+                if entry[4] & EXTERNAL_FLAG:
+                    external.append(f"c.{rx * 32 + x}.{rz * 32 + z}.mcc")
+            else:
+                entries[index] = (timestamp, entry)
+    if not removed and before == 2 * SECTOR_SIZE + sum(sectors_for(len(e)) for _t, e in entries.values()) * SECTOR_SIZE:
+        return removed, before, before
+    if entries:
+        after = write_region_file(path, entries)
+    else:
+        os.remove(path)
+        after = 0
+    for name in external:
+        try:
+            os.remove(os.path.join(os.path.dirname(path), name))
+        except FileNotFoundError:
+            pass
+    return removed, before, after
+
+
+def compact_region(path, remove, expected):
+    """重写区域文件及同名的 entities/、poi/ 文件（在子进程中运行）
+
+    只有 region/ 中实际去掉的区块才会从 entities/ 与 poi/ 中去掉。
+    返回 {"path", "removed", "before", "after"}，大小为三类文件之和。
+    """
+    removed, before, after = compact_file(path, set(remove), expected)
+    folder = os.path.dirname(os.path.dirname(path))
+    for kind in DATA_KINDS:
+        sibling = os.path.join(folder, kind, os.path.basename(path))
+        if kind == KIND_REGION or not os.path.isfile(sibling):
+            continue
+        _removed, sibling_before, sibling_after = compact_file(sibling, set(removed))
+        before += sibling_before
+        after += sibling_after
+    return {"path": path, "removed": len(removed), "before": before, "after": after}
+
+
+class PrunePlan:
+    """清理计划：各区域文件要去掉的区块与预计回收的空间"""
+
+    def __init__(self):
+        # [(维度, 区域文件, 要去掉的头部索引, {索引: 时间戳})]
+        self.regions = []
+        self.chunks = 0
+        self.selected = 0
+        self.errors = 0
+        self.failed_regions = 0
+        self.size = 0
+        self.pruned_bytes = 0
+        self.compacted_bytes = 0
+        self.by_dimension = {}
+
+    @property
+    def reclaimed_bytes(self):
+        return self.pruned_bytes + self.compacted_bytes
+
+    def report(self):
+        """文本报告（每个维度一行与合计）"""
+        lines = []
+        for dimension, (chunks, selected, size, reclaimed) in self.by_dimension.items():
+            lines.append(f"{dimension_label(dimension)}\t区块 {chunks}\t可清理 {selected}\t"
+                         f"{_mb(size)} -> {_mb(size - reclaimed)}")
+        lines.append(f"合计：{self.chunks} 个区块，可清理 {self.selected} 个"
+                     f"（{self.errors} 个读取失败的区块保留）")
+        if self.failed_regions:
+            lines.append(f"{self.failed_regions} 个区域文件扫描失败，其中的区块全部保留")
+        lines.append(f"可回收 {_mb(self.reclaimed_bytes)}：清理区块 {_mb(self.pruned_bytes)}，"
+                     f"整理碎片 {_mb(self.compacted_bytes)}（{_mb(self.size)} -> {_mb(self.size - self.reclaimed_bytes)}）")
+        return "\n".join(lines)
+
+
+def _mb(size):
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+class WorldPruner:
+    """扫描存档中各维度的区块并按 InhabitedTime 清理"""
+
+    def __init__(self, world_path, dimensions=None, cache_dir=None, max_workers=None):
+        if is_archive(world_path.partition("!")[0]):
+            raise ValueError("压缩包中的存档只能查看，不能清理")
+        self.world_path = world_path
+        world_abs = os.path.abspath(world_path)
+        digest = hashlib.sha1(world_abs.encode("utf-8")).hexdigest()[:12]
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, f"{os.path.basename(world_abs) or 'world'}-{digest}")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.folders = discover_dimensions(world_path)
+        if dimensions:
+            wanted = {normalize_dimension(d) for d in dimensions}
+            self.folders = {d: folder for d, folder in self.folders.items() if d in wanted}
+        self.scans = {}
+        # 扫描失败的区域文件 [(文件, 错误)]，这些区域不会出现在清理计划中
+        self.errors = []
+
+    def _dimension_cache(self, dimension):
+        return os.path.join(self.cache_dir, dimension.replace(":", "_").replace("/", "_"))
+
+    def scan(self, progress=None, should_stop=None):
+        """扫描全部区域文件，progress(已完成, 总数) 用于进度回调"""
+        jobs = [
+            (dimension, path)
+            for dimension, folder in self.folders.items()
+            for path in list_region_files(os.path.join(self.world_path, folder, KIND_REGION))
+        ]
+        self.scans = {}
+        self.errors = []
+        if not jobs:
+            return self
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            futures = {
+                executor.submit(scan_region_cached, path, self._dimension_cache(dimension)): (dimension, path)
+                for dimension, path in jobs
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                if should_stop and should_stop():
+                    executor.shutdown(cancel_futures=True)
+                    break
+                dimension, path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.errors.append((path, e))
+                else:
+                    self.scans[(dimension, result["path"])] = result
+                if progress:
+                    progress(done, len(jobs))
+        return self
+
+    def _spawn_chunk(self):
+        try:
+            tags = read_nbt_paths(os.path.join(self.world_path, "level.dat"), ("Data.SpawnX", "Data.SpawnZ", "Data.Time"))
+        except (OSError, ValueError):
+            return None, None
+        spawn = None
+        if "Data.SpawnX" in tags and "Data.SpawnZ" in tags:
+            spawn = (int(tags["Data.SpawnX"]) >> 4, int(tags["Data.SpawnZ"]) >> 4)
+        return spawn, int(tags["Data.Time"]) if "Data.Time" in tags else None
+
+    def plan(self, max_inhabited=DEFAULT_MAX_INHABITED, keep_radius=0, idle_ticks=0):
+        """根据扫描结果生成清理计划
+
+        选中 InhabitedTime < max_inhabited 的区块；keep_radius 为主世界出生点周围保留的区块半径，
+        idle_ticks > 0 时只选中至少这么多刻未被加载过（世界时间 - LastUpdate）的区块。
+        缺少 InhabitedTime 或读取失败的区块一律保留。
+        """
+        spawn, world_time = self._spawn_chunk()
+        plan = PrunePlan()
+        plan.failed_regions = len(self.errors)
+        for (dimension, path), scan in sorted(self.scans.items()):
+            chunks = scan["chunks"]
+            rx, rz = region_coords(path)
+            index, timestamp, inhabited, last_update, sectors, error = chunks.T if len(chunks) \
+                else np.zeros((_COLUMNS, 0), dtype=np.int64)
+            selected = (inhabited >= 0) & (inhabited < max_inhabited) & (error == 0)
+            if idle_ticks > 0 and world_time is not None:
+                selected &= (last_update >= 0) & (world_time - last_update >= idle_ticks)
+            if keep_radius > 0 and spawn is not None and dimension == OVERWORLD:
+                cx = rx * 32 + (index & 31)
+                cz = rz * 32 + (index >> 5)
+                selected &= np.maximum(np.abs(cx - spawn[0]), np.abs(cz - spawn[1])) > keep_radius
+
+            kept_sectors = int(sectors[~selected].sum())
+            siblings = scan["siblings"]
+            size = scan["size"] + sum(s for s, _sectors in siblings.values())
+            # 清理：选中区块占用的扇区；整理碎片：剩余部分重写后比原文件小的部分
+            pruned = int(sectors[selected].sum()) * SECTOR_SIZE
+            after = (2 + kept_sectors) * SECTOR_SIZE if kept_sectors else 0
+            for sibling_size, sibling_sectors in siblings.values():
+                mask = np.zeros(CHUNKS_PER_REGION, dtype=bool)
+                mask[index[selected]] = True
+                pruned += int(sibling_sectors[mask].sum()) * SECTOR_SIZE
+                remaining = int(sibling_sectors[~mask].sum())
+                after += (2 + remaining) * SECTOR_SIZE if remaining else 0
+            compacted = max(0, size - after - pruned)
+
+            plan.chunks += len(chunks)
+            plan.selected += int(selected.sum())
+            plan.errors += int(error.sum())
+            plan.size += size
+            plan.pruned_bytes += pruned
+            plan.compacted_bytes += compacted
+            totals = plan.by_dimension.setdefault(dimension, [0, 0, 0, 0])
+            totals[0] += len(chunks)
+            totals[1] += int(selected.sum())
+            totals[2] += size
+            totals[3] += pruned + compacted
+            if selected.any() or compacted:
+                plan.regions.append((dimension, path, index[selected].tolist(),
+                                     dict(zip(index[selected].tolist(), timestamp[selected].tolist()))))
+        return plan
+
+    def apply(self, plan, progress=None):
+        """按计划并行重写区域文件，返回 {"removed", "before", "after", "errors": [(文件, 错误)]}"""
+        summary = {"removed": 0, "before": 0, "after": 0, "errors": []}
+        if not plan.regions:
+            return summary
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(plan.regions))) as executor:
+            futures = {
+                executor.submit(compact_region, path, remove, expected): path
+                for _dimension, path, remove, expected in plan.regions
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    summary["errors"].append((futures[future], e))
+                else:
+                    summary["removed"] += result["removed"]
+                    summary["before"] += result["before"]
+                    summary["after"] += result["after"]
+                if progress:
+                    progress(done, len(plan.regions))
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="world_prune", description="按 InhabitedTime 清理区块并压缩区域文件")
+    parser.add_argument("world", help="存档目录")
+    parser.add_argument("--max-inhabited", type=int, default=DEFAULT_MAX_INHABITED,
+                        help=f"清理 InhabitedTime 小于该值（刻，20 刻 = 1 秒）的区块，默认 {DEFAULT_MAX_INHABITED}")
+    parser.add_argument("--keep-radius", type=int, default=0, help="保留主世界出生点周围该半径（区块）内的区块")
+    parser.add_argument("--idle-ticks", type=int, default=0, help="只清理至少这么多刻未被加载过的区块")
+    parser.add_argument("--dimension", action="append", default=None, help="只处理该维度（可重复）")
+    parser.add_argument("--apply", action="store_true", help="实际重写区域文件（默认只输出报告）")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    pruner = WorldPruner(args.world, args.dimension, max_workers=args.jobs).scan()
+    plan = pruner.plan(args.max_inhabited, args.keep_radius, args.idle_ticks)
+    print(plan.report())
+    for path, error in pruner.errors:
+        print(f"扫描失败 {path}: {error}", file=sys.stderr)
+    if not args.apply:
+        return 0
+    summary = pruner.apply(plan)
+    print(f"已清理 {summary['removed']} 个区块：{_mb(summary['before'])} -> {_mb(summary['after'])}")
+    for path, error in summary["errors"]:
+        print(f"失败 {path}: {error}", file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+# world_scan.py
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from blockstates import chunk_level, iter_block_sections, unpack_indices
+from region import RegionFile, list_region_files
+
+# ===== 查询类型 =====
+QUERY_COUNT_BLOCKS = "count_blocks"
+QUERY_BLOCK_ENTITIES = "block_entities"
+QUERY_ENTITIES = "entities"
+
+QUERY_NAMES = {
+    QUERY_COUNT_BLOCKS: "统计方块数量",
+    QUERY_BLOCK_ENTITIES: "查找方块实体",
+    QUERY_ENTITIES: "列出实体",
+}
+
+# 各查询只需读取的区块标签路径，其余内容在解析时跳过
+_QUERY_PATHS = {
+    QUERY_COUNT_BLOCKS: ("DataVersion", "sections", "Level.Sections"),
+    QUERY_BLOCK_ENTITIES: ("block_entities", "Level.TileEntities"),
+    QUERY_ENTITIES: ("Entities", "Level.Entities"),
+}
+
+# 实体查询读取 1.17+ 的 entities/ 目录，旧版本实体仍在 region/ 中
+_QUERY_DIRS = {
+    QUERY_COUNT_BLOCKS: ("region",),
+    QUERY_BLOCK_ENTITIES: ("region",),
+    QUERY_ENTITIES: ("entities", "region"),
+}
+
+
+def normalize_id(name):
+    """补全命名空间：chest -> minecraft:chest"""
+    name = name.strip().lower()
+    return name if ":" in name or not name else f"minecraft:{name}"
+
+
+def count_blocks_in_chunk(chunk, targets):
+    """统计区块内目标方块的数量"""
+    count = 0
+    for _y, names, data, spanning in iter_block_sections(chunk):
+        wanted = [i for i, name in enumerate(names) if name in targets]
+        if not wanted:
+            continue
+        if len(names) == 1:
+            count += 4096
+            continue
+        counts = np.bincount(unpack_indices(data, len(names), spanning), minlength=len(names))
+        count += int(counts[wanted].sum())
+    return count
+
+
+def block_entities_in_chunk(chunk, targets):
+    level = chunk_level(chunk)
+    entities = chunk.get("block_entities", level.get("TileEntities", []))
+    hits = []
+    for entity in entities:
+        entity_id = str(entity.get("id", ""))
+        if not targets or normalize_id(entity_id) in targets:
+            hits.append({
+                "id": entity_id,
+                "x": int(entity.get("x", 0)),
+                "y": int(entity.get("y", 0)),
+                "z": int(entity.get("z", 0)),
+            })
+    return hits
+
+
+def entities_in_chunk(chunk, targets):
+    level = chunk_level(chunk)
+    entities = chunk.get("Entities", level.get("Entities", []))
+    hits = []
+    for entity in entities:
+        entity_id = str(entity.get("id", ""))
+        if targets and normalize_id(entity_id) not in targets:
+            continue
+        pos = entity.get("Pos", [0.0, 0.0, 0.0])
+        hits.append({
+            "id": entity_id,
+            "x": float(pos[0]),
+            "y": float(pos[1]),
+            "z": float(pos[2]),
+        })
+    return hits
+
+
+def scan_region(path, query, targets):
+    """在单个区域文件上执行查询（在子进程中运行）
+
+    返回 {"path", "chunks", "errors", "count" 或 "hits"}。
+    """
+    result = {"path": path, "chunks": 0, "errors": 0}
+    if query == QUERY_COUNT_BLOCKS:
+        result["count"] = 0
+    else:
+        result["hits"] = []
+    paths = _QUERY_PATHS[query]
+    with RegionFile(path) as region:
+        for x, z in region.iter_chunks():
+            try:
+                chunk = region.read_chunk_tags(x, z, paths) or {}
+                if query == QUERY_COUNT_BLOCKS:
+                    result["count"] += count_blocks_in_chunk(chunk, targets)
+                elif query == QUERY_BLOCK_ENTITIES:
+                    result["hits"].extend(block_entities_in_chunk(chunk, targets))
+                else:
+                    result["hits"].extend(entities_in_chunk(chunk, targets))
+                result["chunks"] += 1
+            except Exception:
+                result["errors"] += 1
+    return result
+
+
+def find_region_files(world_path, query):
+    """按查询类型列出需要扫描的区域文件（主世界）"""
+    for kind in _QUERY_DIRS[query]:
+        files = list_region_files(os.path.join(world_path, kind))
+        if files:
+            return files
+    return []
+
+
+class WorldScan:
+    """按区域文件拆分、在进程池中并行执行的全世界扫描
+
+    iter_results() 每完成一个区域文件就产出一次 (已完成数, 总数, 结果)，
+    调用 cancel() 后不再提交新任务并丢弃排队中的任务。
+    """
+
+    def __init__(self, world_path, query, targets=(), max_workers=None):
+        if query not in _QUERY_PATHS:
+            raise ValueError(f"未知的查询类型: {query}")
+        self.world_path = world_path
+        self.query = query
+        self.targets = frozenset(normalize_id(t) for t in targets if t.strip())
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.region_files = find_region_files(world_path, query)
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def iter_results(self):
+        total = len(self.region_files)
+        if not total:
+            return
+        done = 0
+        pending_files = iter(self.region_files)
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            # 只保持有限数量的在途任务，取消时无需等待整个队列
+            in_flight = {}
+            self._submit_more(executor, pending_files, in_flight)
+            while in_flight and not self.cancelled:
+                finished, _pending = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done += 1
+                    path = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # 与正常结果的字段一致，调用方无需区分
+                        result = {"path": path, "chunks": 0, "errors": 1, "error": str(e)}
+                        if self.query == QUERY_COUNT_BLOCKS:
+                            result["count"] = 0
+                        else:
+                            result["hits"] = []
+                    yield done, total, result
+                self._submit_more(executor, pending_files, in_flight)
+        finally:
+            # 取消或提前结束时不等待仍在运行的区域
+            executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+
+    def _submit_more(self, executor, pending_files, in_flight):
+        if self.cancelled:
+            return
+        while len(in_flight) < self.max_workers * 2:
+            path = next(pending_files, None)
+            if path is None:
+                return
+            in_flight[executor.submit(scan_region, path, self.query, self.targets)] = path
@@ -0,0 +1,354 @@
+# world_stats.py
+"""方块统计：方块组成直方图与矿石按 Y 分布
+
+每个区块的分段数组用 NumPy 归约：对调色板下标 bincount，再经查找表映射到方块表中的下标。
+方块组成按分段（16 格高）统计，矿石（*_ore 与远古残骸）精确到每一层 Y。
+
+统计结果按区块缓存在磁盘上（每个区域文件一个 .npz，记录各区块的时间戳），
+再次统计时只重新计算时间戳变化的区块；整个世界或某个范围的结果由各区块合并得到。
+
+用法:
+    python -m world_stats <存档目录> [--dimension minecraft:the_nether] [--box x1 z1 x2 z2] [--limit 30]
+    python -m world_stats <存档目录> --ores
+    python -m world_stats <存档目录> --baseline backup.zip    # 与备份相比各方块的变化（如被挖掉的钻石矿）
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from blockstates import SECTION_VOLUME
+from chunk_cache import cached_chunk, decode_chunk, shared_cache
+from dimensions import KIND_REGION, OVERWORLD, DimensionRegistry, normalize_dimension
+from region import region_coords
+from vfs import open_world_fs
+from world_scan import normalize_id
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".minecraft_archive_viewer", "cache", "stats")
+CACHE_VERSION = 1
+
+AIR_BLOCKS = frozenset(("minecraft:air", "minecraft:cave_air", "minecraft:void_air"))
+# 统计只需要方块分段
+_STATS_PATHS = ("DataVersion", "yPos", "sections", "Level.Sections")
+# 分段内每个方块所在的层（0-15）
+_LAYER = np.arange(SECTION_VOLUME, dtype=np.int64) >> 8
+
+
+def is_ore(name):
+    """是否按每层 Y 统计（矿石）"""
+    return name.endswith("_ore") or name == "minecraft:ancient_debris"
+
+
+def chunk_stats(chunk, vocabulary):
+    """单个已解码区块（DecodedChunk）的统计
+
+    vocabulary 为 {方块名: 下标}，遇到新方块时追加。返回
+    (分段直方图 (n, 3) [分段 Y, 方块, 数量], 矿石分布 (m, 3) [Y, 方块, 数量])。
+    """
+    if not len(chunk.palettes):
+        return _stack([], 3), _stack([], 3)
+    # 各分段的调色板首尾相接，区块内所有方块一次 bincount 即可
+    sizes = np.array([len(palette) for palette in chunk.palettes], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    total = int(sizes.sum())
+    names = [name for palette in chunk.palettes for name in palette]
+    lut = np.array([vocabulary.setdefault(name, len(vocabulary)) for name in names], dtype=np.int64)
+    entry_y = np.repeat(chunk.section_y.astype(np.int64), sizes)
+    flat = chunk.blocks.astype(np.int64)
+    if (chunk.blocks.max(axis=1) < sizes).all():
+        flat += offsets[:, None]
+    else:
+        # 损坏的分段中下标可能超出调色板，计入最后一个多余的桶后丢弃
+        flat = np.where(flat < sizes[:, None], flat + offsets[:, None], total)
+
+    # 一次 bincount 得到每个调色板项在每一层的数量，分段直方图由其按层求和
+    per_layer = np.bincount((flat * 16 + _LAYER).reshape(-1), minlength=(total + 1) * 16)
+    per_layer = per_layer.reshape(total + 1, 16)[:total]
+    counts = per_layer.sum(axis=1)
+    present = np.flatnonzero(counts)
+    sections = np.column_stack([entry_y[present], lut[present], counts[present]])
+
+    tracked = np.flatnonzero([is_ore(name) for name in names])
+    entries, layers = np.nonzero(per_layer[tracked])
+    entries = tracked[entries]
+    ores = np.column_stack([entry_y[entries] * 16 + layers, lut[entries], per_layer[entries, layers]])
+    return sections, ores
+
+
+def _stack(parts, width):
+    return np.concatenate(parts).astype(np.int64) if parts else np.zeros((0, width), dtype=np.int64)
+
+
+def _failed_region():
+    """整个区域文件读取失败时的结果：不含任何区块，计为一次错误"""
+    empty = np.zeros((0, 3), dtype=np.int64)
+    return {"names": [], "sections": empty, "ores": empty, "chunks": 0, "computed": 0, "errors": 1}
+
+
+def _reduce(rows):
+    """合并 [Y, 方块, 数量] 行：Y 与方块相同的行数量相加"""
+    if not len(rows):
+        return rows
+    # (Y, 方块) 编码为一个整数后 bincount，比按行 unique 快得多
+    y0 = int(rows[:, 0].min())
+    width = int(rows[:, 1].max()) + 1
+    counts = np.bincount((rows[:, 0] - y0) * width + rows[:, 1], weights=rows[:, 2]).astype(np.int64)
+    keys = np.flatnonzero(counts)
+    return np.column_stack([keys // width + y0, keys % width, counts[keys]])
+
+
+def _in_box(cx, cz, box):
+    return box is None or (box[0] <= cx <= box[2] and box[1] <= cz <= box[3])
+
+
+def region_stats(world_path, path, cache_path, box=None, chunk_cache=None):
+    """单个区域文件的统计（通常在子进程中运行）
+
+    已缓存且时间戳未变的区块直接复用；box 为区块坐标范围 (x1, z1, x2, z2)，
+    只计算并汇总范围内的区块，范围外未缓存的区块留到需要时再计算。
+    在主进程中运行时传入 chunk_cache（共享的 ChunkCache），需要计算的区块经过该缓存解码，
+    与地图等功能互相复用。
+    返回 {"names", "sections" [分段 Y, 方块, 数量], "ores" [Y, 方块, 数量], "chunks", "computed", "errors"}，
+    方块以 names 中的下标表示，各行已合并。
+    """
+    names, chunk_rows = [], np.zeros((0, 3), dtype=np.int64)
+    sections, ores = np.zeros((0, 4), dtype=np.int64), np.zeros((0, 4), dtype=np.int64)
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if int(cached["version"]) == CACHE_VERSION:
+                names = cached["names"].tolist()
+                chunk_rows = cached["chunks"]
+                sections, ores = cached["sections"].astype(np.int64), cached["ores"].astype(np.int64)
+    except (OSError, KeyError, ValueError):
+        pass
+
+    vocabulary = {name: i for i, name in enumerate(names)}
+    region = open_world_fs(world_path).open_region(path)
+    try:
+        rx, rz = region.coords or (0, 0)
+        present = {z * 32 + x: region.chunk_timestamp(x, z) for x, z in region.iter_chunks()}
+        # 缓存中的区块：[区域内序号, 时间戳, 是否读取失败]；时间戳变化或已删除的区块作废
+        known = {int(i): int(t) for i, t, _e in chunk_rows.tolist()}
+        valid = np.array([present.get(i) == t for i, t, _e in chunk_rows.tolist()], dtype=bool)
+        chunk_rows = chunk_rows[valid]
+        keep = chunk_rows[:, 0]
+        sections = sections[np.isin(sections[:, 0], keep)]
+        ores = ores[np.isin(ores[:, 0], keep)]
+
+        new_chunks, new_sections, new_ores = [], [], []
+        for index, timestamp in present.items():
+            x, z = index % 32, index // 32
+            if known.get(index) == timestamp or not _in_box(rx * 32 + x, rz * 32 + z, box):
+                continue
+            error = 0
+            try:
+                if chunk_cache is not None:
+                    decoded = cached_chunk(region, rx * 32 + x, rz * 32 + z, chunk_cache)
+                else:
+                    chunk = region.read_chunk_tags(x, z, _STATS_PATHS)
+                    decoded = None if chunk is None else decode_chunk(chunk, x, z)
+                if decoded is not None:
+                    chunk_sections, chunk_ores = chunk_stats(decoded, vocabulary)
+                    new_sections.append(np.column_stack([np.full(len(chunk_sections), index), chunk_sections]))
+                    new_ores.append(np.column_stack([np.full(len(chunk_ores), index), chunk_ores]))
+            except Exception:
+                error = 1
+            new_chunks.append((index, timestamp, error))
+    finally:
+        region.close()
+
+    if new_chunks or not valid.all():
+        chunk_rows = np.concatenate([chunk_rows, np.array(new_chunks, dtype=np.int64).reshape(-1, 3)])
+        sections = np.concatenate([sections, _stack(new_sections, 4)])
+        ores = np.concatenate([ores, _stack(new_ores, 4)])
+        names = list(vocabulary)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + ".tmp.npz"
+        np.savez(tmp_path, version=CACHE_VERSION, names=np.array(names, dtype=str),
+                 chunks=chunk_rows, sections=sections.astype(np.int32), ores=ores.astype(np.int32))
+        os.replace(tmp_path, cache_path)
+
+    if box is not None:
+        inside = np.array([_in_box(rx * 32 + i % 32, rz * 32 + i // 32, box) for i in range(32 * 32)], dtype=bool)
+        chunk_rows = chunk_rows[inside[chunk_rows[:, 0]]]
+        sections = sections[inside[sections[:, 0]]]
+        ores = ores[inside[ores[:, 0]]]
+    return {
+        "names": names,
+        "sections": _reduce(sections[:, 1:]),
+        "ores": _reduce(ores[:, 1:]),
+        "chunks": len(chunk_rows),
+        "computed": len(new_chunks),
+        "errors": int(chunk_rows[:, 2].sum()) if len(chunk_rows) else 0,
+    }
+
+
+class StatsResult:
+    """合并后的统计结果；方块以 names 中的下标表示"""
+
+    def __init__(self, names, sections, ores, chunks=0, computed=0, errors=0):
+        self.names = names
+        self.sections = sections
+        self.ores = ores
+        self.chunks = chunks
+        self.computed = computed
+        self.errors = errors
+
+    def _block_id(self, name):
+        name = normalize_id(name)
+        return self.names.index(name) if name in self.names else -1
+
+    def _counts(self, rows):
+        counts = np.bincount(rows[:, -2], weights=rows[:, -1], minlength=len(self.names)) if len(rows) \
+            else np.zeros(len(self.names))
+        return counts.astype(np.int64)
+
+    def totals(self, include_air=False):
+        """各方块数量：{方块名: 数量}，按数量降序"""
+        counts = self._counts(self.sections)
+        order = np.argsort(counts, kind="stable")[::-1]
+        return {self.names[i]: int(counts[i]) for i in order
+                if counts[i] and (include_air or self.names[i] not in AIR_BLOCKS)}
+
+    def ore_totals(self):
+        """各矿石数量：{矿石名: 数量}，按数量降序"""
+        return {name: count for name, count in self.totals().items() if is_ore(name)}
+
+    def by_y(self, name):
+        """某方块按高度的分布：[(Y, 数量)]
+
+        矿石精确到每层；其它方块按分段统计，Y 为分段的最低一层。
+        """
+        block = self._block_id(name)
+        exact = is_ore(normalize_id(name))
+        rows = self.ores if exact else self.sections
+        rows = rows[rows[:, 1] == block]
+        scale = 1 if exact else 16
+        return [(y * scale, count) for y, _block, count in rows[np.argsort(rows[:, 0])].tolist()]
+
+    def compare(self, baseline):
+        """与另一份统计（如旧备份）相比数量变化的方块：{方块名: (原数量, 现数量, 变化)}，变化大的在前"""
+        before, after = baseline.totals(include_air=True), self.totals(include_air=True)
+        changes = {name: (before.get(name, 0), after.get(name, 0), after.get(name, 0) - before.get(name, 0))
+                   for name in set(before) | set(after)}
+        return dict(sorted(((k, v) for k, v in changes.items() if v[2]), key=lambda item: -abs(item[1][2])))
+
+
+class WorldStats:
+    """某维度的方块统计引擎：区域文件在进程池中并行统计，结果按区块缓存并合并"""
+
+    def __init__(self, world_path, dimension=OVERWORLD, cache_dir=None, max_workers=None):
+        """world_path 可以是存档目录或压缩包备份"""
+        self.world_path = world_path
+        self.dimension = normalize_dimension(dimension)
+        world_abs = os.path.abspath(world_path)
+        digest = hashlib.sha1(world_abs.encode("utf-8")).hexdigest()[:12]
+        self.cache_dir = os.path.join(
+            cache_dir or CACHE_DIR, f"{os.path.basename(world_abs) or 'world'}-{digest}",
+            self.dimension.replace(":", "_").replace("/", "_"))
+        self.max_workers = max_workers or os.cpu_count() or 1
+        with DimensionRegistry(world_path) as registry:
+            self.region_files = registry.get(self.dimension).region_files(KIND_REGION) \
+                if self.dimension in registry else []
+
+    def _region_results(self, jobs, chunk_box, should_stop=None):
+        """逐个产出各区域文件的统计结果
+
+        只有一个区域（如统计玩家附近的范围）或只用一个进程时在当前进程中计算，
+        区块经过共享的区块缓存解码；否则在进程池中并行计算。
+        """
+        def cache_path(path):
+            return os.path.join(self.cache_dir, os.path.basename(path) + ".npz")
+
+        if len(jobs) == 1 or self.max_workers == 1:
+            cache = shared_cache()
+            for path in jobs:
+                if should_stop and should_stop():
+                    return
+                try:
+                    result = region_stats(self.world_path, path, cache_path(path), chunk_box, cache)
+                except Exception:
+                    result = _failed_region()
+                yield result
+            return
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            futures = [executor.submit(region_stats, self.world_path, path, cache_path(path), chunk_box)
+                       for path in jobs]
+            for future in as_completed(futures):
+                if should_stop and should_stop():
+                    executor.shutdown(cancel_futures=True)
+                    return
+                try:
+                    result = future.result()
+                except Exception:
+                    # 单个区域失败时计入 errors，其余区域照常汇总
+                    result = _failed_region()
+                yield result
+
+    def compute(self, box=None, progress=None, should_stop=None):
+        """统计整个维度或方块坐标范围 box=(x1, z1, x2, z2)（按区块对齐），返回 StatsResult
+
+        progress(已完成, 总数) 用于进度回调。
+        """
+        chunk_box = None
+        jobs = self.region_files
+        if box is not None:
+            x1, z1, x2, z2 = box
+            chunk_box = (min(x1, x2) >> 4, min(z1, z2) >> 4, max(x1, x2) >> 4, max(z1, z2) >> 4)
+            region_box = tuple(v >> 5 for v in chunk_box)
+            jobs = [path for path in jobs if _in_box(*region_coords(path), region_box)]
+
+        vocabulary = {}
+        sections, ores = [], []
+        chunks = computed = errors = 0
+        for done, result in enumerate(self._region_results(jobs, chunk_box, should_stop), 1):
+            # 把区域内的方块下标映射到全局方块表
+            remap = np.array([vocabulary.setdefault(n, len(vocabulary)) for n in result["names"]], dtype=np.int64)
+            for rows, parts in ((result["sections"], sections), (result["ores"], ores)):
+                if len(rows):
+                    rows = rows.copy()
+                    rows[:, 1] = remap[rows[:, 1]]
+                    parts.append(rows)
+            chunks += result["chunks"]
+            computed += result["computed"]
+            errors += result["errors"]
+            if progress:
+                progress(done, len(jobs))
+        return StatsResult(list(vocabulary), _reduce(_stack(sections, 3)), _reduce(_stack(ores, 3)),
+                           chunks, computed, errors)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="world_stats", description="统计存档中的方块组成与矿石分布")
+    parser.add_argument("world", help="存档目录或 .zip/.tar.gz 备份")
+    parser.add_argument("--dimension", default=OVERWORLD)
+    parser.add_argument("--box", type=int, nargs=4, metavar=("X1", "Z1", "X2", "Z2"), help="只统计该方块坐标范围")
+    parser.add_argument("--limit", type=int, default=30)
+    parser.add_argument("--ores", action="store_true", help="显示各矿石按 Y 的分布")
+    parser.add_argument("--baseline", default=None, help="与该存档（或备份）比较各方块数量的变化")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并发进程数（默认 CPU 核数）")
+    args = parser.parse_args(argv)
+
+    box = tuple(args.box) if args.box else None
+    result = WorldStats(args.world, args.dimension, max_workers=args.jobs).compute(box)
+    print(f"区块 {result.chunks}（本次计算 {result.computed}，读取失败 {result.errors}）")
+    if args.baseline:
+        baseline = WorldStats(args.baseline, args.dimension, max_workers=args.jobs).compute(box)
+        for name, (before, after, change) in list(result.compare(baseline).items())[:args.limit]:
+            print(f"{name}\t{before}\t{after}\t{change:+d}")
+    elif args.ores:
+        for name, total in result.ore_totals().items():
+            print(f"{name}\t{total}")
+            print("  " + "  ".join(f"Y{y}:{count}" for y, count in result.by_y(name)))
+    else:
+        for name, count in list(result.totals().items())[:args.limit]:
+            print(f"{name}\t{count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+# world_watch.py
+"""监视运行中服务器的存档目录，增量读取发生变化的文件
+
+监视 level.dat、playerdata/*.dat 与各维度的 region/、entities/ 区域文件。
+Linux 上使用 inotify（通过 ctypes 调用 libc，无需额外依赖），其它平台或 inotify
+不可用时退回按间隔比较文件的 mtime 与大小。
+
+服务器保存时会在短时间内写入大量文件，变化先累积起来，在 debounce 秒内没有新的变化
+（或距第一次变化已超过 max_delay 秒）时才统一处理。区域文件只读取头部时间戳发生变化的
+区块；读取失败（文件正在写入）的文件与区块保留旧状态，稍后重试。
+
+用法:
+    python -m world_watch <存档目录> [--debounce 2] [--poll]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+import zlib
+
+from chunk_cache import CHUNK_PATHS, decode_chunk, shared_cache
+from dimensions import KIND_ENTITIES, KIND_REGION, discover_dimensions
+from mc_saver import MinecraftSaver
+from nbt_stream import NBTFormatError
+from players import KIND_PLAYERDATA, parse_player_file
+from region import RegionFile, RegionFormatError, region_coords
+
+logger = logging.getLogger("Vanction Minecraft Archive Viewer")
+
+CHANGE_LEVEL = "level"
+CHANGE_PLAYER = "player"
+CHANGE_REGION = "region"
+
+WATCH_KINDS = (KIND_REGION, KIND_ENTITIES)
+# 读取失败的文件最多重试的次数（每次间隔一个 debounce 周期）
+MAX_RETRIES = 5
+# 使用 inotify 时重新发现维度目录的间隔（秒），用于发现新生成的深层目录
+RESCAN_INTERVAL = 30.0
+# 正在写入的文件可能出现的错误
+_PARTIAL_ERRORS = (OSError, EOFError, zlib.error, NBTFormatError, RegionFormatError, ValueError, struct.error)
+
+# inotify 事件位（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """最小的 inotify 封装：监视若干目录，返回发生变化的文件路径"""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify 仅在 Linux 上可用")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._dirs = {}
+
+    def add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"无法监视 {directory}")
+        self._dirs[wd] = directory
+
+    def watched(self):
+        return set(self._dirs.values())
+
+    def read(self, timeout):
+        """等待最多 timeout 秒，返回 (变化的路径集合, 是否有目录变化或事件溢出)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        paths = set()
+        rescan = False
+        while readable:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+                pos += _EVENT.size + length
+                if mask & (IN_Q_OVERFLOW | IN_ISDIR):
+                    rescan = True
+                elif wd in self._dirs and name:
+                    paths.add(os.path.join(self._dirs[wd], os.fsdecode(name)))
+            readable, _, _ = select.select([self.fd], [], [], 0)
+        return paths, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class WorldWatcher:
+    """监视存档目录，把变化整理成变更记录交给回调
+
+    变更记录:
+        {"type": "level", "saver": MinecraftSaver}
+        {"type": "player", "uuid": ..., "data": parse_playerdata 的结果，文件被删除时为 None}
+        {"type": "region", "dimension", "kind", "path", "chunks": [(区块 x, 区块 z)],
+         "removed": [...], "entities": {(x, z): 实体数}（仅 entities/）}
+    """
+
+    def __init__(self, world_path, debounce=2.0, max_delay=10.0, poll_interval=2.0, use_inotify=True):
+        self.world_path = world_path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend = None
+        self._stats = {}
+        self._timestamps = {}
+        self._retries = {}
+        self._seen = {}
+        self._region_dirs = {}
+        self._last_rescan = 0.0
+
+    # ===== 监视的文件 =====
+
+    def _scan_dirs(self):
+        """{目录: (维度, 类型)}：各维度的区域文件目录"""
+        dirs = {}
+        for dimension, folder in discover_dimensions(self.world_path).items():
+            for kind in WATCH_KINDS:
+                directory = os.path.join(self.world_path, folder, kind)
+                if os.path.isdir(directory):
+                    dirs[directory] = (dimension, kind)
+        return dirs
+
+    def _watched_files(self):
+        files = [os.path.join(self.world_path, "level.dat")]
+        playerdata = os.path.join(self.world_path, KIND_PLAYERDATA)
+        try:
+            files.extend(e.path for e in os.scandir(playerdata) if e.name.endswith(".dat"))
+        except OSError:
+            pass
+        for directory in self._region_dirs:
+            try:
+                files.extend(e.path for e in os.scandir(directory) if region_coords(e.name))
+            except OSError:
+                pass
+        return files
+
+    def _classify(self, path):
+        """变化的文件属于哪一类；无关文件（如 level.dat_old、临时文件）返回 None"""
+        directory, name = os.path.split(path)
+        if directory == os.path.normpath(self.world_path) and name == "level.dat":
+            return CHANGE_LEVEL
+        if os.path.basename(directory) == KIND_PLAYERDATA and name.endswith(".dat"):
+            return CHANGE_PLAYER
+        if directory in self._region_dirs and region_coords(name):
+            return CHANGE_REGION
+        return None
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read_timestamps(self, path):
+        with RegionFile(path) as region:
+            return region.timestamps
+
+    def start(self):
+        """记录初始状态（不读取区块数据），并在可用时建立 inotify 监视"""
+        self.world_path = os.path.normpath(self.world_path)
+        self._region_dirs = self._scan_dirs()
+        self._last_rescan = time.monotonic()
+        self._stats = {path: self._stat(path) for path in self._watched_files()}
+        # 轮询时上一次看到的状态；_stats 则是最近一次成功处理时的状态
+        self._seen = dict(self._stats)
+        self._timestamps = {}
+        for path in self._stats:
+            if self._classify(path) == CHANGE_REGION:
+                try:
+                    self._timestamps[path] = self._read_timestamps(path)
+                except _PARTIAL_ERRORS:
+                    pass
+        if self.use_inotify and self.backend is None:
+            try:
+                self.backend = Inotify()
+            except (OSError, AttributeError) as e:
+                logger.info(f"inotify 不可用，改为轮询: {e}")
+        self._add_watches()
+        return self
+
+    def _add_watches(self):
+        if self.backend is None:
+            return
+        directories = [self.world_path, os.path.join(self.world_path, KIND_PLAYERDATA), *self._region_dirs]
+        for directory in directories:
+            if os.path.isdir(directory) and directory not in self.backend.watched():
+                self.backend.add_watch(directory)
+
+    def _rescan(self):
+        """目录结构变化（如新维度第一次生成区块）后重新确定监视范围"""
+        self._last_rescan = time.monotonic()
+        self._region_dirs = self._scan_dirs()
+        self._add_watches()
+        return {path for path in self._watched_files() if path not in self._stats}
+
+    def _poll(self):
+        """轮询：返回自上次轮询以来 mtime 或大小变化（含新建与删除）的文件"""
+        changed = set()
+        current = set(self._watched_files())
+        for path in current | set(self._seen):
+            stat = self._stat(path)
+            if stat != self._seen.get(path):
+                changed.add(path)
+                if stat is None:
+                    self._seen.pop(path, None)
+                else:
+                    self._seen[path] = stat
+        return changed
+
+    def _wait(self, timeout):
+        if self.backend is not None:
+            paths, rescan = self.backend.read(timeout)
+            if rescan or time.monotonic() - self._last_rescan >= RESCAN_INTERVAL:
+                paths |= self._rescan()
+            return paths
+        time.sleep(timeout)
+        self._region_dirs = self._scan_dirs()
+        return self._poll()
+
+    # ===== 主循环 =====
+
+    def run(self, on_change, should_stop=lambda: False):
+        """阻塞运行直到 should_stop() 为真；每处理完一批变化调用 on_change(变更记录列表)"""
+        self.start()
+        pending = set()
+        first_event = last_event = None
+        try:
+            while not should_stop():
+                timeout = self.debounce if pending else (0.5 if self.backend is not None else self.poll_interval)
+                paths = {p for p in self._wait(timeout) if self._classify(p)}
+                now = time.monotonic()
+                if paths:
+                    pending |= paths
+                    last_event = now
+                    first_event = first_event or now
+                if pending and (now - last_event >= self.debounce or now - first_event >= self.max_delay):
+                    batch, pending = pending, set()
+                    first_event = last_event = None
+                    changes, retry = self.process(batch)
+                    if retry:
+                        # 文件仍在写入：下一个周期重试
+                        pending |= retry
+                        first_event = last_event = time.monotonic()
+                    if changes:
+                        on_change(changes)
+        finally:
+            if self.backend is not None:
+                self.backend.close()
+                self.backend = None
+
+    def process(self, paths):
+        """处理一批变化的文件，返回 (变更记录列表, 需要重试的文件集合)"""
+        changes = []
+        retry = set()
+        for path in sorted(paths):
+            kind = self._classify(path)
+            stat = self._stat(path)
+            try:
+                change, incomplete = self._process_file(kind, path, stat)
+            except _PARTIAL_ERRORS as e:
+                change, incomplete = None, e
+            if change is not None:
+                changes.append(change)
+            if incomplete is not None:
+                attempts = self._retries.get(path, 0) + 1
+                if attempts < MAX_RETRIES:
+                    self._retries[path] = attempts
+                    retry.add(path)
+                    logger.debug(f"文件可能正在写入，稍后重试: {path}: {incomplete}")
+                else:
+                    self._retries.pop(path, None)
+                    logger.warning(f"多次读取失败，跳过: {path}: {incomplete}")
+                continue
+            self._retries.pop(path, None)
+            if stat is None:
+                self._stats.pop(path, None)
+            else:
+                self._stats[path] = stat
+        return changes, retry
+
+    def _process_file(self, kind, path, stat):
+        """返回 (变更记录或 None, 未能读取完整时的异常或 None)"""
+        if kind == CHANGE_LEVEL:
+            if stat is None:
+                return None, None
+            return {"type": CHANGE_LEVEL, "saver": MinecraftSaver(self.world_path)}, None
+        if kind == CHANGE_PLAYER:
+            uuid = os.path.splitext(os.path.basename(path))[0]
+            if stat is None:
+                return {"type": CHANGE_PLAYER, "uuid": uuid, "data": None}, None
+            data = parse_player_file(KIND_PLAYERDATA, path)
+            if "error" in data:
+                raise ValueError(data["error"])
+            return {"type": CHANGE_PLAYER, "uuid": uuid, "data": data}, None
+        return self._process_region(path, stat)
+
+    def _process_region(self, path, stat):
+        """只读取头部时间戳变化的区块；读取失败的区块保留旧时间戳，由重试补上"""
+        dimension, kind = self._region_dirs[os.path.dirname(path)]
+        change = {"type": CHANGE_REGION, "dimension": dimension, "kind": kind, "path": path,
+                  "chunks": [], "removed": []}
+        if kind == KIND_ENTITIES:
+            change["entities"] = {}
+        old = self._timestamps.get(path)
+        if stat is None:
+            self._timestamps.pop(path, None)
+            rx, rz = region_coords(path)
+            if old is not None:
+                change["removed"] = [(rx * 32 + (i & 31), rz * 32 + (i >> 5)) for i, ts in enumerate(old) if ts]
+            return (change if change["removed"] else None), None
+
+        failed = None
+        with RegionFile(path) as region:
+            timestamps = region.timestamps
+            rx, rz = region.coords
+            new = list(timestamps)
+            cache = shared_cache()
+            for i, ts in enumerate(timestamps):
+                if old is not None and old[i] == ts:
+                    continue
+                cx, cz = rx * 32 + (i & 31), rz * 32 + (i >> 5)
+                if not region.locations[i]:
+                    if old is not None and old[i]:
+                        change["removed"].append((cx, cz))
+                    continue
+                try:
+                    if kind == KIND_REGION:
+                        chunk = region.read_chunk_tags(cx, cz, CHUNK_PATHS)
+                        if chunk is not None:
+                            # 写入共享缓存，之后在地图等处查看该区块时无需再次解码
+                            cache.put((region.path, cx, cz, ts), decode_chunk(chunk, cx, cz))
+                    else:
+                        chunk = region.read_chunk_tags(cx, cz, ("Entities",)) or {}
+                        change["entities"][(cx, cz)] = len(chunk.get("Entities", ()))
+                except _PARTIAL_ERRORS as e:
+                    # 区块数据尚未写完：保留旧时间戳，重试时只会重新读取这些区块
+                    new[i] = old[i] if old is not None else 0
+                    failed = e
+                    continue
+                change["chunks"].append((cx, cz))
+        self._timestamps[path] = new
+        return (change if change["chunks"] or change["removed"] else None), failed
+
+
+def describe_changes(changes):
+    """变更记录的简短文字描述"""
+    parts = []
+    players = [c for c in changes if c["type"] == CHANGE_PLAYER]
+    regions = [c for c in changes if c["type"] == CHANGE_REGION]
+    if any(c["type"] == CHANGE_LEVEL for c in changes):
+        parts.append("level.dat")
+    if players:
+        parts.append(f"玩家 {len(players)} 个")
+    if regions:
+        chunks = sum(len(c["chunks"]) for c in regions)
+        removed = sum(len(c["removed"]) for c in regions)
+        text = f"区域 {len(regions)} 个（区块 {chunks} 个"
+        parts.append(text + (f"，删除 {removed} 个）" if removed else "）"))
+    return "、".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="world_watch", description="监视运行中服务器的存档，输出增量变化")
+    parser.add_argument("world", help="存档目录")
+    parser.add_argument("--debounce", type=float, default=2.0, help="变化平息多少秒后再处理（默认 2 秒）")
+    parser.add_argument("--poll", action="store_true", help="不使用 inotify，按间隔轮询")
+    args = parser.parse_args(argv)
+
+    def on_change(changes):
+        print(time.strftime("%H:%M:%S"), describe_changes(changes), flush=True)
+        for change in changes:
+            if change["type"] == CHANGE_REGION:
+                name = os.path.relpath(change["path"], args.world)
+                print(f"  {name}: {len(change['chunks'])} 个区块变化", flush=True)
+
+    watcher = WorldWatcher(args.world, debounce=args.debounce, use_inotify=not args.poll)
+    try:
+        watcher.run(on_change)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())